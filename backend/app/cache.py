@@ -0,0 +1,101 @@
+import functools
+import os
+import time
+from collections import OrderedDict
+
+from app.database import primary_reads
+
+# Cache em memória (por processo) para consultas de leitura frequente e pouca
+# escrita, como as listas usadas nos selects do frontend. Cada cache tem
+# tamanho máximo (LRU) e TTL; os métodos de escrita dos repositórios chamam
+# invalidate() para que a mudança apareça imediatamente neste processo. As
+# leituras que preenchem o cache vão ao primário: uma réplica atrasada poderia
+# devolver o dado anterior à escrita, que ficaria no cache por todo o TTL.
+
+LOOKUP_CACHE_TTL = float(os.getenv("LOOKUP_CACHE_TTL", "300"))
+LOOKUP_CACHE_MAXSIZE = int(os.getenv("LOOKUP_CACHE_MAXSIZE", "128"))
+
+# Registro de todos os caches criados, usado para expor as métricas
+caches = {}
+
+class TTLCache:
+    def __init__(self, name: str, maxsize: int = LOOKUP_CACHE_MAXSIZE, ttl: float = LOOKUP_CACHE_TTL):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_discards = 0
+        # Incrementada por invalidate(); leituras iniciadas antes dela não gravam o resultado
+        self.generation = 0
+        self._data = OrderedDict()
+        caches[name] = self
+
+    def get(self, key):
+        """Retorna (encontrado, valor) e marca a entrada como usada recentemente"""
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._data[key]
+        self.misses += 1
+        return False, None
+
+    def set(self, key, value, ttl: float = None):
+        """Guarda value; ttl sobrescreve o TTL padrão do cache para esta entrada"""
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def invalidate(self):
+        """Descarta todas as entradas (chamado pelos métodos de escrita)"""
+        self._data.clear()
+        self.generation += 1
+        self.invalidations += 1
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_discards": self.stale_discards,
+        }
+
+def cached(cache: TTLCache):
+    """Decorator para métodos async de repositório; a chave é o nome do método + argumentos"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            found, value = cache.get(key)
+            if found:
+                return value
+            generation = cache.generation
+            with primary_reads():
+                value = await func(self, *args, **kwargs)
+            # Uma escrita invalidou o cache durante a leitura: o resultado pode ser anterior a ela
+            if cache.generation == generation:
+                cache.set(key, value)
+            else:
+                cache.stale_discards += 1
+            return value
+        return wrapper
+    return decorator
+
+def cache_stats():
+    """Métricas de todos os caches, por nome"""
+    return {name: cache.stats() for name, cache in caches.items()}
@@ -0,0 +1,369 @@
+import asyncio
+import heapq
+import logging
+import os
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import repeat
+
+import anyio.to_thread
+
+from app.repositories.coautoria_repository import CoautoriaRepository
+from app.repositories.versao_repository import VersaoRepository
+from app.singleflight import SingleFlight
+
+# Grafo de colaboração entre participantes, em memória (por processo): há
+# aresta entre dois participantes que assinaram uma produção juntos ou
+# participam do mesmo projeto, com o número de produções e de projetos em
+# comum como pesos. Cada participante vira um índice inteiro e guarda os
+# vizinhos (ordenados) e os pesos em arrays paralelos, então colaboradores,
+# força da colaboração e caminho mais curto são respondidos sem ir ao banco.
+#
+# O grafo é montado de producoes_autores e participantes_projetos no startup
+# (ou na primeira consulta). Os métodos de escrita dos repositórios aplicam
+# suas mudanças nele na hora (como o invalidate() dos caches) e registram as
+# versões de versoes_tabelas que a própria escrita gerou, lidas na transação
+# dela (iniciar_escrita/concluir_escrita). Escritas de outros processos ou
+# feitas direto no banco aparecem como versões mais novas que as do grafo e
+# são corrigidas recarregando o grafo em segundo plano, no máximo uma vez a
+# cada COAUTORIA_RELOAD_INTERVAL segundos.
+
+logger = logging.getLogger(__name__)
+
+COAUTORIA_CHECK_INTERVAL = float(os.getenv("COAUTORIA_CHECK_INTERVAL", "5"))  # segundos entre checagens de versão
+COAUTORIA_RELOAD_INTERVAL = float(os.getenv("COAUTORIA_RELOAD_INTERVAL", "300"))  # segundos entre recargas
+
+# Tabelas cuja escrita pode mudar o grafo (as três últimas por ON DELETE CASCADE)
+FONTES = ("participantes_projetos", "producoes_autores", "participantes", "producoes", "projetos")
+
+PRODUCAO, PROJETO = 0, 1
+
+class Grafo:
+    """Lista de adjacência compacta: para o participante i, vizinhos[i] (ordenado)
+    e os pesos producoes[i] / projetos[i] nas mesmas posições"""
+
+    def __init__(self, versoes=None):
+        self.versoes = versoes  # {tabela: versao} que o grafo reflete
+        self.cpfs = []
+        self.indices = {}
+        self.vizinhos = []
+        self.producoes = []
+        self.projetos = []
+        self.arestas = 0
+
+    def indice(self, cpf: str, criar: bool = False):
+        i = self.indices.get(cpf)
+        if i is None and criar:
+            i = self.indices[cpf] = len(self.cpfs)
+            self.cpfs.append(cpf)
+            self.vizinhos.append(array("I"))
+            self.producoes.append(array("I"))
+            self.projetos.append(array("I"))
+        return i
+
+    def _pesos(self, tipo):
+        return self.producoes if tipo == PRODUCAO else self.projetos
+
+    def _ajustar_lado(self, i, j, tipo, delta):
+        """Soma delta ao peso da aresta i -> j; retorna +1/-1 se a aresta foi criada/removida"""
+        vizinhos = self.vizinhos[i]
+        pos = bisect_left(vizinhos, j)
+        if pos < len(vizinhos) and vizinhos[pos] == j:
+            pesos = self._pesos(tipo)[i]
+            pesos[pos] = max(0, pesos[pos] + delta)
+            if self.producoes[i][pos] == 0 and self.projetos[i][pos] == 0:
+                del vizinhos[pos]
+                del self.producoes[i][pos]
+                del self.projetos[i][pos]
+                return -1
+        elif delta > 0:
+            vizinhos.insert(pos, j)
+            self.producoes[i].insert(pos, delta if tipo == PRODUCAO else 0)
+            self.projetos[i].insert(pos, delta if tipo == PROJETO else 0)
+            return 1
+        return 0
+
+    def ajustar_grupo(self, cpfs, tipo, delta: int):
+        """Soma delta à aresta de cada par de participantes de uma produção ou projeto"""
+        ids = sorted({i for i in (self.indice(cpf, criar=delta > 0) for cpf in cpfs) if i is not None})
+        for a in range(len(ids)):
+            for b in range(a + 1, len(ids)):
+                self.arestas += self._ajustar_lado(ids[a], ids[b], tipo, delta)
+                self._ajustar_lado(ids[b], ids[a], tipo, delta)
+
+    def remover_participante(self, cpf: str):
+        i = self.indice(cpf)
+        if i is None:
+            return
+        for j in self.vizinhos[i]:
+            pos = bisect_left(self.vizinhos[j], i)
+            del self.vizinhos[j][pos]
+            del self.producoes[j][pos]
+            del self.projetos[j][pos]
+        self.arestas -= len(self.vizinhos[i])
+        self.vizinhos[i] = array("I")
+        self.producoes[i] = array("I")
+        self.projetos[i] = array("I")
+
+    def colaboradores(self, cpf: str, limite: int):
+        """[(cpf, producoes, projetos)] dos colaboradores mais fortes (mais produções, depois projetos)"""
+        i = self.indice(cpf)
+        if i is None:
+            return 0, []
+        producoes, projetos = self.producoes[i], self.projetos[i]
+        melhores = heapq.nlargest(
+            limite, range(len(self.vizinhos[i])), key=lambda pos: (producoes[pos], projetos[pos])
+        )
+        return len(self.vizinhos[i]), [
+            (self.cpfs[self.vizinhos[i][pos]], producoes[pos], projetos[pos]) for pos in melhores
+        ]
+
+    def forca(self, cpf_a: str, cpf_b: str):
+        """(produções, projetos) em comum entre dois participantes"""
+        i, j = self.indice(cpf_a), self.indice(cpf_b)
+        if i is None or j is None:
+            return 0, 0
+        pos = bisect_left(self.vizinhos[i], j)
+        if pos < len(self.vizinhos[i]) and self.vizinhos[i][pos] == j:
+            return self.producoes[i][pos], self.projetos[i][pos]
+        return 0, 0
+
+    def caminho(self, cpf_a: str, cpf_b: str, max_saltos: int):
+        """Menor cadeia de colaboração de cpf_a até cpf_b (lista de cpfs), ou None.
+
+        Busca em largura bidirecional, expandindo sempre a fronteira menor.
+        """
+        origem, destino = self.indice(cpf_a), self.indice(cpf_b)
+        if origem is None or destino is None:
+            return None
+        if origem == destino:
+            return [cpf_a]
+        pais = ({origem: None}, {destino: None})
+        fronteiras = ([origem], [destino])
+        saltos = 0
+        while fronteiras[0] and fronteiras[1] and saltos < max_saltos:
+            lado = 0 if len(fronteiras[0]) <= len(fronteiras[1]) else 1
+            meus, outros = pais[lado], pais[1 - lado]
+            proxima = []
+            encontro = None
+            for no in fronteiras[lado]:
+                for vizinho in self.vizinhos[no]:
+                    if vizinho in meus:
+                        continue
+                    meus[vizinho] = no
+                    if vizinho in outros:
+                        encontro = vizinho
+                        break
+                    proxima.append(vizinho)
+                if encontro is not None:
+                    break
+            saltos += 1
+            if encontro is not None:
+                return [self.cpfs[i] for i in _montar_caminho(pais, encontro)]
+            fronteiras = (proxima, fronteiras[1]) if lado == 0 else (fronteiras[0], proxima)
+        return None
+
+def _montar_caminho(pais, encontro):
+    ida, volta = [], []
+    no = encontro
+    while no is not None:
+        ida.append(no)
+        no = pais[0][no]
+    no = pais[1][encontro]
+    while no is not None:
+        volta.append(no)
+        no = pais[1][no]
+    return ida[::-1] + volta
+
+async def _carregar_grupos(lotes, grafo, ids, inicios):
+    """Acumula os grupos (produção ou projeto -> participantes) em arrays de índices"""
+    chave_atual = None
+    async for rows in lotes:
+        for chave, cpf in rows:
+            if chave != chave_atual:
+                inicios.append(len(ids))
+                chave_atual = chave
+            ids.append(grafo.indice(cpf, criar=True))
+    inicios.append(len(ids))
+
+def _montar_adjacencia(grafo, grupos):
+    """Conta os pares de cada grupo e monta os arrays de vizinhos/pesos (em thread)"""
+    n = len(grafo.cpfs)
+    pares = ([array("I") for _ in range(n)], [array("I") for _ in range(n)])
+    for tipo, (ids, inicios) in enumerate(grupos):
+        destino = pares[tipo]
+        for g in range(len(inicios) - 1):
+            membros = ids[inicios[g]:inicios[g + 1]]
+            if len(membros) > 1:
+                for a in membros:
+                    destino[a].extend(membros)  # inclui o próprio a, descartado abaixo
+    arestas = 0
+    for i in range(n):
+        producoes, projetos = Counter(pares[PRODUCAO][i]), Counter(pares[PROJETO][i])
+        pares[PRODUCAO][i] = pares[PROJETO][i] = None
+        producoes.pop(i, None)
+        projetos.pop(i, None)
+        vizinhos = sorted(producoes.keys() | projetos.keys()) if projetos else sorted(producoes)
+        grafo.vizinhos[i] = array("I", vizinhos)
+        grafo.producoes[i] = array("I", map(producoes.get, vizinhos, repeat(0)))
+        grafo.projetos[i] = (
+            array("I", map(projetos.get, vizinhos, repeat(0))) if projetos else array("I", [0]) * len(vizinhos)
+        )
+        arestas += len(vizinhos)
+    grafo.arestas = arestas // 2
+    return grafo
+
+class Escrita:
+    """Uma escrita em tabelas das FONTES: o grafo da época e as versões antes e depois dela"""
+
+    def __init__(self, grafo, tabelas, antes):
+        self.grafo = grafo
+        self.tabelas = tabelas
+        self.antes = antes
+        self.depois = None
+
+class Coautorias:
+    """Grafo atual, carga/recarga e as mudanças vindas dos métodos de escrita"""
+
+    def __init__(self):
+        self.repository = CoautoriaRepository()
+        self.versoes = VersaoRepository()
+        self.grafo = None
+        self.cargas = 0
+        self.ultima_carga_segundos = 0.0
+        self._flight = SingleFlight("coautoria.grafo")
+        self._carregado_em = 0.0
+        self._checado_em = 0.0
+        self._carregando = False
+        self._escrita_durante_carga = False
+        self._recarga = None
+
+    async def _carregar(self):
+        self._carregando = True
+        self._escrita_durante_carga = False
+        inicio = time.perf_counter()
+        try:
+            # Versões lidas antes dos dados: escritas durante a carga geram outra recarga
+            versoes = await self.versoes.get_versoes(FONTES)
+            grafo = Grafo({tabela: versao for tabela, (versao, _) in versoes.items()})
+            grupos = []
+            for lotes in (self.repository.stream_autorias(), self.repository.stream_membros()):
+                ids, inicios = array("I"), array("I")
+                await _carregar_grupos(lotes, grafo, ids, inicios)
+                grupos.append((ids, inicios))
+            self.grafo = await anyio.to_thread.run_sync(_montar_adjacencia, grafo, grupos)
+        finally:
+            self._carregando = False
+        self.cargas += 1
+        self.ultima_carga_segundos = time.perf_counter() - inicio
+        # Escritas deste processo durante a carga podem ter ficado de fora: libera a próxima recarga
+        self._carregado_em = 0.0 if self._escrita_durante_carga else time.monotonic()
+        logger.info(
+            "Grafo de coautoria carregado: %d participantes, %d arestas em %.1f s",
+            len(self.grafo.cpfs), self.grafo.arestas, self.ultima_carga_segundos,
+        )
+        return self.grafo
+
+    async def _recarregar(self):
+        try:
+            await self._flight.do("carregar", self._carregar)
+        except Exception as e:
+            logger.error("Erro ao recarregar o grafo de coautoria: %s", e)
+
+    def iniciar(self):
+        """Começa a montar o grafo em segundo plano (no startup da aplicação)"""
+        self._recarga = asyncio.create_task(self._recarregar())
+        return self._recarga
+
+    async def get_grafo(self):
+        """Grafo pronto para consulta; agenda uma recarga se o banco mudou por fora"""
+        if self.grafo is None:
+            return await self._flight.do("carregar", self._carregar)
+        agora = time.monotonic()
+        if (not self._carregando and agora - self._checado_em >= COAUTORIA_CHECK_INTERVAL
+                and agora - self._carregado_em >= COAUTORIA_RELOAD_INTERVAL):
+            self._checado_em = agora
+            versoes = await self.versoes.get_versoes(FONTES)
+            # Sem versoes_tabelas (migração 004), recarrega a cada COAUTORIA_RELOAD_INTERVAL
+            if not versoes or any(
+                versao > self.grafo.versoes.get(tabela, -1) for tabela, (versao, _) in versoes.items()
+            ):
+                self._recarga = asyncio.create_task(self._recarregar())
+        return self.grafo
+
+    # Chamados na transação dos métodos de escrita que mexem em tabelas das FONTES
+
+    async def iniciar_escrita(self, conn, *tabelas: str):
+        """Antes da primeira escrita: trava e lê as versões de `tabelas` até o commit"""
+        grafo = self.grafo
+        return Escrita(grafo, tabelas, await self.versoes.get_versoes_na_transacao(conn, tabelas, travar=True))
+
+    async def concluir_escrita(self, conn, escrita: Escrita):
+        """Depois da última escrita (antes do commit): versões geradas por ela"""
+        escrita.depois = await self.versoes.get_versoes_na_transacao(conn, escrita.tabelas)
+
+    def _grafo_da_escrita(self, escrita: Escrita):
+        """O grafo atual, se for o mesmo do início da escrita"""
+        if self.grafo is not escrita.grafo:
+            # Grafo carregado durante a escrita (pode já incluí-la): a checagem de versões decide
+            self._carregado_em = 0.0
+            return None
+        return self.grafo
+
+    def _aplicar(self, escrita: Escrita, funcao, *args):
+        if self._carregando:
+            self._escrita_durante_carga = True
+        grafo = self._grafo_da_escrita(escrita)
+        if grafo is not None:
+            funcao(grafo, *args)
+
+    # Chamados pelos métodos de escrita dos repositórios, depois do commit
+
+    def escrita_aplicada(self, escrita: Escrita):
+        """Registra no grafo as versões geradas pela escrita, que não disparam recarga.
+
+        Só avança as tabelas em que o grafo estava exatamente na versão anterior
+        à escrita; se houve escrita de fora no meio, a recarga continua pendente.
+        """
+        grafo = self._grafo_da_escrita(escrita)
+        if grafo is None or not escrita.depois:
+            return
+        for tabela, versao in escrita.depois.items():
+            if grafo.versoes.get(tabela) == escrita.antes.get(tabela):
+                grafo.versoes[tabela] = versao
+
+    def autores_alterados(self, escrita: Escrita, antigos, novos):
+        """Autores de uma produção trocados (antigos vazio = criação, novos vazio = remoção)"""
+        self._aplicar(escrita, Grafo.ajustar_grupo, antigos, PRODUCAO, -1)
+        self._aplicar(escrita, Grafo.ajustar_grupo, novos, PRODUCAO, 1)
+        self.escrita_aplicada(escrita)
+
+    def membro_adicionado(self, escrita: Escrita, membros, cpf: str):
+        """cpf entrou em um projeto que já tinha `membros`"""
+        for membro in membros:
+            self._aplicar(escrita, Grafo.ajustar_grupo, (membro, cpf), PROJETO, 1)
+        self.escrita_aplicada(escrita)
+
+    def projeto_removido(self, escrita: Escrita, membros):
+        self._aplicar(escrita, Grafo.ajustar_grupo, membros, PROJETO, -1)
+        self.escrita_aplicada(escrita)
+
+    def participante_removido(self, escrita: Escrita, cpf: str):
+        self._aplicar(escrita, Grafo.remover_participante, cpf)
+        self.escrita_aplicada(escrita)
+
+    def stats(self):
+        return {
+            "loaded": self.grafo is not None,
+            "participants": len(self.grafo.cpfs) if self.grafo else 0,
+            "edges": self.grafo.arestas if self.grafo else 0,
+            "loads": self.cargas,
+            "last_load_seconds": self.ultima_carga_segundos,
+        }
+
+coautorias = Coautorias()
+
+def coautoria_stats():
+    return coautorias.stats()
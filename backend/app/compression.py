@@ -0,0 +1,100 @@
+import os
+
+import anyio.to_thread
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+
+try:
+    import brotli
+except ImportError:  # sem o pacote brotli, só gzip
+    brotli = None
+
+# Compressão das respostas (brotli ou gzip, conforme o Accept-Encoding).
+# Respostas menores que COMPRESSION_MIN_SIZE vão sem compressão; as em
+# streaming (exportações) são comprimidas chunk a chunk. Os níveis padrão
+# priorizam velocidade: em JSON de listas, níveis mais altos quase não
+# reduzem o tamanho e custam bem mais CPU.
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "5"))  # 1-9
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))  # 0-11
+# Codificações aceitas, em ordem de preferência; vazio desativa a compressão
+COMPRESSION_ENCODINGS = [
+    e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "br,gzip").split(",")
+    if e.strip() and (e.strip() != "br" or brotli is not None)
+]
+
+# Chunks maiores que isso são comprimidos em thread, fora do event loop
+THREAD_MIN_SIZE = 128 * 1024
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.quality = quality
+        self._compressor = None
+
+    @property
+    def compressor(self):
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=self.quality)
+        return self._compressor
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if len(body) >= THREAD_MIN_SIZE:
+            return await anyio.to_thread.run_sync(self._compress_body, body, more_body)
+        return self._compress_body(body, more_body)
+
+    def _compress_body(self, body: bytes, more_body: bool) -> bytes:
+        if more_body:
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+def _accepted_encodings(accept_encoding: str):
+    """{codificação: q} a partir do header Accept-Encoding"""
+    aceitas = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        aceitas[coding] = q
+    return aceitas
+
+def choose_encoding(accept_encoding: str):
+    """Primeira codificação de COMPRESSION_ENCODINGS aceita pelo cliente, ou None"""
+    aceitas = _accepted_encodings(accept_encoding)
+    for encoding in COMPRESSION_ENCODINGS:
+        if aceitas.get(encoding, aceitas.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding == "br":
+            responder = BrotliResponder(self.app, self.minimum_size, COMPRESSION_BROTLI_QUALITY)
+        elif encoding == "gzip":
+            responder = GZipResponder(
+                self.app, self.minimum_size,
+                compresslevel=COMPRESSION_GZIP_LEVEL, thread_minimum_size=THREAD_MIN_SIZE,
+            )
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
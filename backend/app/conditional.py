@@ -0,0 +1,75 @@
+import hashlib
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import HTTPException, Request, Response
+from app.repositories.versao_repository import VersaoRepository
+
+# Requisições condicionais (ETag / Last-Modified) para os GETs consultados em
+# polling. O ETag vem das versões das tabelas lidas pelo endpoint
+# (versoes_tabelas, incrementadas por triggers a cada escrita), então validar
+# custa uma leitura por chave primária: se o cliente já tem a versão atual, a
+# resposta é 304 sem executar a query do endpoint nem serializar o corpo.
+#
+# As versões são lidas antes dos dados; uma escrita entre as duas leituras só
+# faz o ETag ficar "atrasado" em relação ao corpo, e a próxima revalidação
+# devolve 200. Nunca o contrário (304 com dado desatualizado).
+#
+# atualizado_em tem resolução de um segundo: uma escrita no mesmo segundo da
+# resposta que o cliente guardou não muda o Last-Modified. Por isso o
+# If-Modified-Since só gera 304 depois que o segundo do Last-Modified terminou
+# (o ETag não tem esse problema).
+
+repository = VersaoRepository()
+
+def _etag_matches(if_none_match: str, etag: str):
+    """Comparação fraca (RFC 9110) do ETag com a lista do If-None-Match"""
+    if if_none_match.strip() == "*":
+        return True
+    opaco = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaco for tag in if_none_match.split(","))
+
+def _not_modified_since(if_modified_since: str, last_modified: int):
+    if last_modified + 1 > time.time():
+        return False
+    try:
+        return last_modified <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+def condicional(*tabelas: str):
+    """Dependência que valida a requisição contra as versões de `tabelas`.
+
+    Responde 304 se o If-None-Match (ou, na falta dele, o If-Modified-Since)
+    corresponder à versão atual; senão adiciona ETag e Last-Modified à resposta.
+    Retorna o ETag (None se o banco não tiver versoes_tabelas).
+    """
+    tabelas = tuple(sorted(set(tabelas)))
+
+    async def dependency(request: Request, response: Response):
+        versoes = await repository.get_versoes(tabelas)
+        if len(versoes) != len(tabelas):
+            return None
+
+        chave = ",".join(f"{tabela}:{versoes[tabela][0]}" for tabela in tabelas)
+        etag = 'W/"%s"' % hashlib.blake2b(chave.encode(), digest_size=12).hexdigest()
+        last_modified = max(atualizado_em for _, atualizado_em in versoes.values())
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(last_modified, usegmt=True),
+            # O cliente pode guardar a resposta, mas revalida antes de reusar
+            "Cache-Control": "no-cache",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, etag)
+        else:
+            not_modified = if_modified_since is not None and _not_modified_since(if_modified_since, last_modified)
+        if not_modified:
+            raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+        return etag
+
+    return dependency
@@ -1,51 +1,255 @@
 import aiomysql
+import asyncio
+import itertools
+import logging
 import os
+import time
+from contextvars import ContextVar
 from fastapi import HTTPException
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
+from pymysql.constants import CLIENT
+from app.metrics import Histogram
+from app.instrumentation import InstrumentedConnection
+
+logger = logging.getLogger(__name__)
 
 DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = int(os.getenv("DB_PORT", "3306"))
 DB_USER = os.getenv("DB_USER", "user")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "password")
 DB_NAME = os.getenv("DB_NAME", "sigpesq")
 
+# Configuração do pool
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "5"))  # segundos
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))  # segundos, -1 desativa
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_RETRY_INTERVAL = float(os.getenv("DB_POOL_RETRY_INTERVAL", "5"))  # entre tentativas de init
+
+# Réplicas de leitura: "host" ou "host:porta", separados por vírgula.
+# Métodos com get_db_connection(read_only=True) são distribuídos em round-robin
+# entre as réplicas saudáveis; se nenhuma estiver disponível, usam o primário.
+DB_READ_HOSTS = [h.strip() for h in os.getenv("DB_READ_HOSTS", "").split(",") if h.strip()]
+DB_REPLICA_RETRY_INTERVAL = float(os.getenv("DB_REPLICA_RETRY_INTERVAL", "30"))  # réplica fora após falha
+# Read-your-writes: depois de uma escrita, as leituras da mesma requisição vão ao primário
+DB_READ_YOUR_WRITES = os.getenv("DB_READ_YOUR_WRITES", "true").lower() in ("1", "true", "yes")
+
 pool = None
+_init_lock = asyncio.Lock()
+_last_init_attempt = 0.0
+
+class _Replica:
+    def __init__(self, address: str):
+        host, _, port = address.partition(":")
+        self.host = host
+        self.port = int(port or DB_PORT)
+        self.pool = None
+        self.unhealthy_until = 0.0
+        self.lock = asyncio.Lock()
+
+    @property
+    def healthy(self):
+        return time.monotonic() >= self.unhealthy_until
+
+    def mark_unhealthy(self):
+        self.unhealthy_until = time.monotonic() + DB_REPLICA_RETRY_INTERVAL
+
+replicas = [_Replica(address) for address in DB_READ_HOSTS]
+_replica_rr = itertools.count()
+_request_wrote = ContextVar("request_wrote", default=False)
+_primary_reads = ContextVar("primary_reads", default=False)
+
+# Métricas do pool
+_acquire_latency = Histogram()
+_pool_metrics = {
+    "waiters": 0, "acquired": 0, "acquire_timeouts": 0, "ping_failures": 0,
+    "replica_reads": 0, "replica_fallbacks": 0,
+}
+
+async def _create_pool(host: str, port: int):
+    return await aiomysql.create_pool(
+        host=host,
+        port=port,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        db=DB_NAME,
+        minsize=DB_POOL_MIN_SIZE,
+        maxsize=DB_POOL_MAX_SIZE,
+        pool_recycle=DB_POOL_RECYCLE,
+        # rowcount de UPDATE = linhas encontradas (não só as alteradas)
+        client_flag=CLIENT.FOUND_ROWS,
+        autocommit=True,
+        charset='utf8mb4'
+    )
+
+async def _init_replica(replica: _Replica):
+    try:
+        replica.pool = await _create_pool(replica.host, replica.port)
+        logger.info("Read replica pool initialized (%s:%s).", replica.host, replica.port)
+    except Exception as e:
+        logger.warning("Error initializing read replica %s:%s: %s", replica.host, replica.port, e)
+        replica.pool = None
+        replica.mark_unhealthy()
 
 async def init_pool():
-    global pool
+    global pool, _last_init_attempt
+    _last_init_attempt = time.monotonic()
     try:
-        pool = await aiomysql.create_pool(
-            host=DB_HOST,
-            port=3306,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            db=DB_NAME,
-            autocommit=True,
-            charset='utf8mb4'
-        )
-        print("Database pool initialized successfully.")
+        pool = await _create_pool(DB_HOST, DB_PORT)
+        logger.info("Database pool initialized (min=%s, max=%s).", DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE)
     except Exception as e:
-        print(f"Error initializing database pool: {e}")
+        logger.error("Error initializing database pool: %s", e)
         pool = None
+    for replica in replicas:
+        if replica.pool is None:
+            await _init_replica(replica)
 
 async def close_pool():
     global pool
+    for db_pool in [pool] + [replica.pool for replica in replicas]:
+        if db_pool:
+            db_pool.close()
+            await db_pool.wait_closed()
+    pool = None
+    for replica in replicas:
+        replica.pool = None
+    logger.info("Database pool closed.")
+
+async def _ensure_pool():
+    """Reinicializa o pool se o startup falhou, no máximo uma vez a cada DB_POOL_RETRY_INTERVAL"""
     if pool:
-        pool.close()
-        await pool.wait_closed()
-        print("Database pool closed.")
+        return
+    async with _init_lock:
+        if not pool and time.monotonic() - _last_init_attempt >= DB_POOL_RETRY_INTERVAL:
+            await init_pool()
+    if not pool:
+        raise HTTPException(status_code=503, detail="Database connection not available")
+
+async def _pick_replica():
+    """Próxima réplica saudável em round-robin, ou None"""
+    for _ in range(len(replicas)):
+        replica = replicas[next(_replica_rr) % len(replicas)]
+        if not replica.healthy:
+            continue
+        if replica.pool is None:
+            async with replica.lock:
+                if replica.pool is None and replica.healthy:
+                    await _init_replica(replica)
+            if replica.pool is None:
+                continue
+        return replica
+    return None
+
+def pool_stats():
+    """Estado e métricas do pool de conexões"""
+    size = pool.size if pool else 0
+    idle = pool.freesize if pool else 0
+    return {
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_size": DB_POOL_MAX_SIZE,
+        "size": size,
+        "in_use": size - idle,
+        "idle": idle,
+        **_pool_metrics,
+        "acquire_latency_seconds": _acquire_latency.snapshot(),
+        "replicas": [
+            {
+                "host": f"{replica.host}:{replica.port}",
+                "healthy": replica.healthy and replica.pool is not None,
+                "size": replica.pool.size if replica.pool else 0,
+                "idle": replica.pool.freesize if replica.pool else 0,
+            }
+            for replica in replicas
+        ],
+    }
+
+async def _acquire(db_pool):
+    """Obtém uma conexão de db_pool com timeout (503) e pre-ping, registrando métricas"""
+    start = time.perf_counter()
+    _pool_metrics["waiters"] += 1
+    try:
+        conn = await asyncio.wait_for(db_pool.acquire(), timeout=DB_POOL_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        _pool_metrics["acquire_timeouts"] += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Banco de dados sobrecarregado, tente novamente",
+            headers={"Retry-After": "1"},
+        )
+    finally:
+        _pool_metrics["waiters"] -= 1
+        _acquire_latency.observe(time.perf_counter() - start)
+    _pool_metrics["acquired"] += 1
+
+    if DB_POOL_PRE_PING:
+        try:
+            await conn.ping(reconnect=True)
+        except Exception:
+            _pool_metrics["ping_failures"] += 1
+            db_pool.release(conn)
+            raise
+    return conn
+
+def reads_from_primary():
+    """True se as leituras deste contexto precisam ir ao primário (a requisição já
+    escreveu, ou está preenchendo um cache)"""
+    return _primary_reads.get() or (DB_READ_YOUR_WRITES and _request_wrote.get())
+
+@contextmanager
+def primary_reads():
+    """Leituras read_only dentro do bloco vão ao primário, sem atraso de réplica"""
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
 
 @asynccontextmanager
-async def get_db_connection():
-    global pool
-    if not pool:
-        # Tenta inicializar se não existir (ex: serverless/hot reload issues)
-        await init_pool()
-    
-    if not pool:
-        raise HTTPException(status_code=500, detail="Database connection not available")
-    
-    conn = await pool.acquire()
+async def get_db_connection(read_only: bool = False):
+    """Conexão do pool; read_only=True permite servir a leitura a partir de uma réplica"""
+    db_pool, conn = None, None
+
+    if read_only and replicas and not reads_from_primary():
+        replica = await _pick_replica()
+        if replica:
+            try:
+                conn = await _acquire(replica.pool)
+                db_pool = replica.pool
+                _pool_metrics["replica_reads"] += 1
+            except (aiomysql.OperationalError, OSError) as e:
+                # Réplica fora do ar: tira de rotação por um tempo e cai no primário
+                logger.warning("Read replica %s:%s unavailable: %s", replica.host, replica.port, e)
+                replica.mark_unhealthy()
+                _pool_metrics["replica_fallbacks"] += 1
+            except HTTPException:
+                # Réplica saturada: só esta leitura vai para o primário
+                _pool_metrics["replica_fallbacks"] += 1
+
+    if conn is None:
+        if not read_only:
+            _request_wrote.set(True)
+        await _ensure_pool()
+        db_pool = pool
+        conn = await _acquire(db_pool)
+
     try:
-        yield conn
+        # Cursores instrumentados (latência, linhas e contagem por requisição)
+        yield InstrumentedConnection(conn)
     finally:
-        pool.release(conn)
+        db_pool.release(conn)
+
+@asynccontextmanager
+async def transaction():
+    """Unidade de trabalho: uma conexão do primário em uma única transação.
+
+    Faz commit ao sair do bloco e rollback se ele levantar uma exceção.
+    """
+    async with get_db_connection() as conn:
+        await conn.begin()
+        try:
+            yield conn
+        except BaseException:
+            await conn.rollback()
+            raise
+        await conn.commit()
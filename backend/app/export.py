@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+import os
+import re
+from datetime import date, datetime
+from decimal import Decimal
+
+import aiomysql
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.database import get_db_connection
+
+# Exportação em streaming (CSV ou NDJSON). As linhas são lidas com cursor
+# server-side (SSDictCursor, sem bufferizar o resultado no cliente) em lotes de
+# EXPORT_FETCH_SIZE e enviadas à medida que chegam, então a memória não cresce
+# com o tamanho da tabela. A conexão fica reservada enquanto o download durar.
+
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "1000"))
+
+FORMATOS = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+async def stream_query(sql: str, params=None):
+    """Executa a query com cursor server-side; gera a lista de colunas e depois lotes de linhas"""
+    async with get_db_connection(read_only=True) as conn:
+        async with conn.cursor(aiomysql.SSDictCursor) as cursor:
+            await cursor.execute(sql, params)
+            yield [coluna[0] for coluna in cursor.description]
+            while True:
+                rows = await cursor.fetchmany(EXPORT_FETCH_SIZE)
+                if not rows:
+                    break
+                yield rows
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+async def _csv_chunks(batches):
+    colunas = await batches.__anext__()
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=colunas)
+    writer.writeheader()
+    # BOM para o Excel reconhecer UTF-8
+    yield "\ufeff" + buffer.getvalue()
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+async def _ndjson_chunks(batches):
+    await batches.__anext__()
+    yield ""
+    async for rows in batches:
+        yield "".join(
+            json.dumps(row, default=_json_default, ensure_ascii=False) + "\n" for row in rows
+        )
+
+async def export_response(batches, formato: str, nome: str):
+    """StreamingResponse com os lotes de `stream_query` em CSV ou NDJSON.
+
+    A query é executada antes de a resposta começar, então erros de banco
+    (ex: pool saturado) ainda viram respostas HTTP normais.
+    """
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=400, detail="Formato deve ser csv ou ndjson")
+    chunks = _csv_chunks(batches) if formato == "csv" else _ndjson_chunks(batches)
+    primeiro = await chunks.__anext__()
+
+    async def body():
+        try:
+            yield primeiro
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            # Cliente desconectou no meio: libera o cursor e a conexão
+            await chunks.aclose()
+            await batches.aclose()
+
+    nome = re.sub(r"[^\w.-]", "_", nome)
+    return StreamingResponse(
+        body(),
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome}.{formato}"'},
+    )
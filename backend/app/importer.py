@@ -0,0 +1,372 @@
+import csv
+import json
+import os
+import re
+import unicodedata
+from datetime import datetime
+from itertools import islice
+
+import anyio.to_thread
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.schemas import AutorInput, ProducaoCreate
+from app.repositories.participante_repostory import ParticipanteRepository
+from app.repositories.producao_repository import ProducaoRepository
+from app.repositories.projeto_repository import ProjetoRepository
+
+# Importação de produções em lote (CSV, JSON lines ou BibTeX, ex: exportado do Lattes).
+# O arquivo é lido linha a linha e processado em blocos de IMPORT_CHUNK_SIZE
+# registros: cada bloco é validado, tem autores/projetos/duplicatas resolvidos
+# com uma query por tipo e é gravado em uma transação com INSERTs multi-linha.
+# Se a transação do bloco falhar, as linhas são gravadas uma a uma para
+# identificar quais têm erro.
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))  # erros detalhados na resposta
+
+FORMATOS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".bib": "bibtex"}
+TIPOS_PRODUCAO = {"ARTIGO", "LIVRO", "CAPITULO", "TRABALHO", "RESUMO"}
+# Tamanho das colunas em producoes
+TAMANHOS = {"id_registro": 50, "projeto_codigo": 20, "titulo": 250, "meio_divulgacao": 200}
+
+BIBTEX_TIPOS = {
+    "article": "ARTIGO",
+    "book": "LIVRO",
+    "inbook": "CAPITULO",
+    "incollection": "CAPITULO",
+    "inproceedings": "TRABALHO",
+    "conference": "TRABALHO",
+}
+BIBTEX_ACENTOS = {"'": "\u0301", "`": "\u0300", "^": "\u0302", '"': "\u0308", "~": "\u0303", "c": "\u0327"}
+BIBTEX_CAMPO = re.compile(r"\s*,?\s*(\w[\w-]*)\s*=\s*")
+
+producao_repository = ProducaoRepository()
+projeto_repository = ProjetoRepository()
+participante_repository = ParticipanteRepository()
+
+def detect_format(filename: str, formato: str = None):
+    """Retorna 'csv', 'jsonl' ou 'bibtex' a partir do parâmetro ou da extensão do arquivo"""
+    if formato:
+        if formato not in FORMATOS.values():
+            raise HTTPException(status_code=400, detail="Formato deve ser csv, jsonl ou bibtex")
+        return formato
+    extensao = os.path.splitext(filename or "")[1].lower()
+    if extensao not in FORMATOS:
+        raise HTTPException(
+            status_code=400,
+            detail="Não foi possível identificar o formato pela extensão; informe o parâmetro formato"
+        )
+    return FORMATOS[extensao]
+
+def _text_lines(arquivo):
+    """Lê o arquivo binário linha a linha, decodificando UTF-8 (com ou sem BOM)"""
+    for numero, raw in enumerate(arquivo):
+        yield raw.decode("utf-8-sig" if numero == 0 else "utf-8", errors="replace")
+
+# --- Parsers: geram (linha, registro, erro) ---
+
+def _split_autores(valor: str):
+    return [autor.strip() for autor in (valor or "").split(";") if autor.strip()]
+
+def parse_csv(lines):
+    """CSV com cabeçalho; autores separados por ';' (CPF, email ou nome, na ordem de autoria)"""
+    reader = csv.DictReader(lines)
+    fim_anterior = 1  # cabeçalho
+    for row in reader:
+        # Um registro pode ocupar várias linhas (campos entre aspas); reporta a primeira
+        linha, fim_anterior = fim_anterior + 1, reader.line_num
+        registro = {campo.strip(): (valor.strip() if isinstance(valor, str) else valor)
+                    for campo, valor in row.items() if campo}
+        registro["autores"] = _split_autores(registro.get("autores"))
+        yield linha, registro, None
+
+def parse_jsonl(lines):
+    """Um objeto JSON por linha; autores como lista de identificadores ou de {participante_cpf, ordem}"""
+    for numero, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            registro = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield numero, None, f"JSON inválido: {e.msg}"
+            continue
+        if not isinstance(registro, dict):
+            yield numero, None, "Cada linha deve ser um objeto JSON"
+            continue
+        yield numero, registro, None
+
+def _bibtex_entries(lines):
+    """Gera (linha, texto) de cada entrada @tipo{...}, acumulando até fechar as chaves"""
+    buffer, linha_inicio, profundidade, aberta = [], 0, 0, False
+    for numero, line in enumerate(lines, 1):
+        if not buffer:
+            inicio = line.find("@")
+            if inicio < 0:
+                continue
+            line, linha_inicio = line[inicio:], numero
+        buffer.append(line)
+        aberta = aberta or "{" in line
+        profundidade += line.count("{") - line.count("}")
+        if aberta and profundidade <= 0:
+            yield linha_inicio, "".join(buffer)
+            buffer, profundidade, aberta = [], 0, False
+    if buffer:
+        yield linha_inicio, "".join(buffer)
+
+def _bibtex_value(texto: str, pos: int):
+    """Lê um valor {..}, ".." ou simples a partir de pos; retorna (valor, nova posição)"""
+    if texto[pos] in "{\"":
+        fechamento = "}" if texto[pos] == "{" else "\""
+        profundidade, inicio = 0, pos + 1
+        pos += 1
+        while pos < len(texto):
+            char = texto[pos]
+            if char == "{":
+                profundidade += 1
+            elif char == "}" and profundidade > 0:
+                profundidade -= 1
+            elif char == fechamento and profundidade == 0:
+                return texto[inicio:pos], pos + 1
+            pos += 1
+        raise ValueError("Valor não terminado")
+    fim = texto.find(",", pos)
+    fim = len(texto) if fim < 0 else fim
+    return texto[pos:fim].strip(), fim
+
+def _bibtex_clean(valor: str):
+    """Converte acentos LaTeX simples (ex: {\\'e}) e remove chaves e espaços extras"""
+    acento = lambda m: unicodedata.normalize("NFC", m.group(2) + BIBTEX_ACENTOS[m.group(1)])
+    valor = re.sub(r"\\([`'^\"~])\s*\{?\s*(\w)\s*\}?", acento, valor)
+    valor = re.sub(r"\\(c)(?:\s+|\s*\{\s*)(\w)\s*\}?", acento, valor)
+    return re.sub(r"\s+", " ", valor.replace("{", "").replace("}", "")).strip()
+
+def _bibtex_autor(nome: str):
+    """'Sobrenome, Nome' -> 'Nome Sobrenome'"""
+    if "," in nome:
+        sobrenome, _, prenome = nome.partition(",")
+        nome = f"{prenome.strip()} {sobrenome.strip()}"
+    return nome.strip()
+
+def parse_bibtex(lines):
+    """Entradas BibTeX; o tipo vem do campo `tipo` ou do tipo da entrada (article, book, ...)"""
+    for numero, texto in _bibtex_entries(lines):
+        match = re.match(r"@\s*(\w+)\s*\{\s*([^,\s]*)\s*,", texto)
+        if not match:
+            if not re.match(r"@\s*(comment|string|preamble)\b", texto, re.I):
+                yield numero, None, "Entrada BibTeX inválida"
+            continue
+        entrada, chave = match.group(1).lower(), match.group(2)
+        campos, pos = {}, match.end()
+        try:
+            while True:
+                campo = BIBTEX_CAMPO.match(texto, pos)
+                if not campo:
+                    break
+                valor, pos = _bibtex_value(texto, campo.end())
+                campos[campo.group(1).lower()] = _bibtex_clean(valor)
+        except ValueError as e:
+            yield numero, None, f"Entrada BibTeX inválida: {e}"
+            continue
+
+        tipo = campos.get("tipo") or BIBTEX_TIPOS.get(entrada)
+        if not tipo:
+            yield numero, None, f"Tipo de entrada BibTeX não suportado: @{entrada} (informe o campo tipo)"
+            continue
+        yield numero, {
+            "id_registro": campos.get("doi") or chave,
+            "projeto_codigo": campos.get("projeto"),
+            "titulo": campos.get("title"),
+            "tipo": tipo.upper(),
+            "ano_publicacao": campos.get("year"),
+            "meio_divulgacao": campos.get("journal") or campos.get("booktitle") or campos.get("publisher"),
+            "autores": [_bibtex_autor(a) for a in re.split(r"\s+and\s+", campos.get("author", "")) if a.strip()],
+        }, None
+
+PARSERS = {"csv": parse_csv, "jsonl": parse_jsonl, "bibtex": parse_bibtex}
+
+# --- Validação e resolução de autores ---
+
+def _normalize_nome(nome: str):
+    sem_acento = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode()
+    return " ".join(sem_acento.casefold().split())
+
+def _autor_key(identificador: str):
+    """Classifica o identificador de um autor como ('cpf'|'email'|'nome', valor normalizado)"""
+    identificador = identificador.strip()
+    if re.fullmatch(r"[\d.\-\s]+", identificador) and len(re.sub(r"\D", "", identificador)) == 11:
+        return "cpf", re.sub(r"\D", "", identificador)
+    if "@" in identificador:
+        return "email", identificador.lower()
+    return "nome", _normalize_nome(identificador)
+
+def _validation_message(exc: ValidationError):
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in erro['loc'])}: {erro['msg']}" for erro in exc.errors()
+    )
+
+def _validate(registro: dict, projeto_codigo: str = None):
+    """Valida um registro; retorna (ProducaoCreate sem autores, [(identificador, ordem)])"""
+    dados = {campo: (None if valor == "" else valor) for campo, valor in registro.items()}
+    dados.setdefault("projeto_codigo", None)
+    dados["projeto_codigo"] = dados["projeto_codigo"] or projeto_codigo
+
+    autores = []
+    lista = dados.pop("autores", None) or []
+    if isinstance(lista, str):
+        lista = _split_autores(lista)
+    for posicao, autor in enumerate(lista, 1):
+        if isinstance(autor, dict):
+            autores.append((str(autor.get("participante_cpf", "")), int(autor.get("ordem") or posicao)))
+        else:
+            autores.append((str(autor), posicao))
+
+    prod = ProducaoCreate(**dados, autores=[])
+    prod.tipo = prod.tipo.upper()
+    if prod.tipo not in TIPOS_PRODUCAO:
+        raise ValueError(f"Tipo inválido: {prod.tipo}")
+    ano_atual = datetime.now().year
+    if prod.ano_publicacao > ano_atual:
+        raise ValueError(f"O ano de publicação não pode ser maior que {ano_atual}")
+    for campo, tamanho in TAMANHOS.items():
+        valor = getattr(prod, campo)
+        if valor and len(valor) > tamanho:
+            raise ValueError(f"{campo} excede {tamanho} caracteres")
+    if len({ordem for _, ordem in autores}) != len(autores):
+        raise ValueError("Ordem de autoria repetida")
+    return prod, autores
+
+class _AutorResolver:
+    """Resolve identificadores de autores em CPFs, uma query por bloco, guardando os já vistos"""
+
+    def __init__(self):
+        self.resolvidos = {}  # chave -> cpf, ou mensagem de erro
+
+    async def resolve(self, identificadores):
+        pendentes = {}
+        for identificador in identificadores:
+            key = _autor_key(identificador)
+            if key not in self.resolvidos:
+                pendentes[key] = identificador.strip()
+        if not pendentes:
+            return
+
+        por_tipo = {"cpf": [], "email": [], "nome": []}
+        for (tipo, valor), original in pendentes.items():
+            por_tipo[tipo].append(valor if tipo != "nome" else original)
+        rows = await participante_repository.find_by_identificadores(
+            por_tipo["cpf"], por_tipo["email"], por_tipo["nome"]
+        )
+
+        encontrados = {}
+        for row in rows:
+            encontrados.setdefault(("cpf", row["cpf"]), set()).add(row["cpf"])
+            encontrados.setdefault(("email", row["email"].lower()), set()).add(row["cpf"])
+            encontrados.setdefault(("nome", _normalize_nome(row["nome"])), set()).add(row["cpf"])
+        for key, original in pendentes.items():
+            cpfs = encontrados.get(key, set())
+            if len(cpfs) == 1:
+                self.resolvidos[key] = next(iter(cpfs))
+            elif cpfs:
+                self.resolvidos[key] = ValueError(f"Autor ambíguo: {original} (informe CPF ou email)")
+            else:
+                self.resolvidos[key] = ValueError(f"Autor não encontrado: {original}")
+
+    def cpf(self, identificador: str):
+        resolvido = self.resolvidos[_autor_key(identificador)]
+        if isinstance(resolvido, Exception):
+            raise resolvido
+        return resolvido
+
+# --- Importação ---
+
+def _error_message(e: Exception):
+    if "Duplicate entry" in str(e):
+        return "ID de registro já existe"
+    if "foreign key constraint" in str(e).lower():
+        return "Projeto ou participante não encontrado"
+    return str(e)
+
+def _read_chunk(registros, projeto_codigo: str, vistos: set):
+    """Lê e valida o próximo bloco (síncrono, roda em thread); retorna (total, válidos, erros)"""
+    validos, erros = [], []
+    total = 0
+    for linha, registro, mensagem in islice(registros, IMPORT_CHUNK_SIZE):
+        total += 1
+        if mensagem:
+            erros.append((linha, None, mensagem))
+            continue
+        try:
+            prod, autores = _validate(registro, projeto_codigo)
+        except ValidationError as e:
+            erros.append((linha, registro.get("id_registro"), _validation_message(e)))
+            continue
+        except (TypeError, ValueError) as e:
+            erros.append((linha, registro.get("id_registro"), str(e)))
+            continue
+        if prod.id_registro in vistos:
+            erros.append((linha, prod.id_registro, "ID de registro repetido no arquivo"))
+            continue
+        vistos.add(prod.id_registro)
+        validos.append((linha, prod, autores))
+    return total, validos, erros
+
+async def import_producoes(arquivo, formato: str, projeto_codigo: str = None):
+    """Importa as produções do arquivo (binário) e retorna o resumo com os erros por linha"""
+    resultado = {"formato": formato, "total": 0, "importadas": 0, "com_erro": 0, "erros": []}
+
+    def erro(linha, id_registro, mensagem):
+        resultado["com_erro"] += 1
+        if len(resultado["erros"]) < IMPORT_MAX_ERRORS:
+            resultado["erros"].append({"linha": linha, "id_registro": id_registro, "erro": mensagem})
+
+    registros = PARSERS[formato](_text_lines(arquivo))
+    resolver = _AutorResolver()
+    vistos = set()
+
+    while True:
+        # Leitura do arquivo e validação pydantic fora do event loop
+        total, validos, erros = await anyio.to_thread.run_sync(_read_chunk, registros, projeto_codigo, vistos)
+        if not total:
+            break
+        resultado["total"] += total
+        for linha, id_registro, mensagem in erros:
+            erro(linha, id_registro, mensagem)
+
+        # Uma query por tipo de referência para o bloco inteiro
+        await resolver.resolve([ident for _, _, autores in validos for ident, _ in autores])
+        existentes = await producao_repository.get_existing_ids([prod.id_registro for _, prod, _ in validos])
+        projetos = await projeto_repository.get_existing_codigos(
+            list({prod.projeto_codigo for _, prod, _ in validos if prod.projeto_codigo})
+        )
+
+        prontos = []
+        for linha, prod, autores in validos:
+            try:
+                if prod.id_registro in existentes:
+                    raise ValueError("ID de registro já existe")
+                if prod.projeto_codigo and prod.projeto_codigo not in projetos:
+                    raise ValueError(f"Projeto não encontrado: {prod.projeto_codigo}")
+                prod.autores = [
+                    AutorInput(participante_cpf=resolver.cpf(ident), ordem=ordem) for ident, ordem in autores
+                ]
+                if len({autor.participante_cpf for autor in prod.autores}) != len(prod.autores):
+                    raise ValueError("Autor repetido")
+            except ValueError as e:
+                erro(linha, prod.id_registro, str(e))
+                continue
+            prontos.append((linha, prod))
+
+        try:
+            await producao_repository.bulk_create([prod for _, prod in prontos])
+            resultado["importadas"] += len(prontos)
+        except Exception:
+            # Algum registro foi rejeitado pelo banco: grava um a um para isolar os erros
+            for linha, prod in prontos:
+                try:
+                    await producao_repository.create(prod)
+                    resultado["importadas"] += 1
+                except Exception as e:
+                    erro(linha, prod.id_registro, _error_message(e))
+
+    return resultado
@@ -0,0 +1,301 @@
+import functools
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from aiomysql.cursors import Cursor, SSCursor
+from starlette.datastructures import MutableHeaders
+
+from app.metrics import Histogram
+
+# Instrumentação das queries: get_db_connection entrega as conexões embrulhadas
+# em InstrumentedConnection, cujos cursores medem cada execute (latência,
+# linhas, erros) por chamador (o método do repositório que executou a query) e
+# tipo de comando. Queries acima de SLOW_QUERY_THRESHOLD_MS vão para o log com
+# o SQL normalizado (sem valores). QueryMetricsMiddleware conta as queries de
+# cada requisição. Tudo é exposto em /metrics (ver app/prometheus.py).
+#
+# Detector de N+1: uma requisição com mais de QUERY_WARN_MAX_QUERIES queries,
+# ou que repete o mesmo SQL normalizado mais de QUERY_WARN_MAX_REPEATS vezes,
+# gera um aviso no log (e os headers X-Query-* com QUERY_DEBUG_HEADERS). Os
+# testes usam count_queries() para impor orçamentos (tests/conftest.py).
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))  # negativo desativa
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+# Limites do detector de N+1 por requisição (0 desativa cada um)
+QUERY_WARN_MAX_QUERIES = int(os.getenv("QUERY_WARN_MAX_QUERIES", "25"))
+QUERY_WARN_MAX_REPEATS = int(os.getenv("QUERY_WARN_MAX_REPEATS", "5"))
+# Expõe X-Query-Count (e X-Query-Warning) nas respostas; útil em desenvolvimento
+QUERY_DEBUG_HEADERS = os.getenv("QUERY_DEBUG_HEADERS", "false").lower() in ("1", "true", "yes")
+QUERY_COUNT_HEADER = "X-Query-Count"
+QUERY_WARNING_HEADER = "X-Query-Warning"
+
+class QueryStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.rows = 0
+        self.errors = 0
+
+class RequestQueries:
+    """Queries executadas durante uma requisição (ou bloco de count_queries).
+
+    Contadores aninhados: cada query também é contada no `parent`.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = {}  # SQL normalizado -> execuções
+
+    def most_repeated(self):
+        """(SQL normalizado, execuções) do comando mais repetido, ou (None, 0)"""
+        if not self.statements:
+            return None, 0
+        sql = max(self.statements, key=self.statements.get)
+        return sql, self.statements[sql]
+
+    def violations(self, max_queries: int, max_repeats: int = 0):
+        """Descrição dos limites ultrapassados (lista vazia se nenhum; 0 = sem limite)"""
+        problemas = []
+        if max_queries and self.count > max_queries:
+            problemas.append(f"{self.count} queries (limite {max_queries})")
+        sql, repeticoes = self.most_repeated()
+        if max_repeats and repeticoes > max_repeats:
+            problemas.append(f"{repeticoes}x o mesmo comando (limite {max_repeats}): {sql[:200]}")
+        return problemas
+
+    def report(self):
+        """Comandos executados, dos mais repetidos para os menos"""
+        linhas = sorted(self.statements.items(), key=lambda item: -item[1])
+        return "\n".join(f"{n:4}x {sql[:300]}" for sql, n in linhas)
+
+# (chamador, comando) -> QueryStats
+query_stats = {}
+# (método, rota) -> Histogram com o número de queries por requisição
+request_query_counts = {}
+slow_queries = 0
+
+_request_queries = ContextVar("request_queries", default=None)
+
+def current_request_queries():
+    """Contagem da requisição em andamento (None fora de uma requisição)"""
+    return _request_queries.get()
+
+@contextmanager
+def count_queries():
+    """Conta as queries executadas dentro do bloco (inclusive por requisições em processo)"""
+    queries = RequestQueries(parent=_request_queries.get())
+    token = _request_queries.set(queries)
+    try:
+        yield queries
+    finally:
+        _request_queries.reset(token)
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql: str):
+    """SQL sem valores: literais e placeholders viram ?, listas IN/VALUES viram (...)"""
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _LIST.sub("(...)", sql)
+    sql = _ROWS.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+# Código -> rótulo do chamador, calculado uma vez por método
+_caller_labels = {}
+
+def _caller():
+    """Primeiro método da aplicação na pilha (ex: ProducaoRepository.list_all)"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.") and module != __name__:
+            code = frame.f_code
+            label = _caller_labels.get(code)
+            if label is None:
+                label = getattr(code, "co_qualname", None)  # Python 3.11+
+                if label is None:
+                    owner = frame.f_locals.get("self")
+                    label = f"{type(owner).__name__}.{code.co_name}" if owner is not None else code.co_name
+                _caller_labels[code] = label
+            return label
+        frame = frame.f_back
+    return "unknown"
+
+def _param_count(args):
+    if args is None:
+        return 0
+    if isinstance(args, (list, tuple, dict)):
+        return len(args)
+    return 1
+
+def _stats_for(caller: str, sql: str):
+    normalized = normalize_sql(sql)
+    command = normalized.split(" ", 1)[0].upper() if normalized else "UNKNOWN"
+    stats = query_stats.get((caller, command))
+    if stats is None:
+        stats = query_stats[(caller, command)] = QueryStats()
+    return stats, normalized
+
+def _record(cursor, caller, sql, args, elapsed, error=False):
+    global slow_queries
+    stats, normalized = _stats_for(caller, sql)
+    stats.latency.observe(elapsed)
+    if error:
+        stats.errors += 1
+    elif cursor.description is not None and not isinstance(cursor, SSCursor):
+        # Cursor bufferizado: todas as linhas já chegaram no execute
+        stats.rows += cursor.rowcount
+    cursor._query_stats = stats
+
+    request = _request_queries.get()
+    while request is not None:
+        request.count += 1
+        request.seconds += elapsed
+        request.statements[normalized] = request.statements.get(normalized, 0) + 1
+        request = request.parent
+
+    if 0 <= SLOW_QUERY_THRESHOLD_MS <= elapsed * 1000:
+        slow_queries += 1
+        logger.warning(
+            "Slow query (%.1f ms, %s, %d params): %s",
+            elapsed * 1000, caller, _param_count(args), normalized,
+        )
+
+class InstrumentedCursor(Cursor):
+    _query_stats = None
+
+    async def execute(self, query, args=None):
+        caller = _caller()
+        start = time.perf_counter()
+        try:
+            result = await super().execute(query, args)
+        except Exception:
+            _record(self, caller, query, args, time.perf_counter() - start, error=True)
+            raise
+        _record(self, caller, query, args, time.perf_counter() - start)
+        return result
+
+class InstrumentedSSCursor(InstrumentedCursor, SSCursor):
+    """Cursor server-side: as linhas são contadas à medida que são lidas"""
+
+    def _count_rows(self, rows):
+        if self._query_stats is not None:
+            self._query_stats.rows += rows
+
+    async def fetchone(self):
+        row = await super().fetchone()
+        self._count_rows(row is not None)
+        return row
+
+    async def fetchmany(self, size=None):
+        rows = await super().fetchmany(size)
+        self._count_rows(len(rows))
+        return rows
+
+    async def fetchall(self):
+        rows = await super().fetchall()
+        self._count_rows(len(rows))
+        return rows
+
+@functools.lru_cache(maxsize=None)
+def _instrumented_class(cursors: tuple):
+    """Classe de cursor pedida pelo repositório com a instrumentação na frente do MRO"""
+    mixin = InstrumentedSSCursor if any(issubclass(c, SSCursor) for c in cursors) else InstrumentedCursor
+    if not cursors:
+        return mixin
+    name = "Instrumented" + "".join(c.__name__ for c in cursors)
+    return type(name, (mixin,) + cursors, {})
+
+class InstrumentedConnection:
+    """Conexão do pool cujos cursores são instrumentados; o resto é delegado"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *cursors):
+        return self._conn.cursor(_instrumented_class(cursors))
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def _route_path(scope):
+    """Template da rota casada (ex: /projetos/{codigo}), ou None"""
+    # FastAPI recente guarda o caminho completo (com o prefixo do router) aqui;
+    # nas versões anteriores scope["route"].path já é o completo
+    contexto = (scope.get("fastapi") or {}).get("effective_route_context")
+    return getattr(contexto, "path_format", None) or getattr(scope.get("route"), "path", None)
+
+class QueryMetricsMiddleware:
+    """Conta as queries de cada requisição, registra por rota e avisa sobre possíveis N+1"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_query_headers(message):
+            # Só as queries feitas até o início da resposta entram nos headers
+            if message["type"] == "http.response.start" and QUERY_DEBUG_HEADERS:
+                headers = MutableHeaders(scope=message)
+                headers[QUERY_COUNT_HEADER] = str(queries.count)
+                problemas = queries.violations(QUERY_WARN_MAX_QUERIES, QUERY_WARN_MAX_REPEATS)
+                if problemas:
+                    headers[QUERY_WARNING_HEADER] = "possible N+1: " + "; ".join(problemas)[:500]
+            await send(message)
+
+        with count_queries() as queries:
+            try:
+                await self.app(scope, receive, send_with_query_headers)
+            finally:
+                route = _route_path(scope)
+                if route is not None:
+                    key = (scope["method"], route)
+                    histogram = request_query_counts.get(key)
+                    if histogram is None:
+                        histogram = request_query_counts[key] = Histogram(QUERY_COUNT_BUCKETS)
+                    histogram.observe(queries.count)
+
+                problemas = queries.violations(QUERY_WARN_MAX_QUERIES, QUERY_WARN_MAX_REPEATS)
+                if problemas:
+                    logger.warning(
+                        "Possible N+1 in %s %s: %s",
+                        scope["method"], route or scope["path"], "; ".join(problemas),
+                    )
+
+def instrumentation_stats():
+    """Resumo das queries por chamador e comando"""
+    return {
+        "slow_queries": slow_queries,
+        "slow_query_threshold_ms": SLOW_QUERY_THRESHOLD_MS,
+        "queries": [
+            {
+                "caller": caller,
+                "command": command,
+                "count": stats.latency.count,
+                "seconds": stats.latency.sum,
+                "rows": stats.rows,
+                "errors": stats.errors,
+            }
+            for (caller, command), stats in sorted(query_stats.items())
+        ],
+    }
@@ -1,18 +1,54 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from app.database import init_pool, close_pool
+from app.database import init_pool, close_pool, pool_stats
+from app.pagination import NEXT_CURSOR_HEADER
+from app.search import SEARCH_TRUNCATED_HEADER
+from app.cache import cache_stats
+from app.singleflight import singleflight_stats
+from app.coautoria import coautoria_stats, coautorias
+from app.compression import CompressionMiddleware
+from app.instrumentation import (
+    QUERY_COUNT_HEADER, QUERY_WARNING_HEADER, QueryMetricsMiddleware, instrumentation_stats,
+)
+from app.prometheus import render_metrics
+from app.security import password_hashing_stats, shutdown_password_hashing
+from app.repositories.dashboard_repository import DashboardRepository
+import asyncio
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
+# Intervalo (segundos) entre reconciliações da tabela estatisticas
+STATS_RECONCILE_INTERVAL = int(os.getenv("STATS_RECONCILE_INTERVAL", "3600"))
+
+async def reconcile_stats_periodically():
+    """Corrige eventuais desvios dos contadores mantidos pelos triggers"""
+    repository = DashboardRepository()
+    while True:
+        try:
+            await repository.reconcile_stats()
+        except Exception:
+            logger.exception("Erro ao reconciliar estatísticas")
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("Iniciando conexão com banco de dados...")
     await init_pool()
+    reconcile_task = asyncio.create_task(reconcile_stats_periodically())
+    # Grafo de coautoria montado em segundo plano, antes da primeira consulta
+    grafo_task = coautorias.iniciar()
     yield
     # Shutdown
+    reconcile_task.cancel()
+    grafo_task.cancel()
     print("Fechando conexão com banco de dados...")
     await close_pool()
+    shutdown_password_hashing()
 
 app = FastAPI(title="SIGPesq API", version="1.0.0", lifespan=lifespan)
 
@@ -25,8 +61,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, SEARCH_TRUNCATED_HEADER, "ETag", "Last-Modified", QUERY_COUNT_HEADER, QUERY_WARNING_HEADER],
 )
 
+# gzip/brotli a partir de COMPRESSION_MIN_SIZE bytes (ver app/compression.py)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(QueryMetricsMiddleware)
+
 from app.routers import participantes, projetos, financiamentos, producoes, auth, dashboard, consultas
 app.include_router(auth.router, tags=["Autenticação"])
 app.include_router(participantes.router, prefix="/participantes", tags=["Participantes"])
@@ -40,6 +81,41 @@ app.include_router(consultas.router, prefix="/consultas", tags=["Consultas"])
 def read_root():
     return {"message": "SIGPesq API is running", "docs": "/docs"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Todas as métricas do processo no formato de texto do Prometheus"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/metrics/queries")
+def query_metrics():
+    """Queries por chamador e comando (contagem, tempo, linhas, erros) e queries lentas"""
+    return instrumentation_stats()
+
+@app.get("/metrics/cache")
+def cache_metrics():
+    """Hit/miss e ocupação dos caches de consultas"""
+    return cache_stats()
+
+@app.get("/metrics/singleflight")
+def singleflight_metrics():
+    """Chamadas de leitura concorrentes que compartilharam uma mesma execução"""
+    return singleflight_stats()
+
+@app.get("/metrics/password-hashing")
+def password_hashing_metrics():
+    """Fila e concorrência do pool de hashing de senhas"""
+    return password_hashing_stats()
+
+@app.get("/metrics/coautoria")
+def coautoria_metrics():
+    """Tamanho e cargas do grafo de coautoria em memória"""
+    return coautoria_stats()
+
+@app.get("/metrics/db-pool")
+def db_pool_metrics():
+    """Conexões em uso/ociosas, espera e latência de aquisição do pool"""
+    return pool_stats()
+
 @app.get("/health")
 async def health_check():
     from app.database import get_db_connection
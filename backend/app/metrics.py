@@ -0,0 +1,62 @@
+import bisect
+
+# Métricas simples em memória (por processo)
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Histograma cumulativo de latências (em segundos), no estilo Prometheus"""
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # último = +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {"buckets": buckets, "count": self.count, "sum": self.sum}
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+class PrometheusWriter:
+    """Monta a exposição em texto do Prometheus (formato 0.0.4), agrupando as amostras por métrica"""
+
+    def __init__(self):
+        self._families = {}
+
+    def declare(self, name: str, kind: str, help_text: str):
+        if name not in self._families:
+            self._families[name] = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+    def sample(self, name: str, value, labels=None, family: str = None):
+        if not isinstance(value, int) or isinstance(value, bool):
+            value = float(value)
+        self._families[family or name].append(f"{name}{_format_labels(labels)} {value}")
+
+    def histogram(self, name: str, snapshot: dict, labels=None):
+        """Amostras _bucket/_sum/_count a partir de Histogram.snapshot()"""
+        labels = labels or {}
+        for le, cumulative in snapshot["buckets"].items():
+            self.sample(f"{name}_bucket", cumulative, {**labels, "le": le}, family=name)
+        self.sample(f"{name}_sum", snapshot["sum"], labels, family=name)
+        self.sample(f"{name}_count", snapshot["count"], labels, family=name)
+
+    def render(self) -> str:
+        return "\n".join(line for lines in self._families.values() for line in lines) + "\n"
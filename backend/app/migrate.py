@@ -0,0 +1,131 @@
+"""Migrações versionadas do schema.
+
+Cada arquivo em backend/migrations/ se chama NNN_descricao.sql e é aplicado
+uma única vez, em ordem; as versões aplicadas ficam em schema_migrations.
+Bancos criados pelo database/init_db.sql já nascem com as migrações incluídas
+nele registradas como aplicadas.
+
+Uso (na pasta backend):
+    python -m app.migrate           # aplica as migrações pendentes
+    python -m app.migrate status    # lista aplicadas e pendentes
+
+Obs: DDL no MySQL faz commit implícito, então uma migração que falha no meio
+não é desfeita; corrija o banco/arquivo e rode de novo.
+"""
+import asyncio
+import logging
+import os
+import re
+import sys
+from pathlib import Path
+
+import aiomysql
+
+from app.database import DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+MIGRATION_FILE = re.compile(r"^(\d{3})_(\w+)\.sql$")
+
+# Criar triggers pode exigir um usuário com mais privilégios que o da aplicação
+MIGRATE_DB_USER = os.getenv("MIGRATE_DB_USER", DB_USER)
+MIGRATE_DB_PASSWORD = os.getenv("MIGRATE_DB_PASSWORD", DB_PASSWORD)
+
+def list_migrations():
+    """Retorna [(versao, descricao, caminho)] ordenado por versão"""
+    migrations = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        match = MIGRATION_FILE.match(path.name)
+        if match:
+            migrations.append((match.group(1), match.group(2).replace("_", " "), path))
+    return migrations
+
+def split_statements(script: str):
+    """Separa um script SQL em comandos, respeitando blocos DELIMITER (triggers)"""
+    statements = []
+    delimiter = ";"
+    buffer = []
+    for line in script.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith("DELIMITER "):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        if not buffer and (not stripped or stripped.startswith("--")):
+            continue
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = "\n".join(buffer).rstrip()[:-len(delimiter)].strip()
+            if statement:
+                statements.append(statement)
+            buffer = []
+    if "\n".join(buffer).strip():
+        statements.append("\n".join(buffer).strip())
+    return statements
+
+async def _connect():
+    return await aiomysql.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=MIGRATE_DB_USER,
+        password=MIGRATE_DB_PASSWORD,
+        db=DB_NAME,
+        autocommit=True,
+        charset='utf8mb4'
+    )
+
+async def _applied_versions(cursor):
+    await cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            versao CHAR(3) NOT NULL,
+            descricao VARCHAR(200) NOT NULL,
+            aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (versao)
+        )
+    """)
+    await cursor.execute("SELECT versao FROM schema_migrations")
+    return {row[0] for row in await cursor.fetchall()}
+
+async def pending_migrations():
+    conn = await _connect()
+    try:
+        async with conn.cursor() as cursor:
+            applied = await _applied_versions(cursor)
+    finally:
+        conn.close()
+    return [m for m in list_migrations() if m[0] not in applied]
+
+async def migrate():
+    """Aplica as migrações pendentes e retorna as versões aplicadas"""
+    conn = await _connect()
+    aplicadas = []
+    try:
+        async with conn.cursor() as cursor:
+            applied = await _applied_versions(cursor)
+            for versao, descricao, path in list_migrations():
+                if versao in applied:
+                    continue
+                logger.info("Aplicando migração %s (%s)...", versao, descricao)
+                for statement in split_statements(path.read_text(encoding="utf-8")):
+                    await cursor.execute(statement)
+                await cursor.execute(
+                    "INSERT INTO schema_migrations (versao, descricao) VALUES (%s, %s)",
+                    (versao, descricao)
+                )
+                aplicadas.append(versao)
+    finally:
+        conn.close()
+    return aplicadas
+
+async def _main(args):
+    if args and args[0] == "status":
+        pendentes = {m[0] for m in await pending_migrations()}
+        for versao, descricao, _ in list_migrations():
+            print(f"{versao}  {'pendente ' if versao in pendentes else 'aplicada '}  {descricao}")
+        return
+    aplicadas = await migrate()
+    print(f"Migrações aplicadas: {', '.join(aplicadas)}" if aplicadas else "Banco já está atualizado.")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(sys.argv[1:]))
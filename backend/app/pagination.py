@@ -0,0 +1,46 @@
+import base64
+import json
+from fastapi import HTTPException, Response
+
+# Paginação por cursor (keyset): o cursor guarda os valores da chave de
+# ordenação da última linha da página, e a próxima página começa logo depois
+# dela via WHERE, sem OFFSET. O custo de buscar a página 1 ou a 5000 é o mesmo.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(values):
+    """Gera um cursor opaco a partir dos valores da chave de ordenação"""
+    raw = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int):
+    """Decodifica um cursor gerado por encode_cursor; 400 se for inválido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return values
+
+def page_limit(limit, cursor):
+    """Tamanho da página; None mantém a listagem completa (sem paginação)"""
+    if limit is None and cursor is None:
+        return None
+    return min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+def split_page(rows, limit, key):
+    """Recebe até limit + 1 linhas e devolve (página, next_cursor)"""
+    rows = list(rows)
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
+
+def set_next_cursor(response: Response, next_cursor):
+    """Expõe o cursor da próxima página no header da resposta"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,84 @@
+from app import instrumentation
+from app.cache import cache_stats
+from app.coautoria import coautoria_stats
+from app.database import pool_stats
+from app.metrics import PrometheusWriter
+from app.security import password_hashing_stats
+from app.singleflight import singleflight_stats
+
+# Exposição em /metrics (texto do Prometheus) das métricas em memória deste
+# processo: queries (app/instrumentation.py), pool de conexões, caches,
+# single-flight, grafo de coautoria e hashing de senhas. Os mesmos dados
+# seguem em JSON nos endpoints /metrics/*.
+
+def render_metrics():
+    w = PrometheusWriter()
+
+    w.declare("sigpesq_db_query_duration_seconds", "histogram", "Latência das queries por chamador e comando")
+    w.declare("sigpesq_db_query_rows_total", "counter", "Linhas retornadas pelas queries")
+    w.declare("sigpesq_db_query_errors_total", "counter", "Queries que falharam")
+    for (caller, command), stats in sorted(instrumentation.query_stats.items()):
+        labels = {"caller": caller, "command": command}
+        w.histogram("sigpesq_db_query_duration_seconds", stats.latency.snapshot(), labels)
+        w.sample("sigpesq_db_query_rows_total", stats.rows, labels)
+        w.sample("sigpesq_db_query_errors_total", stats.errors, labels)
+
+    w.declare("sigpesq_db_slow_queries_total", "counter", "Queries acima de SLOW_QUERY_THRESHOLD_MS")
+    w.sample("sigpesq_db_slow_queries_total", instrumentation.slow_queries)
+
+    w.declare("sigpesq_http_request_db_queries", "histogram", "Queries executadas por requisição, por rota")
+    for (method, route), histogram in sorted(instrumentation.request_query_counts.items()):
+        w.histogram("sigpesq_http_request_db_queries", histogram.snapshot(), {"method": method, "route": route})
+
+    pool = pool_stats()
+    for key, kind, help_text in (
+        ("size", "gauge", "Conexões abertas no pool do primário"),
+        ("in_use", "gauge", "Conexões em uso"),
+        ("idle", "gauge", "Conexões ociosas"),
+        ("waiters", "gauge", "Requisições aguardando uma conexão"),
+        ("acquired", "counter", "Conexões obtidas do pool"),
+        ("acquire_timeouts", "counter", "Esperas por conexão que estouraram o timeout"),
+        ("ping_failures", "counter", "Falhas no pre-ping"),
+        ("replica_reads", "counter", "Leituras servidas por réplicas"),
+        ("replica_fallbacks", "counter", "Leituras de réplica desviadas para o primário"),
+    ):
+        name = f"sigpesq_db_pool_{key}" + ("_total" if kind == "counter" else "")
+        w.declare(name, kind, help_text)
+        w.sample(name, pool[key])
+    w.declare("sigpesq_db_pool_acquire_seconds", "histogram", "Tempo para obter uma conexão do pool")
+    w.histogram("sigpesq_db_pool_acquire_seconds", pool["acquire_latency_seconds"])
+
+    caches = cache_stats()
+    for key, kind in (("size", "gauge"), ("hits", "counter"), ("misses", "counter"),
+                      ("evictions", "counter"), ("invalidations", "counter"), ("stale_discards", "counter")):
+        name = f"sigpesq_cache_{key}" + ("_total" if kind == "counter" else "")
+        w.declare(name, kind, f"Cache de consultas: {key}")
+        for cache, stats in sorted(caches.items()):
+            w.sample(name, stats[key], {"cache": cache})
+
+    flights = singleflight_stats()
+    for key, kind in (("calls", "counter"), ("executions", "counter"), ("coalesced", "counter"),
+                      ("errors", "counter"), ("in_flight", "gauge")):
+        name = f"sigpesq_singleflight_{key}" + ("_total" if kind == "counter" else "")
+        w.declare(name, kind, f"Single-flight: {key}")
+        for flight, stats in sorted(flights.items()):
+            w.sample(name, stats[key], {"group": flight})
+
+    grafo = coautoria_stats()
+    for key, kind, help_text in (
+        ("participants", "gauge", "Participantes no grafo de coautoria"),
+        ("edges", "gauge", "Pares de colaboradores no grafo de coautoria"),
+        ("loads", "counter", "Cargas completas do grafo de coautoria"),
+        ("last_load_seconds", "gauge", "Duração da última carga do grafo de coautoria"),
+    ):
+        name = f"sigpesq_coautoria_{key}" + ("_total" if kind == "counter" else "")
+        w.declare(name, kind, help_text)
+        w.sample(name, grafo[key])
+
+    hashing = password_hashing_stats()
+    for key, kind in (("in_flight", "gauge"), ("queued", "gauge"), ("completed", "counter"), ("rejected", "counter")):
+        name = f"sigpesq_password_hashing_{key}" + ("_total" if kind == "counter" else "")
+        w.declare(name, kind, f"Hashing de senhas: {key}")
+        w.sample(name, hashing[key])
+
+    return w.render()
@@ -0,0 +1,34 @@
+"""Reparo dos contadores materializados (tabelas estatisticas e produtividade).
+
+Os contadores são mantidos pelos triggers (estatisticas) e pelos métodos de
+escrita (produtividade), na mesma transação da escrita; este comando só
+corrige desvios (escritas feitas direto no banco, ON DELETE CASCADE, dados
+carregados sem passar pelo backend). A leitura é consistente e não trava as
+tabelas, então pode rodar com a API no ar (ex: em um cron diário). Os
+processos da API veem a correção do ranking quando o cache dele expira
+(LOOKUP_CACHE_TTL).
+
+Uso (na pasta backend):
+    python -m app.reconcile
+"""
+import asyncio
+import logging
+
+from app.database import init_pool, close_pool
+from app.repositories.dashboard_repository import DashboardRepository
+from app.repositories.produtividade_repository import ProdutividadeRepository
+
+async def _main():
+    await init_pool()
+    try:
+        await DashboardRepository().reconcile_stats()
+        corrigidas = await ProdutividadeRepository().reconcile()
+    finally:
+        await close_pool()
+    print("Estatísticas do dashboard reconciliadas.")
+    print(f"Contadores de produtividade corrigidos: {corrigidas} linha(s)." if corrigidas
+          else "Contadores de produtividade já estão corretos.")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
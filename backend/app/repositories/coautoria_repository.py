@@ -0,0 +1,95 @@
+from app.database import get_db_connection
+import aiomysql
+import os
+
+# Linhas lidas por vez ao carregar o grafo de coautoria (cursor server-side)
+COAUTORIA_FETCH_SIZE = int(os.getenv("COAUTORIA_FETCH_SIZE", "10000"))
+
+class CoautoriaRepository:
+    async def _stream_grupos(self, sql: str):
+        """Gera lotes de (chave, cpf) ordenados pela chave, sem bufferizar o resultado"""
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.SSCursor) as cursor:
+                await cursor.execute(sql)
+                while True:
+                    rows = await cursor.fetchmany(COAUTORIA_FETCH_SIZE)
+                    if not rows:
+                        break
+                    yield rows
+
+    def stream_autorias(self):
+        """(producao_id, participante_cpf) de todas as autorias, na ordem da chave primária"""
+        return self._stream_grupos(
+            "SELECT producao_id, participante_cpf FROM producoes_autores ORDER BY producao_id, participante_cpf"
+        )
+
+    def stream_membros(self):
+        """(projeto_codigo, participante_cpf) de todos os vínculos com projetos"""
+        return self._stream_grupos(
+            "SELECT projeto_codigo, participante_cpf FROM participantes_projetos ORDER BY projeto_codigo, participante_cpf"
+        )
+
+    async def get_participantes(self, cpfs):
+        """Retorna {cpf: {cpf, nome, tipo}} dos participantes pedidos"""
+        cpfs = list(dict.fromkeys(cpfs))
+        if not cpfs:
+            return {}
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                placeholders = ", ".join(["%s"] * len(cpfs))
+                await cursor.execute(
+                    f"SELECT cpf, nome, tipo FROM participantes WHERE cpf IN ({placeholders})", cpfs
+                )
+                return {row['cpf']: row for row in await cursor.fetchall()}
+
+    async def get_producoes_em_comum(self, cpf_a: str, cpf_b: str, limit: int):
+        """Produções assinadas pelos dois participantes, das mais recentes para as mais antigas"""
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                sql = """
+                    SELECT p.id_registro, p.titulo, p.tipo, p.ano_publicacao
+                    FROM producoes_autores a
+                    JOIN producoes_autores b ON b.producao_id = a.producao_id AND b.participante_cpf = %s
+                    JOIN producoes p ON p.id_registro = a.producao_id
+                    WHERE a.participante_cpf = %s
+                    ORDER BY p.ano_publicacao DESC, p.titulo
+                    LIMIT %s
+                """
+                await cursor.execute(sql, (cpf_b, cpf_a, limit))
+                return await cursor.fetchall()
+
+    async def get_perfil(self, cpf: str):
+        """Participante com todas as suas produções (com a ordem de autoria) e projetos, ou None"""
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(
+                    "SELECT cpf, nome, email, tipo, criado_em FROM participantes WHERE cpf = %s", (cpf,)
+                )
+                participante = await cursor.fetchone()
+                if not participante:
+                    return None
+
+                await cursor.execute("""
+                    SELECT p.id_registro, p.titulo, p.tipo, p.ano_publicacao, p.meio_divulgacao,
+                           p.projeto_codigo, pa.ordem
+                    FROM producoes_autores pa
+                    JOIN producoes p ON p.id_registro = pa.producao_id
+                    WHERE pa.participante_cpf = %s
+                    ORDER BY p.ano_publicacao DESC, p.titulo
+                """, (cpf,))
+                participante['producoes'] = await cursor.fetchall()
+
+                await cursor.execute("""
+                    SELECT p.codigo, p.titulo, p.situacao, p.data_inicio, p.data_termino,
+                           'Coordenador' as funcao
+                    FROM projetos p
+                    WHERE p.coordenador_cpf = %s
+                    UNION
+                    SELECT p.codigo, p.titulo, p.situacao, p.data_inicio, p.data_termino, pp.funcao
+                    FROM participantes_projetos pp
+                    JOIN projetos p ON p.codigo = pp.projeto_codigo
+                    WHERE pp.participante_cpf = %s
+                    ORDER BY data_inicio DESC
+                """, (cpf, cpf))
+                participante['projetos'] = await cursor.fetchall()
+                return participante
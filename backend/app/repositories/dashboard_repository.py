@@ -1,46 +1,92 @@
 from app.database import get_db_connection
+from app.singleflight import SingleFlight, coalesce
 import aiomysql
 
+STATS_SQL = """
+    SELECT projetos_ativos, total_participantes, total_financiamentos,
+           total_producoes, projetos_concluidos
+    FROM estatisticas
+    WHERE id = 1
+"""
+
+ESTATISTICAS = (
+    "projetos_ativos", "projetos_concluidos", "total_participantes", "total_producoes", "total_financiamentos"
+)
+
+CONTAGENS_SQL = """
+    SELECT (SELECT COUNT(*) FROM projetos WHERE situacao = 'EM_ANDAMENTO') as projetos_ativos,
+           (SELECT COUNT(*) FROM projetos WHERE situacao = 'CONCLUIDO') as projetos_concluidos,
+           (SELECT COUNT(*) FROM participantes) as total_participantes,
+           (SELECT COUNT(*) FROM producoes) as total_producoes,
+           (SELECT COALESCE(SUM(valor_total), 0) FROM financiamentos) as total_financiamentos
+"""
+
+# Todos os usuários carregam o dashboard ao mesmo tempo
+dashboard_flight = SingleFlight("dashboard")
+
 class DashboardRepository:
+    @coalesce(dashboard_flight)
     async def get_stats(self):
-        """Retorna estatísticas gerais do sistema"""
+        """Retorna estatísticas gerais do sistema (tabela estatisticas, mantida por triggers)"""
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(STATS_SQL)
+                stats = await cursor.fetchone()
+        
+        # Linha ainda não criada (banco antigo): recalcula a partir das tabelas
+        if not stats:
+            return await self.reconcile_stats()
+        
+        stats['total_financiamentos'] = float(stats['total_financiamentos'])
+        return stats
+    
+    async def reconcile_stats(self):
+        """Corrige desvios da tabela estatisticas em relação às tabelas de origem e retorna as estatísticas.
+
+        Contagens e estatisticas são lidas no mesmo snapshot (leitura
+        consistente, sem travar as tabelas de origem) e só a diferença é
+        somada à linha, então as atualizações dos triggers feitas enquanto
+        isso não se perdem.
+        """
         async with get_db_connection() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
-                # Projetos ativos
-                await cursor.execute(
-                    "SELECT COUNT(*) as total FROM projetos WHERE situacao = 'EM_ANDAMENTO'"
-                )
-                projetos_ativos = (await cursor.fetchone())['total']
-                
-                # Total de participantes
-                await cursor.execute("SELECT COUNT(*) as total FROM participantes")
-                total_participantes = (await cursor.fetchone())['total']
-                
-                # Total de financiamentos
-                await cursor.execute("SELECT COALESCE(SUM(valor_total), 0) as total FROM financiamentos")
-                total_financiamentos = (await cursor.fetchone())['total']
-                
-                # Total de produções
-                await cursor.execute("SELECT COUNT(*) as total FROM producoes")
-                total_producoes = (await cursor.fetchone())['total']
-                
-                # Projetos concluídos
-                await cursor.execute(
-                    "SELECT COUNT(*) as total FROM projetos WHERE situacao = 'CONCLUIDO'"
-                )
-                projetos_concluidos = (await cursor.fetchone())['total']
-                
-                return {
-                    'projetos_ativos': projetos_ativos,
-                    'total_participantes': total_participantes,
-                    'total_financiamentos': float(total_financiamentos),
-                    'total_producoes': total_producoes,
-                    'projetos_concluidos': projetos_concluidos
-                }
+                await cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+                try:
+                    await cursor.execute(CONTAGENS_SQL)
+                    contagens = await cursor.fetchone()
+                    await cursor.execute(STATS_SQL)
+                    atual = await cursor.fetchone()
+                finally:
+                    await conn.commit()
+
+                if atual is None:
+                    await cursor.execute(
+                        f"""
+                        INSERT INTO estatisticas (id, {", ".join(ESTATISTICAS)})
+                        VALUES (1, {", ".join(["%s"] * len(ESTATISTICAS))})
+                        ON DUPLICATE KEY UPDATE id = id
+                        """,
+                        [contagens[coluna] for coluna in ESTATISTICAS]
+                    )
+                else:
+                    desvios = {coluna: contagens[coluna] - atual[coluna] for coluna in ESTATISTICAS}
+                    desvios = {coluna: desvio for coluna, desvio in desvios.items() if desvio}
+                    if desvios:
+                        await cursor.execute(
+                            "UPDATE estatisticas SET "
+                            + ", ".join(f"{coluna} = {coluna} + %s" for coluna in desvios)
+                            + " WHERE id = 1",
+                            list(desvios.values())
+                        )
+                await cursor.execute(STATS_SQL)
+                stats = await cursor.fetchone()
+                stats['total_financiamentos'] = float(stats['total_financiamentos'])
+                return stats
     
+    @coalesce(dashboard_flight)
     async def get_recent_projects(self, limit: int = 5):
         """Retorna os projetos mais recentes"""
-        async with get_db_connection() as conn:
+        async with get_db_connection(read_only=True) as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 sql = """
                     SELECT p.codigo, p.titulo, p.situacao, p.data_inicio, p.data_termino,
@@ -53,9 +99,10 @@ class DashboardRepository:
                 await cursor.execute(sql, (limit,))
                 return await cursor.fetchall()
     
+    @coalesce(dashboard_flight)
     async def get_recent_producoes(self, limit: int = 5):
         """Retorna as produções mais recentes"""
-        async with get_db_connection() as conn:
+        async with get_db_connection(read_only=True) as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 sql = """
                     SELECT p.id_registro, p.titulo, p.tipo, p.ano_publicacao, p.meio_divulgacao,
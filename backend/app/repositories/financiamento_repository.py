@@ -1,7 +1,29 @@
-from app.database import get_db_connection
+from app.database import get_db_connection, transaction
 from app.schemas import AgenciaCreate, FinanciamentoCreate
+from app.pagination import decode_cursor, page_limit, split_page
+from app.search import PREFIX_MATCH_SCORE, fulltext_query, like_prefix, pop_truncada, ranked_matches
+from app.cache import TTLCache, cached
+from app.singleflight import SingleFlight, coalesce
+from app.export import stream_query
+from app.repositories.relatorio_repository import relatorios_cache
+from app.repositories.produtividade_repository import Deltas, aplicar, ranking_cache
 import aiomysql
 
+# list_agencias e get_agencias_distinct (depende também de financiamentos)
+agencias_cache = TTLCache("financiamentos.agencias")
+agencias_flight = SingleFlight("financiamentos.agencias")
+
+def _financiamento_row(codigo_processo: str, fin: FinanciamentoCreate):
+    """Financiamento como gravado (colunas DATE e DECIMAL(15,2)), montado a partir do payload"""
+    return {
+        'codigo_processo': codigo_processo,
+        'agencia_sigla': fin.agencia_sigla,
+        'tipo_fomento': fin.tipo_fomento,
+        'valor_total': round(fin.valor_total, 2),
+        'data_inicio': fin.data_inicio.date(),
+        'data_fim': fin.data_fim.date() if fin.data_fim else None,
+    }
+
 class FinanciamentoRepository:
     async def create_agencia(self, agencia: AgenciaCreate):
         async with get_db_connection() as conn:
@@ -11,15 +33,20 @@ class FinanciamentoRepository:
                     (agencia.sigla, agencia.nome)
                 )
                 await conn.commit()
+                agencias_cache.invalidate()
+                relatorios_cache.invalidate()
                 return agencia
 
+    @cached(agencias_cache)
+    @coalesce(agencias_flight)
     async def list_agencias(self):
-        async with get_db_connection() as conn:
+        async with get_db_connection(read_only=True) as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 await cursor.execute("SELECT * FROM agencias ORDER BY nome")
                 return await cursor.fetchall()
 
     async def create_financiamento(self, fin: FinanciamentoCreate):
+        """Cria o financiamento e retorna a linha gravada, sem reler do banco"""
         async with get_db_connection() as conn:
             async with conn.cursor() as cursor:
                 sql = """
@@ -33,36 +60,112 @@ class FinanciamentoRepository:
                 )
                 await cursor.execute(sql, values)
                 await conn.commit()
-                return fin
+                agencias_cache.invalidate()
+                relatorios_cache.invalidate()
+                return _financiamento_row(fin.codigo_processo, fin)
             
-    async def list_financiamentos(self, search: str = None, tipo: str = None):
-        """Lista todos os financiamentos com filtros opcionais"""
-        async with get_db_connection() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cursor:
-                sql = """
-                    SELECT f.*, 
-                           COUNT(DISTINCT pf.projeto_codigo) as num_projetos,
-                           a.nome as agencia_nome
-                    FROM financiamentos f
-                    LEFT JOIN projetos_financiamentos pf ON f.codigo_processo = pf.financiamento_codigo
-                    LEFT JOIN agencias a ON f.agencia_sigla = a.sigla
-                    WHERE 1=1
-                """
+    async def list_financiamentos(self, search: str = None, tipo: str = None, limit: int = None, cursor: str = None):
+        """Lista os financiamentos com filtros opcionais, paginando por (data_inicio, codigo_processo).
+
+        Com `search`, usa a busca FULLTEXT e ordena por relevância (paginando por
+        (relevancia, codigo_processo)). Retorna (financiamentos, next_cursor, truncada);
+        ver app.search para o limite de resultados da busca.
+        """
+        limit = page_limit(limit, cursor)
+        query = fulltext_query(search) if search else None
+        filtros = []
+        if tipo:
+            filtros.append(("f.tipo_fomento = %s", [tipo]))
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
                 params = []
                 
-                if search:
-                    sql += " AND (a.nome LIKE %s OR f.codigo_processo LIKE %s)"
-                    search_param = f"%{search}%"
-                    params.extend([search_param, search_param])
+                if query:
+                    busca_sql, busca_params = ranked_matches([
+                        ("""
+                            SELECT f.codigo_processo AS chave, MATCH(a.nome) AGAINST (%s IN BOOLEAN MODE) AS score
+                            FROM agencias a
+                            JOIN financiamentos f ON f.agencia_sigla = a.sigla
+                            WHERE MATCH(a.nome) AGAINST (%s IN BOOLEAN MODE)
+                        """, [query, query]),
+                        ("""
+                            SELECT f.codigo_processo AS chave, %s AS score
+                            FROM financiamentos f
+                            WHERE f.codigo_processo LIKE %s
+                        """, [PREFIX_MATCH_SCORE, like_prefix(search)]),
+                    ], filtros)
+                    sql = f"""
+                        SELECT f.*, 
+                               COUNT(DISTINCT pf.projeto_codigo) as num_projetos,
+                               a.nome as agencia_nome,
+                               MAX(busca.relevancia) as relevancia,
+                               MAX(busca.busca_truncada) as busca_truncada
+                        FROM ({busca_sql}) busca
+                        INNER JOIN financiamentos f ON f.codigo_processo = busca.chave
+                        LEFT JOIN projetos_financiamentos pf ON f.codigo_processo = pf.financiamento_codigo
+                        LEFT JOIN agencias a ON f.agencia_sigla = a.sigla
+                        WHERE 1=1
+                    """
+                    params.extend(busca_params)
+                else:
+                    sql = """
+                        SELECT f.*, 
+                               COUNT(DISTINCT pf.projeto_codigo) as num_projetos,
+                               a.nome as agencia_nome
+                        FROM financiamentos f
+                        LEFT JOIN projetos_financiamentos pf ON f.codigo_processo = pf.financiamento_codigo
+                        LEFT JOIN agencias a ON f.agencia_sigla = a.sigla
+                        WHERE 1=1
+                    """
+                    
+                    # Termos curtos demais para o índice FULLTEXT
+                    if search:
+                        sql += " AND (a.nome LIKE %s OR f.codigo_processo LIKE %s)"
+                        search_param = f"%{search}%"
+                        params.extend([search_param, search_param])
+                    
+                    for condicao, filtro_params in filtros:
+                        sql += f" AND {condicao}"
+                        params.extend(filtro_params)
                 
-                if tipo:
-                    sql += " AND f.tipo_fomento = %s"
-                    params.append(tipo)
+                if query:
+                    if cursor:
+                        relevancia, codigo_processo = decode_cursor(cursor, 2)
+                        sql += " AND (busca.relevancia < %s OR (busca.relevancia = %s AND f.codigo_processo > %s))"
+                        params.extend([relevancia, relevancia, codigo_processo])
+                    sql += " GROUP BY f.codigo_processo ORDER BY relevancia DESC, f.codigo_processo"
+                    key = lambda f: (f['relevancia'], f['codigo_processo'])
+                else:
+                    if cursor:
+                        data_inicio, codigo_processo = decode_cursor(cursor, 2)
+                        sql += " AND (f.data_inicio < %s OR (f.data_inicio = %s AND f.codigo_processo < %s))"
+                        params.extend([data_inicio, data_inicio, codigo_processo])
+                    sql += " GROUP BY f.codigo_processo ORDER BY f.data_inicio DESC, f.codigo_processo DESC"
+                    key = lambda f: (f['data_inicio'], f['codigo_processo'])
                 
-                sql += " GROUP BY f.codigo_processo ORDER BY f.data_inicio DESC"
+                if limit:
+                    sql += " LIMIT %s"
+                    params.append(limit + 1)
                 
-                await cursor.execute(sql, params)
-                return await cursor.fetchall()
+                await cur.execute(sql, params)
+                financiamentos, truncada = pop_truncada(await cur.fetchall())
+                return (*split_page(financiamentos, limit, key), truncada)
+    
+    def export(self, tipo: str = None):
+        """Todos os financiamentos em lotes, para exportação em streaming (ver app.export)"""
+        sql = """
+            SELECT f.*, a.nome as agencia_nome,
+                   (SELECT COUNT(*) FROM projetos_financiamentos pf
+                    WHERE pf.financiamento_codigo = f.codigo_processo) as num_projetos
+            FROM financiamentos f
+            LEFT JOIN agencias a ON f.agencia_sigla = a.sigla
+        """
+        params = []
+        if tipo:
+            sql += " WHERE f.tipo_fomento = %s"
+            params.append(tipo)
+        sql += " ORDER BY f.data_inicio DESC, f.codigo_processo DESC"
+        return stream_query(sql, params)
     
     async def get_by_codigo(self, codigo_processo: str):
         """Retorna um financiamento específico"""
@@ -82,7 +185,7 @@ class FinanciamentoRepository:
                 return await cursor.fetchone()
     
     async def update(self, codigo_processo: str, fin: FinanciamentoCreate):
-        """Atualiza um financiamento"""
+        """Atualiza um financiamento e retorna a linha gravada, ou None se ele não existir"""
         async with get_db_connection() as conn:
             async with conn.cursor() as cursor:
                 sql = """
@@ -97,19 +200,31 @@ class FinanciamentoRepository:
                 )
                 await cursor.execute(sql, values)
                 await conn.commit()
-                return await self.get_by_codigo(codigo_processo)
+                if not cursor.rowcount:
+                    return None
+                agencias_cache.invalidate()
+                relatorios_cache.invalidate()
+                return _financiamento_row(codigo_processo, fin)
     
     async def delete(self, codigo_processo: str):
-        """Deleta um financiamento"""
-        async with get_db_connection() as conn:
+        """Deleta um financiamento; retorna False se ele não existir"""
+        async with transaction() as conn:
             async with conn.cursor() as cursor:
+                # As alocações em projetos são apagadas em cascata
+                deltas = Deltas()
+                await deltas.alocacoes(conn, "pf.financiamento_codigo = %s", (codigo_processo,), -1)
                 await cursor.execute("DELETE FROM financiamentos WHERE codigo_processo = %s", (codigo_processo,))
-                await conn.commit()
-                return True
+                deleted = cursor.rowcount > 0
+                await aplicar(conn, deltas)
+        agencias_cache.invalidate()
+        relatorios_cache.invalidate()
+        if deltas.linhas:
+            ranking_cache.invalidate()
+        return deleted
     
     async def get_total(self):
         """Retorna a soma total de todos os financiamentos"""
-        async with get_db_connection() as conn:
+        async with get_db_connection(read_only=True) as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 await cursor.execute("SELECT COALESCE(SUM(valor_total), 0) as total FROM financiamentos")
                 result = await cursor.fetchone()
@@ -117,7 +232,7 @@ class FinanciamentoRepository:
     
     async def get_by_agencia(self, agencia_sigla: str):
         """Retorna financiamentos de uma agência específica"""
-        async with get_db_connection() as conn:
+        async with get_db_connection(read_only=True) as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 sql = """
                     SELECT f.*, a.nome as agencia_nome
@@ -129,9 +244,11 @@ class FinanciamentoRepository:
                 await cursor.execute(sql, (agencia_sigla,))
                 return await cursor.fetchall()
     
+    @cached(agencias_cache)
+    @coalesce(agencias_flight)
     async def get_agencias_distinct(self):
         """Retorna lista de agências distintas"""
-        async with get_db_connection() as conn:
+        async with get_db_connection(read_only=True) as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 sql = """
                     SELECT DISTINCT a.sigla, a.nome
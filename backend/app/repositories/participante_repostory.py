@@ -1,14 +1,28 @@
-from app.database import get_db_connection
+from app.database import get_db_connection, transaction
 from app.schemas import ParticipanteCreate
+from app.pagination import decode_cursor, page_limit, split_page
+from app.search import PREFIX_MATCH_SCORE, fulltext_query, like_prefix, pop_truncada, ranked_matches
+from app.cache import TTLCache, cached
+from app.singleflight import SingleFlight, coalesce
+from app.coautoria import coautorias
+from app.repositories.produtividade_repository import ranking_cache
 import aiomysql
 
 from app.security import get_password_hash
 
+docentes_cache = TTLCache("participantes.docentes")
+docentes_flight = SingleFlight("participantes.docentes")
+
+PARTICIPANTE_SQL = "SELECT cpf, nome, email, tipo, criado_em FROM participantes WHERE cpf = %s"
+
 class ParticipanteRepository:
     async def create(self, participante: ParticipanteCreate):
-        async with get_db_connection() as conn:
-            hashed_password = get_password_hash(participante.senha) # Hashing
-            async with conn.cursor() as cursor:
+        """Cria o participante e retorna a linha gravada (lida na mesma transação)"""
+        # Hashing antes de pegar a conexão do pool
+        hashed_password = await get_password_hash(participante.senha)
+        async with transaction() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                escrita = await coautorias.iniciar_escrita(conn, "participantes")
                 sql = """
                     INSERT INTO participantes (cpf, nome, email, tipo, senha_hash)
                     VALUES (%s, %s, %s, %s, %s)
@@ -21,8 +35,13 @@ class ParticipanteRepository:
                     hashed_password 
                 )
                 await cursor.execute(sql, values)
-                await conn.commit()
-                return participante
+                await coautorias.concluir_escrita(conn, escrita)
+                await cursor.execute(PARTICIPANTE_SQL, (participante.cpf,))
+                criado = await cursor.fetchone()
+        docentes_cache.invalidate()
+        # Não muda o grafo, mas muda a versão de participantes
+        coautorias.escrita_aplicada(escrita)
+        return criado
 
     async def get_by_email(self, email: str):
         async with get_db_connection() as conn:
@@ -34,45 +53,94 @@ class ParticipanteRepository:
                 result = await cursor.fetchone()
                 return result
 
-    async def list_all(self, search: str = None, tipo: str = None):
-        """Lista todos os participantes com filtros opcionais"""
-        async with get_db_connection() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cursor:
-                sql = "SELECT cpf, nome, email, tipo, criado_em FROM participantes WHERE 1=1"
+    async def list_all(self, search: str = None, tipo: str = None, limit: int = None, cursor: str = None):
+        """Lista os participantes com filtros opcionais, paginando por (nome, cpf).
+
+        Com `search`, usa a busca FULLTEXT e ordena por relevância (paginando por
+        (relevancia, cpf)). Retorna (participantes, next_cursor, truncada); ver
+        app.search para o limite de resultados da busca.
+        """
+        limit = page_limit(limit, cursor)
+        query = fulltext_query(search) if search else None
+        filtros = []
+        if tipo:
+            filtros.append(("p.tipo = %s", [tipo]))
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
                 params = []
                 
-                if search:
-                    sql += " AND (nome LIKE %s OR email LIKE %s OR cpf LIKE %s)"
-                    search_param = f"%{search}%"
-                    params.extend([search_param, search_param, search_param])
+                if query:
+                    busca_sql, busca_params = ranked_matches([
+                        ("""
+                            SELECT p.cpf AS chave, MATCH(p.nome, p.email) AGAINST (%s IN BOOLEAN MODE) AS score
+                            FROM participantes p
+                            WHERE MATCH(p.nome, p.email) AGAINST (%s IN BOOLEAN MODE)
+                        """, [query, query]),
+                        ("""
+                            SELECT p.cpf AS chave, %s AS score
+                            FROM participantes p
+                            WHERE p.cpf LIKE %s
+                        """, [PREFIX_MATCH_SCORE, like_prefix(search)]),
+                    ], filtros)
+                    sql = f"""
+                        SELECT p.cpf, p.nome, p.email, p.tipo, p.criado_em, busca.relevancia, busca.busca_truncada
+                        FROM ({busca_sql}) busca
+                        INNER JOIN participantes p ON p.cpf = busca.chave
+                        WHERE 1=1
+                    """
+                    params.extend(busca_params)
+                else:
+                    sql = "SELECT p.cpf, p.nome, p.email, p.tipo, p.criado_em FROM participantes p WHERE 1=1"
+                    
+                    # Termos curtos demais para o índice FULLTEXT
+                    if search:
+                        sql += " AND (p.nome LIKE %s OR p.email LIKE %s OR p.cpf LIKE %s)"
+                        search_param = f"%{search}%"
+                        params.extend([search_param, search_param, search_param])
+                    
+                    for condicao, filtro_params in filtros:
+                        sql += f" AND {condicao}"
+                        params.extend(filtro_params)
                 
-                if tipo:
-                    sql += " AND tipo = %s"
-                    params.append(tipo)
+                if query:
+                    if cursor:
+                        relevancia, cpf = decode_cursor(cursor, 2)
+                        sql += " AND (busca.relevancia < %s OR (busca.relevancia = %s AND p.cpf > %s))"
+                        params.extend([relevancia, relevancia, cpf])
+                    sql += " ORDER BY busca.relevancia DESC, p.cpf"
+                    key = lambda p: (p['relevancia'], p['cpf'])
+                else:
+                    if cursor:
+                        nome, cpf = decode_cursor(cursor, 2)
+                        sql += " AND (p.nome > %s OR (p.nome = %s AND p.cpf > %s))"
+                        params.extend([nome, nome, cpf])
+                    sql += " ORDER BY p.nome, p.cpf"
+                    key = lambda p: (p['nome'], p['cpf'])
                 
-                sql += " ORDER BY nome"
+                if limit:
+                    sql += " LIMIT %s"
+                    params.append(limit + 1)
                 
-                await cursor.execute(sql, params)
-                result = await cursor.fetchall()
-                return result
+                await cur.execute(sql, params)
+                result, truncada = pop_truncada(await cur.fetchall())
+                return (*split_page(result, limit, key), truncada)
 
     async def get_by_cpf(self, cpf: str):
         async with get_db_connection() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
-                await cursor.execute(
-                    "SELECT cpf, nome, email, tipo, criado_em FROM participantes WHERE cpf = %s",
-                    (cpf,)
-                )
+                await cursor.execute(PARTICIPANTE_SQL, (cpf,))
                 result = await cursor.fetchone()
                 return result
     
     async def update(self, cpf: str, participante: ParticipanteCreate):
-        """Atualiza um participante existente"""
-        async with get_db_connection() as conn:
-            async with conn.cursor() as cursor:
+        """Atualiza um participante existente e retorna a linha atualizada (lida na mesma transação)"""
+        # Hashing antes de pegar a conexão do pool
+        hashed_password = await get_password_hash(participante.senha) if participante.senha else None
+        async with transaction() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                escrita = await coautorias.iniciar_escrita(conn, "participantes")
                 # Se a senha foi fornecida, atualiza também
-                if participante.senha:
-                    hashed_password = get_password_hash(participante.senha)
+                if hashed_password:
                     sql = """
                         UPDATE participantes 
                         SET nome = %s, email = %s, tipo = %s, senha_hash = %s
@@ -99,24 +167,54 @@ class ParticipanteRepository:
                     )
                 
                 await cursor.execute(sql, values)
-                await conn.commit()
-                # Para retornar, precisamos chamar self.get_by_cpf, mas ele cria nova conexao
-                # Idealmente refatorar create/update para nao chamar outros metodos que abrem conexao
-                # Mas aqui, como usamos `async with`, a conexao fecha ao sair deste bloco.
-                # Entao chamar self.get_by_cpf(cpf) vai abrir uma nova conexao, o que eh OK.
-                return await self.get_by_cpf(cpf)
+                await coautorias.concluir_escrita(conn, escrita)
+                await cursor.execute(PARTICIPANTE_SQL, (cpf,))
+                atualizado = await cursor.fetchone()
+        docentes_cache.invalidate()
+        # Nome e tipo aparecem (e filtram) o ranking de produtividade
+        ranking_cache.invalidate()
+        coautorias.escrita_aplicada(escrita)
+        return atualizado
     
     async def delete(self, cpf: str):
-        """Deleta um participante"""
-        async with get_db_connection() as conn:
+        """Deleta um participante; retorna False se ele não existir"""
+        async with transaction() as conn:
             async with conn.cursor() as cursor:
+                # Autorias, vínculos e contadores são apagados em cascata (sem trigger)
+                escrita = await coautorias.iniciar_escrita(conn, "participantes")
                 await cursor.execute("DELETE FROM participantes WHERE cpf = %s", (cpf,))
-                await conn.commit()
-                return True
+                deleted = cursor.rowcount > 0
+                await coautorias.concluir_escrita(conn, escrita)
+        docentes_cache.invalidate()
+        if deleted:
+            ranking_cache.invalidate()
+            coautorias.participante_removido(escrita, cpf)
+        return deleted
     
+    async def find_by_identificadores(self, cpfs=(), emails=(), nomes=()):
+        """Retorna cpf, nome e email dos participantes com algum dos CPFs, emails ou nomes.
+
+        A comparação de nomes e emails segue a collation da coluna (ignora acentos e caixa).
+        """
+        condicoes, params = [], []
+        for coluna, valores in (("cpf", cpfs), ("email", emails), ("nome", nomes)):
+            if valores:
+                condicoes.append(f"{coluna} IN ({', '.join(['%s'] * len(valores))})")
+                params.extend(valores)
+        if not condicoes:
+            return []
+        async with get_db_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(
+                    f"SELECT cpf, nome, email FROM participantes WHERE {' OR '.join(condicoes)}", params
+                )
+                return await cursor.fetchall()
+    
+    @cached(docentes_cache)
+    @coalesce(docentes_flight)
     async def get_docentes(self):
         """Retorna apenas participantes do tipo DOCENTE"""
-        async with get_db_connection() as conn:
+        async with get_db_connection(read_only=True) as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 await cursor.execute(
                     "SELECT cpf, nome, email FROM participantes WHERE tipo = 'DOCENTE' ORDER BY nome"
@@ -1,12 +1,30 @@
-from app.database import get_db_connection
+from app.database import get_db_connection, transaction
 from app.schemas import ProducaoCreate
+from app.pagination import decode_cursor, page_limit, split_page
+from app.search import fulltext_query, pop_truncada, ranked_matches
+from app.cache import TTLCache, cached
+from app.singleflight import SingleFlight, coalesce
+from app.export import stream_query
+from app.coautoria import coautorias
+from app.repositories.produtividade_repository import Deltas, aplicar, ranking_cache
 import aiomysql
 from datetime import datetime
 
+# Limite de ids por IN (...) ao carregar autores em lote
+AUTORES_BATCH_SIZE = 1000
+
+anos_cache = TTLCache("producoes.anos")
+anos_flight = SingleFlight("producoes.anos")
+
+def _cpfs(autores):
+    return [autor.participante_cpf for autor in autores or []]
+
 class ProducaoRepository:
     async def create(self, prod: ProducaoCreate):
-        async with get_db_connection() as conn:
-            async with conn.cursor() as cursor:
+        """Cria a produção e seus autores em uma única transação e retorna a produção gravada"""
+        async with transaction() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                escrita = await coautorias.iniciar_escrita(conn, "producoes", "producoes_autores")
                 sql = """
                     INSERT INTO producoes 
                     (id_registro, projeto_codigo, titulo, tipo, ano_publicacao, meio_divulgacao)
@@ -17,72 +35,205 @@ class ProducaoRepository:
                     prod.tipo, prod.ano_publicacao, prod.meio_divulgacao
                 )
                 await cursor.execute(sql, values)
-                await conn.commit()
-                return prod
+                await self._insert_autores(cursor, prod.id_registro, prod.autores)
+                deltas = Deltas()
+                deltas.producao(_cpfs(prod.autores), prod.ano_publicacao, prod.tipo, 1)
+                await aplicar(conn, deltas)
+                await coautorias.concluir_escrita(conn, escrita)
+                producao = await self._fetch_by_id(cursor, prod.id_registro)
+        anos_cache.invalidate()
+        ranking_cache.invalidate()
+        coautorias.autores_alterados(escrita, (), _cpfs(prod.autores))
+        return producao
 
-    async def list_all(self, search: str = None, tipo: str = None, ano: int = None):
-        """Lista todas as produções com filtros opcionais"""
-        async with get_db_connection() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cursor:
-                sql = """
-                    SELECT p.*, proj.titulo as projeto_titulo 
-                    FROM producoes p
-                    LEFT JOIN projetos proj ON p.projeto_codigo = proj.codigo
-                    WHERE 1=1
-                """
+    async def list_all(self, search: str = None, tipo: str = None, ano: int = None, limit: int = None, cursor: str = None):
+        """Lista as produções com filtros opcionais, paginando por (ano_publicacao, titulo, id_registro).
+
+        Com `search`, usa a busca FULLTEXT e ordena por relevância (paginando por
+        (relevancia, id_registro)). Retorna (producoes, next_cursor, truncada); ver
+        app.search para o limite de resultados da busca.
+        """
+        limit = page_limit(limit, cursor)
+        query = fulltext_query(search) if search else None
+        filtros = []
+        if tipo:
+            filtros.append(("p.tipo = %s", [tipo]))
+        if ano:
+            filtros.append(("p.ano_publicacao = %s", [ano]))
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
                 params = []
                 
-                if search:
-                    sql += " AND (p.titulo LIKE %s OR p.meio_divulgacao LIKE %s)"
-                    search_param = f"%{search}%"
-                    params.extend([search_param, search_param])
-                
-                if tipo:
-                    sql += " AND p.tipo = %s"
-                    params.append(tipo)
+                if query:
+                    busca_sql, busca_params = ranked_matches([
+                        ("""
+                            SELECT p.id_registro AS chave, MATCH(p.titulo, p.meio_divulgacao) AGAINST (%s IN BOOLEAN MODE) AS score
+                            FROM producoes p
+                            WHERE MATCH(p.titulo, p.meio_divulgacao) AGAINST (%s IN BOOLEAN MODE)
+                        """, [query, query]),
+                    ], filtros)
+                    sql = f"""
+                        SELECT p.*, proj.titulo as projeto_titulo, busca.relevancia, busca.busca_truncada
+                        FROM ({busca_sql}) busca
+                        INNER JOIN producoes p ON p.id_registro = busca.chave
+                        LEFT JOIN projetos proj ON p.projeto_codigo = proj.codigo
+                        WHERE 1=1
+                    """
+                    params.extend(busca_params)
+                else:
+                    sql = """
+                        SELECT p.*, proj.titulo as projeto_titulo 
+                        FROM producoes p
+                        LEFT JOIN projetos proj ON p.projeto_codigo = proj.codigo
+                        WHERE 1=1
+                    """
+                    
+                    # Termos curtos demais para o índice FULLTEXT
+                    if search:
+                        sql += " AND (p.titulo LIKE %s OR p.meio_divulgacao LIKE %s)"
+                        search_param = f"%{search}%"
+                        params.extend([search_param, search_param])
+                    
+                    for condicao, filtro_params in filtros:
+                        sql += f" AND {condicao}"
+                        params.extend(filtro_params)
                 
-                if ano:
-                    sql += " AND p.ano_publicacao = %s"
-                    params.append(ano)
+                if query:
+                    if cursor:
+                        relevancia, id_registro = decode_cursor(cursor, 2)
+                        sql += " AND (busca.relevancia < %s OR (busca.relevancia = %s AND p.id_registro > %s))"
+                        params.extend([relevancia, relevancia, id_registro])
+                    sql += " ORDER BY busca.relevancia DESC, p.id_registro"
+                    key = lambda p: (p['relevancia'], p['id_registro'])
+                else:
+                    if cursor:
+                        ano_cursor, titulo, id_registro = decode_cursor(cursor, 3)
+                        sql += """
+                            AND (p.ano_publicacao < %s OR (p.ano_publicacao = %s
+                                 AND (p.titulo > %s OR (p.titulo = %s AND p.id_registro > %s))))
+                        """
+                        params.extend([ano_cursor, ano_cursor, titulo, titulo, id_registro])
+                    sql += " ORDER BY p.ano_publicacao DESC, p.titulo, p.id_registro"
+                    key = lambda p: (p['ano_publicacao'], p['titulo'], p['id_registro'])
                 
-                sql += " ORDER BY p.ano_publicacao DESC, p.titulo"
+                if limit:
+                    sql += " LIMIT %s"
+                    params.append(limit + 1)
                 
-                await cursor.execute(sql, params)
-                producoes = await cursor.fetchall()
+                await cur.execute(sql, params)
+                producoes, truncada = pop_truncada(await cur.fetchall())
+                producoes, next_cursor = split_page(producoes, limit, key)
                 
-                # Buscar autores para cada produção
-                # Aqui e melhor fazer uma subquery ou join, mas para manter logica:
-                # Vamos ter que usar outra conexao ou cursor. 
-                # Como self.get_autores usa get_db_connection(), vai criar nova conexao pool.
-                # Isso e aceitavel dado o tamanho da aplicacao.
+                # Autores de todas as produções da página em lote, na mesma conexão
+                autores = await self.get_autores_batch(
+                    [producao['id_registro'] for producao in producoes], cur
+                )
                 for producao in producoes:
-                    producao['autores'] = await self.get_autores(producao['id_registro'])
+                    producao['autores'] = autores[producao['id_registro']]
                 
-                return producoes
+                return producoes, next_cursor, truncada
+    
+    def export(self, tipo: str = None, ano: int = None):
+        """Todas as produções em lotes, com os autores concatenados, para exportação em streaming"""
+        sql = """
+            SELECT p.*, proj.titulo as projeto_titulo,
+                   (SELECT GROUP_CONCAT(part.nome ORDER BY pa.ordem SEPARATOR '; ')
+                    FROM producoes_autores pa
+                    JOIN participantes part ON part.cpf = pa.participante_cpf
+                    WHERE pa.producao_id = p.id_registro) as autores
+            FROM producoes p
+            LEFT JOIN projetos proj ON p.projeto_codigo = proj.codigo
+            WHERE 1=1
+        """
+        params = []
+        if tipo:
+            sql += " AND p.tipo = %s"
+            params.append(tipo)
+        if ano:
+            sql += " AND p.ano_publicacao = %s"
+            params.append(ano)
+        sql += " ORDER BY p.ano_publicacao DESC, p.titulo, p.id_registro"
+        return stream_query(sql, params)
+    
+    async def bulk_create(self, producoes):
+        """Cria várias produções e seus autores em uma única transação (INSERTs multi-linha)"""
+        if not producoes:
+            return
+        async with transaction() as conn:
+            async with conn.cursor() as cursor:
+                escrita = await coautorias.iniciar_escrita(conn, "producoes", "producoes_autores")
+                sql = """
+                    INSERT INTO producoes 
+                    (id_registro, projeto_codigo, titulo, tipo, ano_publicacao, meio_divulgacao)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """
+                await cursor.executemany(sql, [
+                    (
+                        prod.id_registro, prod.projeto_codigo, prod.titulo,
+                        prod.tipo, prod.ano_publicacao, prod.meio_divulgacao
+                    )
+                    for prod in producoes
+                ])
+                sql = """
+                    INSERT INTO producoes_autores (producao_id, participante_cpf, ordem)
+                    VALUES (%s, %s, %s)
+                """
+                autores = [
+                    (prod.id_registro, autor.participante_cpf, autor.ordem)
+                    for prod in producoes for autor in prod.autores or []
+                ]
+                if autores:
+                    await cursor.executemany(sql, autores)
+                deltas = Deltas()
+                for prod in producoes:
+                    deltas.producao(_cpfs(prod.autores), prod.ano_publicacao, prod.tipo, 1)
+                await aplicar(conn, deltas)
+                await coautorias.concluir_escrita(conn, escrita)
+        anos_cache.invalidate()
+        ranking_cache.invalidate()
+        for prod in producoes:
+            coautorias.autores_alterados(escrita, (), _cpfs(prod.autores))
+    
+    async def get_existing_ids(self, ids):
+        """Retorna, dentre `ids`, os que já estão cadastrados"""
+        if not ids:
+            return set()
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                placeholders = ", ".join(["%s"] * len(ids))
+                await cursor.execute(
+                    f"SELECT id_registro FROM producoes WHERE id_registro IN ({placeholders})", list(ids)
+                )
+                return {row[0] for row in await cursor.fetchall()}
     
     async def get_by_id(self, id_registro: str):
         """Retorna uma produção específica com autores"""
         async with get_db_connection() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
-                sql = """
-                    SELECT p.*, proj.titulo as projeto_titulo 
-                    FROM producoes p
-                    LEFT JOIN projetos proj ON p.projeto_codigo = proj.codigo
-                    WHERE p.id_registro = %s
-                """
-                await cursor.execute(sql, (id_registro,))
-                producao = await cursor.fetchone()
-                
-                # Se achou, busca autores (nova conexao)
-                if producao:
-                    producao['autores'] = await self.get_autores(id_registro)
-                
-                return producao
+                return await self._fetch_by_id(cursor, id_registro)
+    
+    async def _fetch_by_id(self, cursor, id_registro: str):
+        """Lê a produção com autores usando o cursor (DictCursor) de quem chamou"""
+        sql = """
+            SELECT p.*, proj.titulo as projeto_titulo, proj.coordenador_cpf as projeto_coordenador_cpf
+            FROM producoes p
+            LEFT JOIN projetos proj ON p.projeto_codigo = proj.codigo
+            WHERE p.id_registro = %s
+        """
+        await cursor.execute(sql, (id_registro,))
+        producao = await cursor.fetchone()
+        
+        # Se achou, busca autores na mesma conexao
+        if producao:
+            autores = await self.get_autores_batch([producao['id_registro']], cursor)
+            producao['autores'] = autores[producao['id_registro']]
+        
+        return producao
     
     async def update(self, id_registro: str, prod: ProducaoCreate):
-        """Atualiza uma produção"""
-        async with get_db_connection() as conn:
-            async with conn.cursor() as cursor:
+        """Atualiza uma produção e substitui seus autores em uma única transação; retorna a produção gravada"""
+        async with transaction() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
                 sql = """
                     UPDATE producoes 
                     SET projeto_codigo = %s, titulo = %s, tipo = %s,
@@ -93,55 +244,111 @@ class ProducaoRepository:
                     prod.projeto_codigo, prod.titulo, prod.tipo,
                     prod.ano_publicacao, prod.meio_divulgacao, id_registro
                 )
+                escrita = await coautorias.iniciar_escrita(conn, "producoes", "producoes_autores")
+                atual = await self._get_atual(cursor, id_registro)
                 await cursor.execute(sql, values)
-                await conn.commit()
-                return await self.get_by_id(id_registro)
+                await cursor.execute("DELETE FROM producoes_autores WHERE producao_id = %s", (id_registro,))
+                await self._insert_autores(cursor, id_registro, prod.autores)
+                producao = await self._fetch_by_id(cursor, id_registro)
+                if producao:
+                    deltas = Deltas()
+                    deltas.producao(atual['autores'], atual['ano_publicacao'], atual['tipo'], -1)
+                    deltas.producao(_cpfs(prod.autores), prod.ano_publicacao, prod.tipo, 1)
+                    await aplicar(conn, deltas)
+                await coautorias.concluir_escrita(conn, escrita)
+        anos_cache.invalidate()
+        if producao:
+            ranking_cache.invalidate()
+            coautorias.autores_alterados(escrita, atual['autores'], _cpfs(prod.autores))
+        return producao
     
     async def delete(self, id_registro: str):
         """Deleta uma produção"""
-        async with get_db_connection() as conn:
-            async with conn.cursor() as cursor:
+        async with transaction() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                escrita = await coautorias.iniciar_escrita(conn, "producoes")
+                atual = await self._get_atual(cursor, id_registro)
                 await cursor.execute("DELETE FROM producoes WHERE id_registro = %s", (id_registro,))
-                await conn.commit()
-                return True
+                if atual:
+                    deltas = Deltas()
+                    deltas.producao(atual['autores'], atual['ano_publicacao'], atual['tipo'], -1)
+                    await aplicar(conn, deltas)
+                await coautorias.concluir_escrita(conn, escrita)
+        anos_cache.invalidate()
+        if atual:
+            ranking_cache.invalidate()
+            coautorias.autores_alterados(escrita, atual['autores'], ())
+        return True
     
     async def get_autores(self, producao_id: str):
         """Retorna os autores de uma produção ordenados"""
-        async with get_db_connection() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cursor:
-                sql = """
-                    SELECT part.cpf, part.nome, part.email, pa.ordem
-                    FROM participantes part
-                    JOIN producoes_autores pa ON part.cpf = pa.participante_cpf
-                    WHERE pa.producao_id = %s
-                    ORDER BY pa.ordem
-                """
-                await cursor.execute(sql, (producao_id,))
-                return await cursor.fetchall()
+        autores = await self.get_autores_batch([producao_id])
+        return autores[producao_id]
     
-    async def add_autor(self, producao_id: str, participante_cpf: str, ordem: int):
-        """Adiciona um autor a uma produção"""
-        async with get_db_connection() as conn:
-            async with conn.cursor() as cursor:
-                sql = """
-                    INSERT INTO producoes_autores (producao_id, participante_cpf, ordem)
-                    VALUES (%s, %s, %s)
-                """
-                await cursor.execute(sql, (producao_id, participante_cpf, ordem))
-                await conn.commit()
-                return True
+    async def get_autores_batch(self, producao_ids, cursor=None):
+        """Retorna os autores de várias produções, agrupados por producao_id e ordenados.
+
+        Faz uma query por bloco de AUTORES_BATCH_SIZE ids. Se `cursor` (DictCursor)
+        for informado, reaproveita a conexão de quem chamou.
+        """
+        ids = list(dict.fromkeys(producao_ids))
+        autores = {producao_id: [] for producao_id in ids}
+        if not ids:
+            return autores
+        
+        if cursor is None:
+            async with get_db_connection(read_only=True) as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cursor:
+                    return await self.get_autores_batch(ids, cursor)
+        
+        for inicio in range(0, len(ids), AUTORES_BATCH_SIZE):
+            bloco = ids[inicio:inicio + AUTORES_BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(bloco))
+            sql = f"""
+                SELECT pa.producao_id, part.cpf, part.nome, part.email, pa.ordem
+                FROM producoes_autores pa
+                JOIN participantes part ON part.cpf = pa.participante_cpf
+                WHERE pa.producao_id IN ({placeholders})
+                ORDER BY pa.producao_id, pa.ordem
+            """
+            await cursor.execute(sql, bloco)
+            for row in await cursor.fetchall():
+                producao_id = row.pop('producao_id')
+                autores.setdefault(producao_id, []).append(row)
+        
+        return autores
     
-    async def remove_autores(self, producao_id: str):
-        """Remove todos os autores de uma produção"""
-        async with get_db_connection() as conn:
-            async with conn.cursor() as cursor:
-                await cursor.execute("DELETE FROM producoes_autores WHERE producao_id = %s", (producao_id,))
-                await conn.commit()
-                return True
+    async def _get_atual(self, cursor, producao_id: str):
+        """Ano, tipo e CPFs dos autores de uma produção antes de alterá-la (None se não existir).
+
+        Usa o DictCursor de quem chamou e trava as linhas até o fim da transação.
+        """
+        await cursor.execute(
+            "SELECT ano_publicacao, tipo FROM producoes WHERE id_registro = %s FOR UPDATE", (producao_id,)
+        )
+        atual = await cursor.fetchone()
+        if atual:
+            await cursor.execute(
+                "SELECT participante_cpf FROM producoes_autores WHERE producao_id = %s FOR UPDATE", (producao_id,)
+            )
+            atual['autores'] = [row['participante_cpf'] for row in await cursor.fetchall()]
+        return atual
+    
+    async def _insert_autores(self, cursor, producao_id: str, autores):
+        """Insere os autores de uma produção com um único INSERT multi-linha"""
+        if not autores:
+            return
+        sql = """
+            INSERT INTO producoes_autores (producao_id, participante_cpf, ordem)
+            VALUES (%s, %s, %s)
+        """
+        await cursor.executemany(
+            sql, [(producao_id, autor.participante_cpf, autor.ordem) for autor in autores]
+        )
     
     async def get_by_ano(self, ano: int):
         """Retorna produções de um ano específico"""
-        async with get_db_connection() as conn:
+        async with get_db_connection(read_only=True) as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 sql = """
                     SELECT p.*, proj.titulo as projeto_titulo 
@@ -153,9 +360,11 @@ class ProducaoRepository:
                 await cursor.execute(sql, (ano,))
                 return await cursor.fetchall()
     
+    @cached(anos_cache)
+    @coalesce(anos_flight)
     async def get_anos(self):
         """Retorna lista de anos distintos"""
-        async with get_db_connection() as conn:
+        async with get_db_connection(read_only=True) as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
                     "SELECT DISTINCT ano_publicacao FROM producoes ORDER BY ano_publicacao DESC"
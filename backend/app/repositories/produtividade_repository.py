@@ -0,0 +1,207 @@
+from app.database import get_db_connection, transaction
+from app.cache import TTLCache, cached
+from app.singleflight import SingleFlight, coalesce
+import aiomysql
+
+# Contadores de produtividade por participante e ano (tabela produtividade,
+# migração 005). Os métodos de escrita de produções, projetos e financiamentos
+# acumulam as variações em um Deltas e as gravam com aplicar(), na mesma
+# transação da escrita. reconcile() corrige eventuais desvios em relação às
+# tabelas de origem; é um reparo sob demanda (python -m app.reconcile), não
+# roda sozinho.
+#
+# Produções contam para cada autor no ano de publicação. Projetos e valor
+# alocado contam para o coordenador: o projeto no ano de início, cada alocação
+# no ano de data_alocacao.
+
+# Coluna de cada tipo de produção (outros tipos entram só no total)
+COLUNAS_TIPO = {
+    "ARTIGO": "artigos",
+    "LIVRO": "livros",
+    "CAPITULO": "capitulos",
+    "TRABALHO": "trabalhos",
+    "RESUMO": "resumos",
+}
+METRICAS = ("producoes", *COLUNAS_TIPO.values(), "projetos_coordenados", "valor_alocado")
+
+# Linhas por INSERT multi-linha
+UPSERT_BATCH_SIZE = 500
+
+ranking_cache = TTLCache("produtividade.ranking")
+ranking_flight = SingleFlight("produtividade.ranking")
+
+ALOCACOES_SQL = """
+    SELECT p.coordenador_cpf, COALESCE(YEAR(pf.data_alocacao), YEAR(p.data_inicio)) as ano,
+           SUM(pf.valor_alocado) as valor
+    FROM projetos_financiamentos pf
+    JOIN projetos p ON p.codigo = pf.projeto_codigo
+    WHERE {filtro}
+    GROUP BY p.coordenador_cpf, ano
+"""
+
+class Deltas:
+    """Variações dos contadores por (cpf, ano), gravadas de uma vez por aplicar()"""
+
+    def __init__(self):
+        self.linhas = {}
+
+    def add(self, cpf: str, ano: int, metrica: str, valor):
+        linha = self.linhas.get((cpf, ano))
+        if linha is None:
+            linha = self.linhas[(cpf, ano)] = dict.fromkeys(METRICAS, 0)
+        linha[metrica] += valor
+
+    def producao(self, cpfs, ano: int, tipo: str, sinal: int):
+        """Uma produção (ano, tipo) ganha (+1) ou perde (-1) os autores `cpfs`"""
+        coluna = COLUNAS_TIPO.get(tipo)
+        for cpf in set(cpfs):
+            self.add(cpf, ano, "producoes", sinal)
+            if coluna:
+                self.add(cpf, ano, coluna, sinal)
+
+    def projeto(self, coordenador_cpf: str, data_inicio, sinal: int):
+        self.add(coordenador_cpf, data_inicio.year, "projetos_coordenados", sinal)
+
+    async def alocacoes(self, conn, filtro: str, params, sinal: int):
+        """Soma (ou subtrai) o valor alocado das linhas de projetos_financiamentos que passam no filtro"""
+        async with conn.cursor() as cursor:
+            await cursor.execute(ALOCACOES_SQL.format(filtro=filtro), params)
+            for coordenador_cpf, ano, valor in await cursor.fetchall():
+                self.add(coordenador_cpf, ano, "valor_alocado", sinal * valor)
+
+async def aplicar(conn, deltas: Deltas):
+    """Grava as variações com INSERT ... ON DUPLICATE KEY UPDATE (na transação de quem chamou)"""
+    linhas = [
+        (cpf, ano, *(valores[m] for m in METRICAS))
+        for (cpf, ano), valores in deltas.linhas.items()
+        if any(valores.values())
+    ]
+    if not linhas:
+        return
+    colunas = ", ".join(METRICAS)
+    placeholders = "(" + ", ".join(["%s"] * (len(METRICAS) + 2)) + ")"
+    atualizacoes = ", ".join(f"{m} = produtividade.{m} + novo.{m}" for m in METRICAS)
+    async with conn.cursor() as cursor:
+        for inicio in range(0, len(linhas), UPSERT_BATCH_SIZE):
+            bloco = linhas[inicio:inicio + UPSERT_BATCH_SIZE]
+            await cursor.execute(
+                f"""
+                INSERT INTO produtividade (participante_cpf, ano, {colunas})
+                VALUES {", ".join([placeholders] * len(bloco))} AS novo
+                ON DUPLICATE KEY UPDATE {atualizacoes}
+                """,
+                [valor for linha in bloco for valor in linha]
+            )
+
+# Valores calculados das tabelas de origem menos os contadores, só onde diferem
+_ZEROS_TIPOS = ", ".join("0" for _ in COLUNAS_TIPO)
+DESVIOS_SQL = f"""
+    SELECT cpf, ano, {", ".join(f"SUM({m}) as {m}" for m in METRICAS)}
+    FROM (
+        SELECT pa.participante_cpf as cpf, p.ano_publicacao as ano, COUNT(*) as producoes,
+               {", ".join(f"SUM(p.tipo = '{tipo}') as {coluna}" for tipo, coluna in COLUNAS_TIPO.items())},
+               0 as projetos_coordenados, 0 as valor_alocado
+        FROM producoes_autores pa
+        JOIN producoes p ON p.id_registro = pa.producao_id
+        GROUP BY pa.participante_cpf, p.ano_publicacao
+        UNION ALL
+        SELECT coordenador_cpf, YEAR(data_inicio), 0, {_ZEROS_TIPOS}, COUNT(*), 0
+        FROM projetos
+        GROUP BY coordenador_cpf, YEAR(data_inicio)
+        UNION ALL
+        SELECT p.coordenador_cpf, COALESCE(YEAR(pf.data_alocacao), YEAR(p.data_inicio)),
+               0, {_ZEROS_TIPOS}, 0, SUM(pf.valor_alocado)
+        FROM projetos_financiamentos pf
+        JOIN projetos p ON p.codigo = pf.projeto_codigo
+        GROUP BY 1, 2
+        UNION ALL
+        SELECT participante_cpf, ano, {", ".join(f"-{m}" for m in METRICAS)}
+        FROM produtividade
+    ) contagens
+    GROUP BY cpf, ano
+    HAVING {" OR ".join(f"SUM({m}) <> 0" for m in METRICAS)}
+"""
+
+class ProdutividadeRepository:
+    @cached(ranking_cache)
+    @coalesce(ranking_flight)
+    async def ranking(self, metrica: str, ano_inicio: int = None, ano_fim: int = None,
+                      tipo: str = None, limit: int = 10):
+        """Top `limit` participantes pela soma de `metrica` nos anos pedidos, com todas as métricas"""
+        if metrica not in METRICAS:
+            raise ValueError(f"Métrica inválida: {metrica}")
+        somas = ", ".join(f"SUM(pr.{m}) as {m}" for m in METRICAS)
+        sql = f"""
+            SELECT part.cpf, part.nome, part.tipo, {somas}
+            FROM produtividade pr
+            JOIN participantes part ON part.cpf = pr.participante_cpf
+            WHERE 1=1
+        """
+        params = []
+        if ano_inicio is not None:
+            sql += " AND pr.ano >= %s"
+            params.append(ano_inicio)
+        if ano_fim is not None:
+            sql += " AND pr.ano <= %s"
+            params.append(ano_fim)
+        if tipo:
+            sql += " AND part.tipo = %s"
+            params.append(tipo)
+        sql += f"""
+            GROUP BY part.cpf, part.nome, part.tipo
+            HAVING {metrica} > 0
+            ORDER BY {metrica} DESC, part.nome, part.cpf
+            LIMIT %s
+        """
+        params.append(limit)
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(sql, params)
+                ranking = await cursor.fetchall()
+        for posicao, linha in enumerate(ranking, start=1):
+            linha['posicao'] = posicao
+            for m in METRICAS:
+                linha[m] = float(linha[m]) if m == "valor_alocado" else int(linha[m])
+        return ranking
+
+    async def get_by_participante(self, cpf: str):
+        """Contadores de um participante, ano a ano (mais recente primeiro)"""
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(
+                    f"""
+                    SELECT ano, {", ".join(METRICAS)}
+                    FROM produtividade
+                    WHERE participante_cpf = %s
+                    ORDER BY ano DESC
+                    """,
+                    (cpf,)
+                )
+                return await cursor.fetchall()
+
+    async def reconcile(self):
+        """Corrige desvios dos contadores em relação às tabelas de origem; retorna as linhas corrigidas.
+
+        Tabelas de origem e contadores são lidos no mesmo snapshot (leitura
+        consistente, sem travar linhas) e só a diferença é somada, com
+        aplicar(). Como toda escrita muda origem e contadores na mesma
+        transação, a correção continua válida com escritas concorrentes.
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+                try:
+                    await cursor.execute(DESVIOS_SQL)
+                    desvios = await cursor.fetchall()
+                finally:
+                    await conn.commit()
+        if not desvios:
+            return 0
+        deltas = Deltas()
+        for cpf, ano, *valores in desvios:
+            for metrica, valor in zip(METRICAS, valores):
+                deltas.add(cpf, ano, metrica, valor)
+        async with transaction() as conn:
+            await aplicar(conn, deltas)
+        ranking_cache.invalidate()
+        return len(desvios)
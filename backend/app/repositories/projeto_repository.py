@@ -1,11 +1,27 @@
-from app.database import get_db_connection
+from app.database import get_db_connection, transaction
 from app.schemas import ProjetoCreate
+from app.pagination import decode_cursor, page_limit, split_page
+from app.search import PREFIX_MATCH_SCORE, fulltext_query, like_prefix, pop_truncada, ranked_matches
+from app.export import stream_query
+from app.repositories.relatorio_repository import relatorios_cache
+from app.coautoria import coautorias
+from app.repositories.produtividade_repository import Deltas, aplicar, ranking_cache
 import aiomysql
+import asyncio
+
+PROJETO_SQL = """
+    SELECT p.*, part.nome as coordenador_nome 
+    FROM projetos p
+    INNER JOIN participantes part ON p.coordenador_cpf = part.cpf
+    WHERE p.codigo = %s
+"""
 
 class ProjetoRepository:
     async def create(self, projeto: ProjetoCreate):
-        async with get_db_connection() as conn:
-            async with conn.cursor() as cursor:
+        """Cria o projeto e retorna a linha gravada (lida na mesma transação)"""
+        async with transaction() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                escrita = await coautorias.iniciar_escrita(conn, "projetos")
                 sql = """
                     INSERT INTO projetos 
                     (codigo, titulo, descricao, data_inicio, data_termino, situacao, coordenador_cpf)
@@ -21,83 +37,192 @@ class ProjetoRepository:
                     projeto.coordenador_cpf
                 )
                 await cursor.execute(sql, values)
-                await conn.commit()
-                return projeto
+                deltas = Deltas()
+                deltas.projeto(projeto.coordenador_cpf, projeto.data_inicio, 1)
+                await aplicar(conn, deltas)
+                await coautorias.concluir_escrita(conn, escrita)
+                await cursor.execute(PROJETO_SQL, (projeto.codigo,))
+                criado = await cursor.fetchone()
+        ranking_cache.invalidate()
+        # Não muda o grafo, mas muda a versão de projetos
+        coautorias.escrita_aplicada(escrita)
+        return criado
 
-    async def list_all(self, search: str = None, situacao: str = None):
-        """Lista todos os projetos com filtros opcionais"""
-        async with get_db_connection() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cursor:
-                sql = """
-                    SELECT p.*, part.nome as coordenador_nome 
-                    FROM projetos p
-                    INNER JOIN participantes part ON p.coordenador_cpf = part.cpf
-                    WHERE 1=1
-                """
+    async def list_all(self, search: str = None, situacao: str = None, limit: int = None, cursor: str = None):
+        """Lista os projetos com filtros opcionais, paginando por (data_inicio, codigo).
+
+        Com `search`, usa a busca FULLTEXT e ordena por relevância (paginando por
+        (relevancia, codigo)). Retorna (projetos, next_cursor, truncada); ver
+        app.search para o limite de resultados da busca.
+        """
+        limit = page_limit(limit, cursor)
+        query = fulltext_query(search) if search else None
+        filtros = []
+        if situacao:
+            filtros.append(("p.situacao = %s", [situacao]))
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
                 params = []
                 
-                if search:
-                    sql += " AND (p.titulo LIKE %s OR p.codigo LIKE %s OR part.nome LIKE %s)"
-                    search_param = f"%{search}%"
-                    params.extend([search_param, search_param, search_param])
+                if query:
+                    busca_sql, busca_params = ranked_matches([
+                        ("""
+                            SELECT p.codigo AS chave, MATCH(p.titulo, p.descricao) AGAINST (%s IN BOOLEAN MODE) AS score
+                            FROM projetos p
+                            WHERE MATCH(p.titulo, p.descricao) AGAINST (%s IN BOOLEAN MODE)
+                        """, [query, query]),
+                        ("""
+                            SELECT p.codigo AS chave, %s AS score
+                            FROM projetos p
+                            WHERE p.codigo LIKE %s
+                        """, [PREFIX_MATCH_SCORE, like_prefix(search)]),
+                        ("""
+                            SELECT p.codigo AS chave, MATCH(pt.nome, pt.email) AGAINST (%s IN BOOLEAN MODE) AS score
+                            FROM participantes pt
+                            JOIN projetos p ON p.coordenador_cpf = pt.cpf
+                            WHERE MATCH(pt.nome, pt.email) AGAINST (%s IN BOOLEAN MODE)
+                        """, [query, query]),
+                    ], filtros)
+                    sql = f"""
+                        SELECT p.*, part.nome as coordenador_nome, busca.relevancia, busca.busca_truncada
+                        FROM ({busca_sql}) busca
+                        INNER JOIN projetos p ON p.codigo = busca.chave
+                        INNER JOIN participantes part ON p.coordenador_cpf = part.cpf
+                        WHERE 1=1
+                    """
+                    params.extend(busca_params)
+                else:
+                    sql = """
+                        SELECT p.*, part.nome as coordenador_nome 
+                        FROM projetos p
+                        INNER JOIN participantes part ON p.coordenador_cpf = part.cpf
+                        WHERE 1=1
+                    """
+                    
+                    # Termos curtos demais para o índice FULLTEXT
+                    if search:
+                        sql += " AND (p.titulo LIKE %s OR p.codigo LIKE %s OR part.nome LIKE %s)"
+                        search_param = f"%{search}%"
+                        params.extend([search_param, search_param, search_param])
+                    
+                    for condicao, filtro_params in filtros:
+                        sql += f" AND {condicao}"
+                        params.extend(filtro_params)
                 
-                if situacao:
-                    sql += " AND p.situacao = %s"
-                    params.append(situacao)
+                if query:
+                    if cursor:
+                        relevancia, codigo = decode_cursor(cursor, 2)
+                        sql += " AND (busca.relevancia < %s OR (busca.relevancia = %s AND p.codigo > %s))"
+                        params.extend([relevancia, relevancia, codigo])
+                    sql += " ORDER BY busca.relevancia DESC, p.codigo"
+                    key = lambda p: (p['relevancia'], p['codigo'])
+                else:
+                    if cursor:
+                        data_inicio, codigo = decode_cursor(cursor, 2)
+                        sql += " AND (p.data_inicio < %s OR (p.data_inicio = %s AND p.codigo < %s))"
+                        params.extend([data_inicio, data_inicio, codigo])
+                    sql += " ORDER BY p.data_inicio DESC, p.codigo DESC"
+                    key = lambda p: (p['data_inicio'], p['codigo'])
                 
-                sql += " ORDER BY p.data_inicio DESC"
+                if limit:
+                    sql += " LIMIT %s"
+                    params.append(limit + 1)
                 
-                await cursor.execute(sql, params)
-                result = await cursor.fetchall()
-                return result
+                await cur.execute(sql, params)
+                result, truncada = pop_truncada(await cur.fetchall())
+                return (*split_page(result, limit, key), truncada)
+
+    def export(self, situacao: str = None):
+        """Todos os projetos em lotes, para exportação em streaming (ver app.export)"""
+        sql = """
+            SELECT p.*, part.nome as coordenador_nome 
+            FROM projetos p
+            INNER JOIN participantes part ON p.coordenador_cpf = part.cpf
+        """
+        params = []
+        if situacao:
+            sql += " WHERE p.situacao = %s"
+            params.append(situacao)
+        sql += " ORDER BY p.data_inicio DESC, p.codigo DESC"
+        return stream_query(sql, params)
             
     async def get_by_codigo(self, codigo: str):
         async with get_db_connection() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
-                sql = """
-                    SELECT p.*, part.nome as coordenador_nome 
-                    FROM projetos p
-                    INNER JOIN participantes part ON p.coordenador_cpf = part.cpf
-                    WHERE p.codigo = %s
-                """
-                await cursor.execute(sql, (codigo,))
+                await cursor.execute(PROJETO_SQL, (codigo,))
                 result = await cursor.fetchone()
                 return result
 
+    async def get_existing_codigos(self, codigos):
+        """Retorna, dentre `codigos`, os de projetos cadastrados"""
+        if not codigos:
+            return set()
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                placeholders = ", ".join(["%s"] * len(codigos))
+                await cursor.execute(
+                    f"SELECT codigo FROM projetos WHERE codigo IN ({placeholders})", list(codigos)
+                )
+                return {row[0] for row in await cursor.fetchall()}
+
     async def get_details(self, codigo: str):
-        projeto = await self.get_by_codigo(codigo)
+        """Retorna o projeto com participantes e financiamentos.
+
+        As três queries rodam em paralelo, cada uma em uma conexão do pool.
+        """
+        projeto, participantes, financiamentos = await asyncio.gather(
+            self.get_by_codigo(codigo),
+            self.get_participantes(codigo),
+            self.get_financiamentos(codigo),
+        )
         if not projeto:
             return None
 
-        # Usar nova conexao para detalhes (necessario pois get_by_codigo ja fechou a sua)
-        async with get_db_connection() as conn:
+        projeto['participantes'] = participantes
+        projeto['financiamentos'] = financiamentos
+        return projeto
+
+    async def get_participantes(self, codigo: str):
+        """Retorna os participantes vinculados a um projeto"""
+        async with get_db_connection(read_only=True) as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
-                # Buscar participantes do projeto
-                sql_part = """
+                sql = """
                     SELECT p.nome, p.cpf, p.email, p.tipo, pp.funcao, pp.data_entrada, pp.data_saida
                     FROM participantes p
                     JOIN participantes_projetos pp ON p.cpf = pp.participante_cpf
                     WHERE pp.projeto_codigo = %s
                 """
-                await cursor.execute(sql_part, (codigo,))
-                projeto['participantes'] = await cursor.fetchall()
-                
-                # Buscar financiamentos
-                sql_fin = """
+                await cursor.execute(sql, (codigo,))
+                return await cursor.fetchall()
+
+    async def get_financiamentos(self, codigo: str):
+        """Retorna os financiamentos vinculados a um projeto, com o valor alocado"""
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                sql = """
                     SELECT f.codigo_processo, f.agencia_sigla, f.tipo_fomento, f.valor_total, pf.valor_alocado
                     FROM financiamentos f
                     JOIN projetos_financiamentos pf ON f.codigo_processo = pf.financiamento_codigo
                     WHERE pf.projeto_codigo = %s
                 """
-                await cursor.execute(sql_fin, (codigo,))
-                projeto['financiamentos'] = await cursor.fetchall()
-
-        return projeto
+                await cursor.execute(sql, (codigo,))
+                return await cursor.fetchall()
     
     async def update(self, codigo: str, projeto: ProjetoCreate):
-        """Atualiza um projeto existente"""
-        async with get_db_connection() as conn:
-            async with conn.cursor() as cursor:
+        """Atualiza um projeto existente e retorna a linha atualizada (lida na mesma transação)"""
+        async with transaction() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                escrita = await coautorias.iniciar_escrita(conn, "projetos")
+                await cursor.execute(
+                    "SELECT coordenador_cpf, data_inicio FROM projetos WHERE codigo = %s FOR UPDATE", (codigo,)
+                )
+                atual = await cursor.fetchone()
+                # Projeto e valor alocado saem do coordenador/ano antigos e entram nos novos
+                deltas = Deltas()
+                if atual and (atual['coordenador_cpf'], atual['data_inicio'].year) != (projeto.coordenador_cpf, projeto.data_inicio.year):
+                    deltas.projeto(atual['coordenador_cpf'], atual['data_inicio'], -1)
+                    deltas.projeto(projeto.coordenador_cpf, projeto.data_inicio, 1)
+                    await deltas.alocacoes(conn, "pf.projeto_codigo = %s", (codigo,), -1)
                 sql = """
                     UPDATE projetos 
                     SET titulo = %s, descricao = %s, data_inicio = %s, 
@@ -114,33 +239,67 @@ class ProjetoRepository:
                     codigo
                 )
                 await cursor.execute(sql, values)
-                await conn.commit()
-                return await self.get_by_codigo(codigo)
+                if deltas.linhas:
+                    await deltas.alocacoes(conn, "pf.projeto_codigo = %s", (codigo,), 1)
+                    await aplicar(conn, deltas)
+                await coautorias.concluir_escrita(conn, escrita)
+                await cursor.execute(PROJETO_SQL, (codigo,))
+                atualizado = await cursor.fetchone()
+        relatorios_cache.invalidate()
+        ranking_cache.invalidate()
+        coautorias.escrita_aplicada(escrita)
+        return atualizado
     
     async def delete(self, codigo: str):
         """Deleta um projeto"""
-        async with get_db_connection() as conn:
+        async with transaction() as conn:
             async with conn.cursor() as cursor:
+                # participantes_projetos é apagada em cascata (sem trigger)
+                escrita = await coautorias.iniciar_escrita(conn, "projetos")
+                membros = await self._get_membros_cpfs(cursor, codigo)
+                await cursor.execute(
+                    "SELECT coordenador_cpf, data_inicio FROM projetos WHERE codigo = %s FOR UPDATE", (codigo,)
+                )
+                atual = await cursor.fetchone()
+                deltas = Deltas()
+                if atual:
+                    deltas.projeto(atual[0], atual[1], -1)
+                    # As alocações são apagadas em cascata
+                    await deltas.alocacoes(conn, "pf.projeto_codigo = %s", (codigo,), -1)
                 await cursor.execute("DELETE FROM projetos WHERE codigo = %s", (codigo,))
-                await conn.commit()
-                return True
+                await aplicar(conn, deltas)
+                await coautorias.concluir_escrita(conn, escrita)
+        relatorios_cache.invalidate()
+        ranking_cache.invalidate()
+        coautorias.projeto_removido(escrita, membros)
+        return True
     
     async def add_participante(self, projeto_codigo: str, participante_cpf: str, funcao: str, data_entrada: str, data_saida: str = None):
         """Vincula um participante a um projeto"""
-        async with get_db_connection() as conn:
+        async with transaction() as conn:
             async with conn.cursor() as cursor:
+                escrita = await coautorias.iniciar_escrita(conn, "participantes_projetos")
+                membros = await self._get_membros_cpfs(cursor, projeto_codigo)
                 sql = """
                     INSERT INTO participantes_projetos 
                     (projeto_codigo, participante_cpf, funcao, data_entrada, data_saida)
                     VALUES (%s, %s, %s, %s, %s)
                 """
                 await cursor.execute(sql, (projeto_codigo, participante_cpf, funcao, data_entrada, data_saida))
-                await conn.commit()
-                return True
+                await coautorias.concluir_escrita(conn, escrita)
+        coautorias.membro_adicionado(escrita, membros, participante_cpf)
+        return True
+    
+    async def _get_membros_cpfs(self, cursor, codigo: str):
+        """CPFs dos participantes vinculados ao projeto (antes da alteração), no cursor de quem chamou"""
+        await cursor.execute(
+            "SELECT participante_cpf FROM participantes_projetos WHERE projeto_codigo = %s FOR UPDATE", (codigo,)
+        )
+        return [row[0] for row in await cursor.fetchall()]
     
     async def add_financiamento(self, projeto_codigo: str, financiamento_codigo: str, valor_alocado: float):
         """Vincula um financiamento a um projeto"""
-        async with get_db_connection() as conn:
+        async with transaction() as conn:
             async with conn.cursor() as cursor:
                 sql = """
                     INSERT INTO projetos_financiamentos 
@@ -148,12 +307,20 @@ class ProjetoRepository:
                     VALUES (%s, %s, %s)
                 """
                 await cursor.execute(sql, (projeto_codigo, financiamento_codigo, valor_alocado))
-                await conn.commit()
-                return True
+                # Lido do banco: o ano vem de data_alocacao (DEFAULT CURRENT_DATE)
+                deltas = Deltas()
+                await deltas.alocacoes(
+                    conn, "pf.projeto_codigo = %s AND pf.financiamento_codigo = %s",
+                    (projeto_codigo, financiamento_codigo), 1
+                )
+                await aplicar(conn, deltas)
+        relatorios_cache.invalidate()
+        ranking_cache.invalidate()
+        return True
     
     async def get_by_coordenador(self, coordenador_cpf: str):
         """Retorna todos os projetos de um coordenador"""
-        async with get_db_connection() as conn:
+        async with get_db_connection(read_only=True) as conn:
             async with conn.cursor(aiomysql.DictCursor) as cursor:
                 sql = """
                     SELECT p.*, part.nome as coordenador_nome 
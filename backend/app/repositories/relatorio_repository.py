@@ -0,0 +1,162 @@
+from app.database import get_db_connection
+from app.cache import TTLCache, cached
+from app.singleflight import SingleFlight, coalesce
+from datetime import date
+import aiomysql
+
+# Relatórios financeiros agregados no banco, cada um em uma única query com
+# GROUP BY ... WITH ROLLUP (as linhas de subtotal e total geral vêm junto com
+# as de detalhe e são identificadas com GROUPING()). Os resultados ficam em
+# cache por combinação de filtros; as escritas em financiamentos, agências,
+# projetos e alocações invalidam o cache.
+
+relatorios_cache = TTLCache("consultas.relatorios")
+relatorios_flight = SingleFlight("consultas.relatorios")
+
+def _filtros_financiamento(agencia_sigla=None, tipo_fomento=None, ano_inicio=None, ano_fim=None):
+    """Condições (sargáveis) sobre financiamentos f; retorna (sql, params)"""
+    sql, params = "", []
+    if agencia_sigla:
+        sql += " AND f.agencia_sigla = %s"
+        params.append(agencia_sigla)
+    if tipo_fomento:
+        sql += " AND f.tipo_fomento = %s"
+        params.append(tipo_fomento)
+    if ano_inicio:
+        sql += " AND f.data_inicio >= %s"
+        params.append(date(ano_inicio, 1, 1))
+    if ano_fim:
+        sql += " AND f.data_inicio < %s"
+        params.append(date(ano_fim + 1, 1, 1))
+    return sql, params
+
+def _valores(row):
+    """Totais de uma linha agregada, com DECIMAL convertido para float"""
+    return {
+        'num_financiamentos': row['num_financiamentos'],
+        'valor_total': float(row['valor_total'] or 0),
+        'valor_alocado': float(row['valor_alocado'] or 0),
+        'saldo_nao_alocado': float(row['saldo_nao_alocado'] or 0),
+    }
+
+class RelatorioRepository:
+    @cached(relatorios_cache)
+    @coalesce(relatorios_flight)
+    async def get_financiamentos_agregados(self, agencia_sigla: str = None, tipo_fomento: str = None,
+                                           ano_inicio: int = None, ano_fim: int = None):
+        """Totais por agência > ano de início > tipo de fomento, com valor alocado e saldo.
+
+        Retorna {'total': {...}, 'agencias': [{..., 'anos': [{..., 'tipos': [...]}]}]}.
+        """
+        filtros_sql, params = _filtros_financiamento(agencia_sigla, tipo_fomento, ano_inicio, ano_fim)
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                sql = f"""
+                    SELECT agencia_sigla, ano, tipo_fomento,
+                           ANY_VALUE(agencia_nome) as agencia_nome,
+                           GROUPING(agencia_sigla) as g_agencia,
+                           GROUPING(ano) as g_ano,
+                           GROUPING(tipo_fomento) as g_tipo,
+                           COUNT(*) as num_financiamentos,
+                           SUM(valor_total) as valor_total,
+                           SUM(valor_alocado) as valor_alocado,
+                           SUM(valor_total - valor_alocado) as saldo_nao_alocado
+                    FROM (
+                        SELECT f.agencia_sigla, a.nome as agencia_nome,
+                               YEAR(f.data_inicio) as ano, f.tipo_fomento, f.valor_total,
+                               COALESCE(alocacoes.valor_alocado, 0) as valor_alocado
+                        FROM financiamentos f
+                        INNER JOIN agencias a ON a.sigla = f.agencia_sigla
+                        LEFT JOIN (
+                            SELECT financiamento_codigo, SUM(valor_alocado) as valor_alocado
+                            FROM projetos_financiamentos
+                            GROUP BY financiamento_codigo
+                        ) alocacoes ON alocacoes.financiamento_codigo = f.codigo_processo
+                        WHERE 1=1 {filtros_sql}
+                    ) base
+                    GROUP BY agencia_sigla, ano, tipo_fomento WITH ROLLUP
+                """
+                await cursor.execute(sql, params)
+                rows = await cursor.fetchall()
+
+        total = {'num_financiamentos': 0, 'valor_total': 0.0, 'valor_alocado': 0.0, 'saldo_nao_alocado': 0.0}
+        agencias = {}
+        for row in rows:
+            if row['g_agencia']:
+                total = _valores(row)
+                continue
+            agencia = agencias.setdefault(row['agencia_sigla'], {
+                'agencia_sigla': row['agencia_sigla'], 'agencia_nome': row['agencia_nome'], 'anos': {}
+            })
+            if row['g_ano']:
+                agencia.update(_valores(row))
+                continue
+            ano = agencia['anos'].setdefault(row['ano'], {'ano': row['ano'], 'tipos': []})
+            if row['g_tipo']:
+                ano.update(_valores(row))
+            else:
+                ano['tipos'].append({'tipo_fomento': row['tipo_fomento'], **_valores(row)})
+
+        for agencia in agencias.values():
+            agencia['anos'] = sorted(agencia['anos'].values(), key=lambda a: a['ano'], reverse=True)
+        return {
+            'total': total,
+            'agencias': sorted(agencias.values(), key=lambda a: a['valor_total'], reverse=True),
+        }
+
+    @cached(relatorios_cache)
+    @coalesce(relatorios_flight)
+    async def get_alocacoes_por_projeto(self, agencia_sigla: str = None, ano_inicio: int = None, ano_fim: int = None):
+        """Valor alocado por projeto > agência (com subtotal por projeto e total geral).
+
+        Retorna {'total': {...}, 'projetos': [{..., 'agencias': [...]}]}.
+        """
+        filtros_sql, params = _filtros_financiamento(agencia_sigla, None, ano_inicio, ano_fim)
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                sql = f"""
+                    SELECT projeto_codigo, agencia_sigla,
+                           ANY_VALUE(projeto_titulo) as projeto_titulo,
+                           ANY_VALUE(situacao) as situacao,
+                           GROUPING(projeto_codigo) as g_projeto,
+                           GROUPING(agencia_sigla) as g_agencia,
+                           COUNT(*) as num_financiamentos,
+                           SUM(valor_alocado) as valor_alocado
+                    FROM (
+                        SELECT pf.projeto_codigo, p.titulo as projeto_titulo, p.situacao,
+                               f.agencia_sigla, pf.valor_alocado
+                        FROM projetos_financiamentos pf
+                        INNER JOIN financiamentos f ON f.codigo_processo = pf.financiamento_codigo
+                        INNER JOIN projetos p ON p.codigo = pf.projeto_codigo
+                        WHERE 1=1 {filtros_sql}
+                    ) base
+                    GROUP BY projeto_codigo, agencia_sigla WITH ROLLUP
+                """
+                await cursor.execute(sql, params)
+                rows = await cursor.fetchall()
+
+        total = {'num_financiamentos': 0, 'valor_alocado': 0.0}
+        projetos = {}
+        for row in rows:
+            valores = {
+                'num_financiamentos': row['num_financiamentos'],
+                'valor_alocado': float(row['valor_alocado'] or 0),
+            }
+            if row['g_projeto']:
+                total = valores
+                continue
+            projeto = projetos.setdefault(row['projeto_codigo'], {
+                'projeto_codigo': row['projeto_codigo'],
+                'projeto_titulo': row['projeto_titulo'],
+                'situacao': row['situacao'],
+                'agencias': [],
+            })
+            if row['g_agencia']:
+                projeto.update(valores)
+            else:
+                projeto['agencias'].append({'agencia_sigla': row['agencia_sigla'], **valores})
+
+        return {
+            'total': total,
+            'projetos': sorted(projetos.values(), key=lambda p: p['valor_alocado'], reverse=True),
+        }
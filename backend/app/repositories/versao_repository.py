@@ -0,0 +1,50 @@
+from app.database import get_db_connection
+from app.singleflight import SingleFlight, coalesce
+import aiomysql
+
+# Clientes fazendo polling revalidam todos ao mesmo tempo
+versoes_flight = SingleFlight("versoes")
+
+class VersaoRepository:
+    @coalesce(versoes_flight)
+    async def get_versoes(self, tabelas: tuple):
+        """Retorna {tabela: (versao, atualizado_em em epoch)} das tabelas pedidas (versoes_tabelas)"""
+        placeholders = ", ".join(["%s"] * len(tabelas))
+        async with get_db_connection(read_only=True) as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                try:
+                    await cursor.execute(
+                        f"""
+                        SELECT tabela, versao, UNIX_TIMESTAMP(atualizado_em) as atualizado_em
+                        FROM versoes_tabelas
+                        WHERE tabela IN ({placeholders})
+                        """,
+                        list(tabelas)
+                    )
+                except aiomysql.ProgrammingError:
+                    # Banco sem a migração 004: respostas sem ETag
+                    return {}
+                rows = await cursor.fetchall()
+        return {row['tabela']: (row['versao'], int(row['atualizado_em'])) for row in rows}
+
+    async def get_versoes_na_transacao(self, conn, tabelas: tuple, travar: bool = False):
+        """Retorna {tabela: versao} lido na transação de quem chamou.
+
+        Com travar=True as linhas ficam travadas até o commit: nenhuma outra
+        escrita nessas tabelas muda as versões até lá.
+        """
+        placeholders = ", ".join(["%s"] * len(tabelas))
+        async with conn.cursor() as cursor:
+            try:
+                await cursor.execute(
+                    f"""
+                    SELECT tabela, versao FROM versoes_tabelas
+                    WHERE tabela IN ({placeholders})
+                    ORDER BY tabela
+                    {"FOR UPDATE" if travar else ""}
+                    """,
+                    list(tabelas)
+                )
+            except aiomysql.ProgrammingError:
+                return {}
+            return dict(await cursor.fetchall())
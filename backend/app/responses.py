@@ -0,0 +1,39 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+# Serialização JSON rápida para os endpoints sem response_model (dashboard,
+# consultas, relatórios). Nesses o FastAPI passa o resultado inteiro pelo
+# jsonable_encoder antes do json.dumps, o que custa mais que a própria query em
+# listas grandes; devolvendo json_response(...) o orjson serializa as linhas
+# do banco direto (date/datetime nativos, Decimal abaixo).
+#
+# Endpoints com response_model não precisam disso: o FastAPI já valida e gera
+# o JSON em bytes pelo pydantic-core, e trocar a classe de resposta padrão
+# desativaria esse caminho.
+
+def _default(value):
+    """Tipos que o orjson não serializa, no mesmo formato do jsonable_encoder"""
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Tipo não serializável em JSON: {type(value).__name__}")
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+def json_response(content, response: Response = None):
+    """ORJSONResponse com o conteúdo; copia os headers definidos em `response` (ex: ETag)"""
+    resposta = ORJSONResponse(content)
+    if response is not None:
+        resposta.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers if name != b"content-length"
+        )
+    return resposta
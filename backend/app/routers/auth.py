@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, EmailStr
 from app.repositories.participante_repostory import ParticipanteRepository
-from app.security import verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.security import verify_password, create_access_token, revoke_token, security, ACCESS_TOKEN_EXPIRE_MINUTES
+from fastapi.security import HTTPAuthorizationCredentials
 from app.schemas import ParticipanteCreate, TipoParticipante
 from datetime import timedelta
 
@@ -64,6 +65,8 @@ async def register(form_data: SimpleRegisterRequest):
             "user_type": "Discente",
             "user_cpf": temp_cpf
         }
+    except HTTPException:
+        raise
     except Exception as e:
         if "Duplicate entry" in str(e) or "duplicate" in str(e).lower():
             raise HTTPException(status_code=400, detail="Email já cadastrado")
@@ -72,7 +75,7 @@ async def register(form_data: SimpleRegisterRequest):
 @router.post("/login", response_model=Token)
 async def login_for_access_token(form_data: LoginRequest):
     user = await repository.get_by_email(form_data.email)
-    if not user or not verify_password(form_data.password, user['senha_hash']):
+    if not user or not await verify_password(form_data.password, user['senha_hash']):
         raise HTTPException(
             status_code=401,
             detail="Email ou senha incorretos",
@@ -93,3 +96,9 @@ async def login_for_access_token(form_data: LoginRequest):
         "user_type": user['tipo'],
         "user_cpf": user['cpf']
     }
+
+@router.post("/logout")
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Revoga o token atual até a sua expiração"""
+    revoke_token(credentials.credentials)
+    return {"success": True, "message": "Logout realizado com sucesso"}
@@ -1,42 +1,107 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
 from app.repositories.consulta_repository import ConsultaRepository
 from app.repositories.participante_repostory import ParticipanteRepository
 from app.repositories.financiamento_repository import FinanciamentoRepository
 from app.repositories.producao_repository import ProducaoRepository
+from app.repositories.relatorio_repository import RelatorioRepository
+from app.repositories.produtividade_repository import METRICAS, ProdutividadeRepository
+from app.export import export_response
+from app.responses import json_response
 
 router = APIRouter()
 consulta_repo = ConsultaRepository()
 participante_repo = ParticipanteRepository()
 financiamento_repo = FinanciamentoRepository()
 producao_repo = ProducaoRepository()
+relatorio_repo = RelatorioRepository()
+produtividade_repo = ProdutividadeRepository()
 
 @router.get("/coordenadores")
 async def list_coordenadores():
     """Retorna lista de docentes para usar como coordenadores"""
-    return await participante_repo.get_docentes()
+    return json_response(await participante_repo.get_docentes())
 
 @router.get("/projetos-por-coordenador/{coordenador_cpf}")
 async def get_projetos_by_coordenador(coordenador_cpf: str):
     """Retorna todos os projetos de um coordenador"""
-    projetos = await consulta_repo.get_projetos_by_coordenador(coordenador_cpf)
-    return projetos
+    return json_response(await consulta_repo.get_projetos_by_coordenador(coordenador_cpf))
 
 @router.get("/agencias")
 async def list_agencias():
     """Retorna lista de agências que possuem financiamentos"""
-    return await financiamento_repo.get_agencias_distinct()
+    return json_response(await financiamento_repo.get_agencias_distinct())
 
 @router.get("/financiamentos-por-agencia/{agencia_sigla}")
 async def get_financiamentos_by_agencia(agencia_sigla: str):
     """Retorna financiamentos de uma agência com total"""
-    return await consulta_repo.get_financiamentos_by_agencia(agencia_sigla)
+    return json_response(await consulta_repo.get_financiamentos_by_agencia(agencia_sigla))
 
 @router.get("/anos")
 async def list_anos():
     """Retorna lista de anos distintos de produções"""
-    return await producao_repo.get_anos()
+    return json_response(await producao_repo.get_anos())
 
 @router.get("/producoes-por-ano/{ano}")
 async def get_producoes_by_ano(ano: int):
     """Retorna produções de um ano agrupadas por tipo"""
-    return await consulta_repo.get_producoes_by_ano(ano)
+    return json_response(await consulta_repo.get_producoes_by_ano(ano))
+
+@router.get("/projetos-por-coordenador/{coordenador_cpf}/exportar")
+async def exportar_projetos_by_coordenador(coordenador_cpf: str, formato: str = Query("csv", description="csv ou ndjson")):
+    """Exporta os projetos de um coordenador em streaming (CSV ou NDJSON)"""
+    return await export_response(
+        consulta_repo.export_projetos_by_coordenador(coordenador_cpf), formato, f"projetos-{coordenador_cpf}"
+    )
+
+@router.get("/financiamentos-por-agencia/{agencia_sigla}/exportar")
+async def exportar_financiamentos_by_agencia(agencia_sigla: str, formato: str = Query("csv", description="csv ou ndjson")):
+    """Exporta os financiamentos de uma agência em streaming (CSV ou NDJSON)"""
+    return await export_response(
+        consulta_repo.export_financiamentos_by_agencia(agencia_sigla), formato, f"financiamentos-{agencia_sigla}"
+    )
+
+@router.get("/producoes-por-ano/{ano}/exportar")
+async def exportar_producoes_by_ano(ano: int, formato: str = Query("csv", description="csv ou ndjson")):
+    """Exporta as produções de um ano em streaming (CSV ou NDJSON)"""
+    return await export_response(consulta_repo.export_producoes_by_ano(ano), formato, f"producoes-{ano}")
+
+@router.get("/relatorios/financiamentos")
+async def relatorio_financiamentos(
+    agencia_sigla: Optional[str] = Query(None, description="Filtrar por agência"),
+    tipo_fomento: Optional[str] = Query(None, description="Filtrar por tipo de fomento"),
+    ano_inicio: Optional[int] = Query(None, ge=1, le=9998, description="Ano de início mínimo"),
+    ano_fim: Optional[int] = Query(None, ge=1, le=9998, description="Ano de início máximo")
+):
+    """Totais por agência, ano e tipo de fomento, com valor alocado e saldo não alocado"""
+    return json_response(await relatorio_repo.get_financiamentos_agregados(
+        agencia_sigla=agencia_sigla, tipo_fomento=tipo_fomento, ano_inicio=ano_inicio, ano_fim=ano_fim
+    ))
+
+@router.get("/relatorios/alocacoes")
+async def relatorio_alocacoes(
+    agencia_sigla: Optional[str] = Query(None, description="Filtrar por agência"),
+    ano_inicio: Optional[int] = Query(None, ge=1, le=9998, description="Ano de início mínimo do financiamento"),
+    ano_fim: Optional[int] = Query(None, ge=1, le=9998, description="Ano de início máximo do financiamento")
+):
+    """Valor alocado por projeto, detalhado por agência"""
+    return json_response(await relatorio_repo.get_alocacoes_por_projeto(
+        agencia_sigla=agencia_sigla, ano_inicio=ano_inicio, ano_fim=ano_fim
+    ))
+
+@router.get("/ranking")
+async def ranking_produtividade(
+    metrica: str = Query("producoes", description="Métrica do ranking: " + ", ".join(METRICAS)),
+    ano_inicio: Optional[int] = Query(None, description="Ano inicial (inclusive)"),
+    ano_fim: Optional[int] = Query(None, description="Ano final (inclusive)"),
+    tipo: Optional[str] = Query(None, description="Filtrar por tipo de participante (ex: DOCENTE)"),
+    limit: int = Query(10, ge=1, le=100, description="Tamanho do ranking (top-K)")
+):
+    """Participantes mais produtivos por métrica no período, com todas as métricas"""
+    if metrica not in METRICAS:
+        raise HTTPException(status_code=400, detail=f"Métrica inválida. Use uma de: {', '.join(METRICAS)}")
+    if ano_inicio is not None and ano_fim is not None and ano_inicio > ano_fim:
+        raise HTTPException(status_code=400, detail="ano_inicio deve ser menor ou igual a ano_fim")
+    return json_response(await produtividade_repo.ranking(
+        metrica, ano_inicio=ano_inicio, ano_fim=ano_fim, tipo=tipo, limit=limit
+    ))
@@ -1,21 +1,24 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Response
 from app.repositories.dashboard_repository import DashboardRepository
+from app.conditional import condicional
+from app.responses import json_response
 from typing import List
 
 router = APIRouter()
 repository = DashboardRepository()
 
-@router.get("/stats")
-async def get_stats():
+# O dashboard é consultado em polling; 304 enquanto as tabelas lidas não mudarem
+@router.get("/stats", dependencies=[Depends(condicional("estatisticas"))])
+async def get_stats(response: Response):
     """Retorna estatísticas gerais do sistema"""
-    return await repository.get_stats()
+    return json_response(await repository.get_stats(), response)
 
-@router.get("/recent-projects")
-async def get_recent_projects():
+@router.get("/recent-projects", dependencies=[Depends(condicional("projetos", "participantes"))])
+async def get_recent_projects(response: Response):
     """Retorna os 5 projetos mais recentes"""
-    return await repository.get_recent_projects(limit=5)
+    return json_response(await repository.get_recent_projects(limit=5), response)
 
-@router.get("/recent-producoes")
-async def get_recent_producoes():
+@router.get("/recent-producoes", dependencies=[Depends(condicional("producoes", "projetos"))])
+async def get_recent_producoes(response: Response):
     """Retorna as 5 produções mais recentes"""
-    return await repository.get_recent_producoes(limit=5)
+    return json_response(await repository.get_recent_producoes(limit=5), response)
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
 from app.schemas import AgenciaCreate, AgenciaResponse, FinanciamentoCreate, FinanciamentoResponse
 from app.repositories.financiamento_repository import FinanciamentoRepository
 from app.security import get_current_user
+from app.pagination import MAX_PAGE_SIZE, set_next_cursor
+from app.search import set_search_truncated
+from app.export import export_response
+from app.conditional import condicional
 from typing import List, Optional
 
 router = APIRouter()
 repository = FinanciamentoRepository()
 
+# Tabelas lidas pelos GETs de financiamentos (ETag / 304)
+versao_financiamentos = condicional("financiamentos", "projetos_financiamentos", "agencias")
+
 @router.post("/agencias", response_model=AgenciaResponse)
 async def create_agencia(agencia: AgenciaCreate, current_user: dict = Depends(get_current_user)):
     if current_user["type"] not in ["ADMIN", "DOCENTE"]:
@@ -14,6 +21,8 @@ async def create_agencia(agencia: AgenciaCreate, current_user: dict = Depends(ge
     
     try:
         return await repository.create_agencia(agencia)
+    except HTTPException:
+        raise
     except Exception as e:
         if "Duplicate entry" in str(e):
             raise HTTPException(status_code=400, detail="Agência já cadastrada")
@@ -38,8 +47,9 @@ async def create_financiamento(fin: FinanciamentoCreate, current_user: dict = De
         raise HTTPException(status_code=400, detail="O valor do financiamento deve ser positivo")
     
     try:
-        await repository.create_financiamento(fin)
-        return await repository.get_by_codigo(fin.codigo_processo)
+        return await repository.create_financiamento(fin)
+    except HTTPException:
+        raise
     except Exception as e:
         if "Duplicate entry" in str(e):
             raise HTTPException(status_code=400, detail="Código de processo já existe")
@@ -49,11 +59,29 @@ async def create_financiamento(fin: FinanciamentoCreate, current_user: dict = De
 
 @router.get("/", response_model=List[FinanciamentoResponse])
 async def list_financiamentos(
+    response: Response,
     search: Optional[str] = Query(None, description="Buscar por agência ou processo"),
     tipo: Optional[str] = Query(None, description="Filtrar por tipo de fomento"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamanho da página (sem limite se omitido)"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (header X-Next-Cursor)"),
+    current_user: dict = Depends(get_current_user),
+    versao: Optional[str] = Depends(versao_financiamentos)
+):
+    financiamentos, next_cursor, truncada = await repository.list_financiamentos(
+        search=search, tipo=tipo, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, next_cursor)
+    set_search_truncated(response, truncada)
+    return financiamentos
+
+@router.get("/exportar")
+async def exportar_financiamentos(
+    formato: str = Query("csv", description="csv ou ndjson"),
+    tipo: Optional[str] = Query(None, description="Filtrar por tipo de fomento"),
     current_user: dict = Depends(get_current_user)
 ):
-    return await repository.list_financiamentos(search=search, tipo=tipo)
+    """Exporta todos os financiamentos em streaming (CSV ou NDJSON)"""
+    return await export_response(repository.export(tipo=tipo), formato, "financiamentos")
 
 @router.get("/total")
 async def get_total_financiamentos(current_user: dict = Depends(get_current_user)):
@@ -62,7 +90,11 @@ async def get_total_financiamentos(current_user: dict = Depends(get_current_user
     return {"total": float(total)}
 
 @router.get("/{codigo_processo}", response_model=FinanciamentoResponse)
-async def get_financiamento(codigo_processo: str, current_user: dict = Depends(get_current_user)):
+async def get_financiamento(
+    codigo_processo: str,
+    current_user: dict = Depends(get_current_user),
+    versao: Optional[str] = Depends(versao_financiamentos)
+):
     financiamento = await repository.get_by_codigo(codigo_processo)
     if not financiamento:
         raise HTTPException(status_code=404, detail="Financiamento não encontrado")
@@ -78,16 +110,17 @@ async def update_financiamento(codigo_processo: str, fin: FinanciamentoCreate, c
     if fin.valor_total <= 0:
         raise HTTPException(status_code=400, detail="O valor do financiamento deve ser positivo")
     
-    existing = await repository.get_by_codigo(codigo_processo)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Financiamento não encontrado")
-    
     try:
-        return await repository.update(codigo_processo, fin)
+        financiamento = await repository.update(codigo_processo, fin)
+    except HTTPException:
+        raise
     except Exception as e:
         if "foreign key constraint" in str(e).lower():
             raise HTTPException(status_code=400, detail="Agência não encontrada")
         raise HTTPException(status_code=400, detail=str(e))
+    if not financiamento:
+        raise HTTPException(status_code=404, detail="Financiamento não encontrado")
+    return financiamento
 
 @router.delete("/{codigo_processo}")
 async def delete_financiamento(codigo_processo: str, current_user: dict = Depends(get_current_user)):
@@ -95,12 +128,13 @@ async def delete_financiamento(codigo_processo: str, current_user: dict = Depend
     if current_user["type"] != "ADMIN":
         raise HTTPException(status_code=403, detail="Apenas administradores podem deletar financiamentos")
 
-    existing = await repository.get_by_codigo(codigo_processo)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Financiamento não encontrado")
-    
     try:
-        await repository.delete(codigo_processo)
-        return {"success": True, "message": "Financiamento deletado com sucesso"}
+        deleted = await repository.delete(codigo_processo)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Financiamento não encontrado")
+    return {"success": True, "message": "Financiamento deletado com sucesso"}
@@ -1,11 +1,23 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
 from app.schemas import ParticipanteCreate, ParticipanteResponse, ParticipanteUpdate
 from app.repositories.participante_repostory import ParticipanteRepository
+from app.repositories.coautoria_repository import CoautoriaRepository
+from app.repositories.produtividade_repository import ProdutividadeRepository
+from app.coautoria import coautorias
+from app.responses import json_response
 from app.security import get_current_user
+from app.pagination import MAX_PAGE_SIZE, set_next_cursor
+from app.search import set_search_truncated
+from app.conditional import condicional
 from typing import List, Optional
 
 router = APIRouter()
 repository = ParticipanteRepository()
+coautoria_repo = CoautoriaRepository()
+produtividade_repo = ProdutividadeRepository()
+
+# ETag / 304 dos GETs de participantes
+versao_participantes = condicional("participantes")
 
 @router.post("/", response_model=ParticipanteResponse)
 async def create_participante(participante: ParticipanteCreate, current_user: dict = Depends(get_current_user)):
@@ -13,8 +25,9 @@ async def create_participante(participante: ParticipanteCreate, current_user: di
         raise HTTPException(status_code=403, detail="Apenas administradores ou docentes podem criar participantes")
     
     try:
-        result = await repository.create(participante)
-        return await repository.get_by_cpf(result.cpf)
+        return await repository.create(participante)
+    except HTTPException:
+        raise
     except Exception as e:
         if "Duplicate entry" in str(e):
             raise HTTPException(status_code=400, detail="CPF ou email já cadastrado")
@@ -22,11 +35,20 @@ async def create_participante(participante: ParticipanteCreate, current_user: di
 
 @router.get("/", response_model=List[ParticipanteResponse])
 async def list_participantes(
+    response: Response,
     search: Optional[str] = Query(None, description="Buscar por nome, email ou CPF"),
     tipo: Optional[str] = Query(None, description="Filtrar por tipo (DOCENTE, DISCENTE, TECNICO)"),
-    current_user: dict = Depends(get_current_user)
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamanho da página (sem limite se omitido)"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (header X-Next-Cursor)"),
+    current_user: dict = Depends(get_current_user),
+    versao: Optional[str] = Depends(versao_participantes)
 ):
-    return await repository.list_all(search=search, tipo=tipo)
+    participantes, next_cursor, truncada = await repository.list_all(
+        search=search, tipo=tipo, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, next_cursor)
+    set_search_truncated(response, truncada)
+    return participantes
 
 @router.get("/docentes", response_model=List[dict])
 async def list_docentes(current_user: dict = Depends(get_current_user)):
@@ -34,12 +56,97 @@ async def list_docentes(current_user: dict = Depends(get_current_user)):
     return await repository.get_docentes()
 
 @router.get("/{cpf}", response_model=ParticipanteResponse)
-async def get_participante(cpf: str, current_user: dict = Depends(get_current_user)):
+async def get_participante(
+    cpf: str,
+    current_user: dict = Depends(get_current_user),
+    versao: Optional[str] = Depends(versao_participantes)
+):
     participante = await repository.get_by_cpf(cpf)
     if not participante:
         raise HTTPException(status_code=404, detail="Participante não encontrado")
     return participante
 
+@router.get("/{cpf}/perfil")
+async def get_perfil(cpf: str, colaboradores: int = Query(10, ge=0, le=100), current_user: dict = Depends(get_current_user)):
+    """Produção completa, projetos e principais colaboradores de um participante"""
+    perfil = await coautoria_repo.get_perfil(cpf)
+    if not perfil:
+        raise HTTPException(status_code=404, detail="Participante não encontrado")
+    perfil['produtividade'] = await produtividade_repo.get_by_participante(cpf)
+    grafo = await coautorias.get_grafo()
+    perfil['total_colaboradores'], principais = grafo.colaboradores(cpf, colaboradores)
+    perfil['colaboradores'] = _colaboradores(
+        principais, await coautoria_repo.get_participantes([outro for outro, _, _ in principais])
+    )
+    return json_response(perfil)
+
+@router.get("/{cpf}/colaboradores")
+async def list_colaboradores(
+    cpf: str,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Número de colaboradores (os mais fortes primeiro)"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Coautores e colegas de projeto de um participante, por força da colaboração"""
+    grafo = await coautorias.get_grafo()
+    total, principais = grafo.colaboradores(cpf, limit)
+    nomes = await coautoria_repo.get_participantes([cpf] + [outro for outro, _, _ in principais])
+    if cpf not in nomes:
+        raise HTTPException(status_code=404, detail="Participante não encontrado")
+    return json_response({
+        **nomes[cpf],
+        "total_colaboradores": total,
+        "colaboradores": _colaboradores(principais, nomes),
+    })
+
+@router.get("/{cpf}/colaboradores/{outro_cpf}")
+async def get_colaboracao(
+    cpf: str,
+    outro_cpf: str,
+    limit: int = Query(50, ge=0, le=MAX_PAGE_SIZE, description="Máximo de produções em comum listadas"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Força da colaboração entre dois participantes, com as produções em comum"""
+    grafo = await coautorias.get_grafo()
+    producoes, projetos = grafo.forca(cpf, outro_cpf)
+    nomes = await coautoria_repo.get_participantes([cpf, outro_cpf])
+    if cpf not in nomes or outro_cpf not in nomes:
+        raise HTTPException(status_code=404, detail="Participante não encontrado")
+    em_comum = await coautoria_repo.get_producoes_em_comum(cpf, outro_cpf, limit) if producoes and limit else []
+    return json_response({
+        "participantes": [nomes[cpf], nomes[outro_cpf]],
+        "producoes": producoes,
+        "projetos": projetos,
+        "producoes_em_comum": em_comum,
+    })
+
+@router.get("/{cpf}/caminho/{outro_cpf}")
+async def get_caminho(
+    cpf: str,
+    outro_cpf: str,
+    max_saltos: int = Query(6, ge=1, le=12, description="Tamanho máximo da cadeia"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Menor cadeia de colaborações ligando dois participantes"""
+    grafo = await coautorias.get_grafo()
+    caminho = grafo.caminho(cpf, outro_cpf, max_saltos)
+    if caminho is None:
+        raise HTTPException(status_code=404, detail="Nenhuma cadeia de colaboração encontrada entre os participantes")
+    nomes = await coautoria_repo.get_participantes(caminho)
+    # Cada elo traz a força da colaboração com o participante anterior na cadeia
+    elos = [(atual, *grafo.forca(anterior, atual)) for anterior, atual in zip(caminho, caminho[1:])]
+    return json_response({
+        "saltos": len(elos),
+        "origem": nomes.get(cpf, {"cpf": cpf}),
+        "caminho": _colaboradores(elos, nomes),
+    })
+
+def _colaboradores(principais, nomes):
+    """(cpf, producoes, projetos) -> dicts com nome e tipo"""
+    return [
+        {**nomes.get(outro, {"cpf": outro}), "producoes": producoes, "projetos": projetos}
+        for outro, producoes, projetos in principais
+    ]
+
 @router.put("/{cpf}", response_model=ParticipanteResponse)
 async def update_participante(cpf: str, participante: ParticipanteCreate, current_user: dict = Depends(get_current_user)):
     """Atualiza um participante existente"""
@@ -56,6 +163,8 @@ async def update_participante(cpf: str, participante: ParticipanteCreate, curren
     
     try:
         return await repository.update(cpf, participante)
+    except HTTPException:
+        raise
     except Exception as e:
         if "Duplicate entry" in str(e):
             raise HTTPException(status_code=400, detail="Email já cadastrado para outro participante")
@@ -67,13 +176,10 @@ async def delete_participante(cpf: str, current_user: dict = Depends(get_current
     if current_user["type"] != "ADMIN":
         raise HTTPException(status_code=403, detail="Apenas administradores podem deletar participantes")
 
-    existing = await repository.get_by_cpf(cpf)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Participante não encontrado")
-    
     try:
-        await repository.delete(cpf)
-        return {"success": True, "message": "Participante deletado com sucesso"}
+        deleted = await repository.delete(cpf)
+    except HTTPException:
+        raise
     except Exception as e:
         if "foreign key constraint" in str(e).lower() or "cannot delete" in str(e).lower():
             raise HTTPException(
@@ -81,3 +187,7 @@ async def delete_participante(cpf: str, current_user: dict = Depends(get_current
                 detail="Não é possível deletar este participante pois está vinculado a projetos"
             )
         raise HTTPException(status_code=400, detail=str(e))
+
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Participante não encontrado")
+    return {"success": True, "message": "Participante deletado com sucesso"}
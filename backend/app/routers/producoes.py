@@ -1,14 +1,20 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Response, UploadFile, File
 from app.schemas import ProducaoCreate, ProducaoResponse
 from app.repositories.producao_repository import ProducaoRepository
-from app.repositories.projeto_repository import ProjetoRepository
 from app.security import get_current_user
+from app.pagination import MAX_PAGE_SIZE, set_next_cursor
+from app.search import set_search_truncated
+from app.importer import detect_format, import_producoes
+from app.export import export_response
+from app.conditional import condicional
 from typing import List, Optional
 from datetime import datetime
 
 router = APIRouter()
 repository = ProducaoRepository()
-projeto_repository = ProjetoRepository()
+
+# Tabelas lidas pelos GETs de produções (ETag / 304)
+versao_producoes = condicional("producoes", "producoes_autores", "participantes", "projetos")
 
 @router.post("/", response_model=ProducaoResponse)
 async def create_producao(prod: ProducaoCreate, current_user: dict = Depends(get_current_user)):
@@ -21,14 +27,10 @@ async def create_producao(prod: ProducaoCreate, current_user: dict = Depends(get
         )
     
     try:
-        await repository.create(prod)
-        
-        # Adicionar autores se fornecidos
-        if prod.autores:
-            for autor in prod.autores:
-                await repository.add_autor(prod.id_registro, autor.participante_cpf, autor.ordem)
-        
-        return await repository.get_by_id(prod.id_registro)
+        # Produção e autores na mesma transação
+        return await repository.create(prod)
+    except HTTPException:
+        raise
     except Exception as e:
         if "Duplicate entry" in str(e):
             raise HTTPException(status_code=400, detail="ID de registro já existe")
@@ -36,14 +38,44 @@ async def create_producao(prod: ProducaoCreate, current_user: dict = Depends(get
             raise HTTPException(status_code=400, detail="Projeto ou participante não encontrado")
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/importar")
+async def importar_producoes(
+    arquivo: UploadFile = File(..., description="Arquivo CSV, JSON lines ou BibTeX"),
+    formato: Optional[str] = Query(None, description="csv, jsonl ou bibtex (padrão: pela extensão do arquivo)"),
+    projeto_codigo: Optional[str] = Query(None, description="Projeto das produções que não informarem um"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Importa produções em lote, retornando o total importado e os erros por linha"""
+    formato = detect_format(arquivo.filename, formato)
+    return await import_producoes(arquivo.file, formato, projeto_codigo)
+
 @router.get("/", response_model=List[ProducaoResponse])
 async def list_producoes(
+    response: Response,
     search: Optional[str] = Query(None, description="Buscar por título ou veículo"),
     tipo: Optional[str] = Query(None, description="Filtrar por tipo"),
     ano: Optional[int] = Query(None, description="Filtrar por ano"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamanho da página (sem limite se omitido)"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (header X-Next-Cursor)"),
+    current_user: dict = Depends(get_current_user),
+    versao: Optional[str] = Depends(versao_producoes)
+):
+    producoes, next_cursor, truncada = await repository.list_all(
+        search=search, tipo=tipo, ano=ano, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, next_cursor)
+    set_search_truncated(response, truncada)
+    return producoes
+
+@router.get("/exportar")
+async def exportar_producoes(
+    formato: str = Query("csv", description="csv ou ndjson"),
+    tipo: Optional[str] = Query(None, description="Filtrar por tipo"),
+    ano: Optional[int] = Query(None, description="Filtrar por ano"),
     current_user: dict = Depends(get_current_user)
 ):
-    return await repository.list_all(search=search, tipo=tipo, ano=ano)
+    """Exporta todas as produções, com autores, em streaming (CSV ou NDJSON)"""
+    return await export_response(repository.export(tipo=tipo, ano=ano), formato, "producoes")
 
 @router.get("/anos", response_model=List[int])
 async def list_anos(current_user: dict = Depends(get_current_user)):
@@ -51,7 +83,11 @@ async def list_anos(current_user: dict = Depends(get_current_user)):
     return await repository.get_anos()
 
 @router.get("/{id_registro:path}", response_model=ProducaoResponse)
-async def get_producao(id_registro: str, current_user: dict = Depends(get_current_user)):
+async def get_producao(
+    id_registro: str,
+    current_user: dict = Depends(get_current_user),
+    versao: Optional[str] = Depends(versao_producoes)
+):
     producao = await repository.get_by_id(id_registro)
     if not producao:
         raise HTTPException(status_code=404, detail="Produção não encontrada")
@@ -74,28 +110,17 @@ async def update_producao(id_registro: str, prod: ProducaoCreate, current_user:
     
     # Verificar permissão
     is_admin = current_user["type"] == "ADMIN"
-    is_coordenador = False
-    if existing["projeto_codigo"]:
-        projeto = await projeto_repository.get_by_codigo(existing["projeto_codigo"])
-        if projeto and projeto["coordenador_cpf"] == current_user["cpf"]:
-            is_coordenador = True
-    
+    is_coordenador = existing["projeto_coordenador_cpf"] == current_user["cpf"]
     is_autor = any(autor["cpf"] == current_user["cpf"] for autor in existing["autores"])
     
     if not (is_admin or is_coordenador or is_autor):
         raise HTTPException(status_code=403, detail="Você não tem permissão para atualizar esta produção")
     
     try:
-        # Atualizar produção
-        await repository.update(id_registro, prod)
-        
-        # Atualizar autores
-        await repository.remove_autores(id_registro)
-        if prod.autores:
-            for autor in prod.autores:
-                await repository.add_autor(id_registro, autor.participante_cpf, autor.ordem)
-        
-        return await repository.get_by_id(id_registro)
+        # Produção e autores na mesma transação
+        return await repository.update(id_registro, prod)
+    except HTTPException:
+        raise
     except Exception as e:
         if "foreign key constraint" in str(e).lower():
             raise HTTPException(status_code=400, detail="Projeto ou participante não encontrado")
@@ -110,17 +135,14 @@ async def delete_producao(id_registro: str, current_user: dict = Depends(get_cur
     
     # Verificar permissão (apenas Admin ou Coordenador do projeto)
     is_admin = current_user["type"] == "ADMIN"
-    is_coordenador = False
-    if existing["projeto_codigo"]:
-        projeto = await projeto_repository.get_by_codigo(existing["projeto_codigo"])
-        if projeto and projeto["coordenador_cpf"] == current_user["cpf"]:
-            is_coordenador = True
-            
+    is_coordenador = existing["projeto_coordenador_cpf"] == current_user["cpf"]
     if not (is_admin or is_coordenador):
         raise HTTPException(status_code=403, detail="Apenas o administrador ou o coordenador do projeto podem deletar a produção")
     
     try:
         await repository.delete(id_registro)
         return {"success": True, "message": "Produção deletada com sucesso"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
 from app.schemas import ProjetoCreate, ProjetoResponse, ProjetoDetail
 from app.repositories.projeto_repository import ProjetoRepository
 from app.security import get_current_user
+from app.pagination import MAX_PAGE_SIZE, set_next_cursor
+from app.search import set_search_truncated
+from app.export import export_response
+from app.conditional import condicional
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import date
@@ -9,6 +13,12 @@ from datetime import date
 router = APIRouter()
 repository = ProjetoRepository()
 
+# Tabelas lidas por cada GET (ETag / 304)
+versao_projetos = condicional("projetos", "participantes")
+versao_detalhes = condicional(
+    "projetos", "participantes", "participantes_projetos", "financiamentos", "projetos_financiamentos"
+)
+
 class VincularParticipanteRequest(BaseModel):
     participante_cpf: str
     funcao: str
@@ -19,14 +29,27 @@ class VincularFinanciamentoRequest(BaseModel):
     financiamento_codigo: str
     valor_alocado: float
 
+async def get_projeto_existente(codigo: str):
+    """Dependência: o projeto do path, lido uma única vez por requisição, ou 404"""
+    projeto = await repository.get_by_codigo(codigo)
+    if not projeto:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    return projeto
+
+def _check_coordenador(projeto: dict, current_user: dict, detail: str):
+    """Só o administrador ou o coordenador do projeto podem alterá-lo"""
+    if current_user["type"] != "ADMIN" and current_user["cpf"] != projeto["coordenador_cpf"]:
+        raise HTTPException(status_code=403, detail=detail)
+
 @router.post("/", response_model=ProjetoResponse)
 async def create_projeto(projeto: ProjetoCreate, current_user: dict = Depends(get_current_user)):
     if current_user["type"] not in ["ADMIN", "DOCENTE"]:
         raise HTTPException(status_code=403, detail="Apenas administradores ou docentes podem criar projetos")
     
     try:
-        await repository.create(projeto)
-        return await repository.get_by_codigo(projeto.codigo)
+        return await repository.create(projeto)
+    except HTTPException:
+        raise
     except Exception as e:
         if "Duplicate entry" in str(e):
             raise HTTPException(status_code=400, detail="Código de projeto já existe")
@@ -36,68 +59,94 @@ async def create_projeto(projeto: ProjetoCreate, current_user: dict = Depends(ge
 
 @router.get("/", response_model=List[ProjetoResponse])
 async def list_projetos(
+    response: Response,
     search: Optional[str] = Query(None, description="Buscar por título, código ou coordenador"),
     situacao: Optional[str] = Query(None, description="Filtrar por situação"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Tamanho da página (sem limite se omitido)"),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (header X-Next-Cursor)"),
+    current_user: dict = Depends(get_current_user),
+    versao: Optional[str] = Depends(versao_projetos)
+):
+    projetos, next_cursor, truncada = await repository.list_all(
+        search=search, situacao=situacao, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, next_cursor)
+    set_search_truncated(response, truncada)
+    return projetos
+
+@router.get("/exportar")
+async def exportar_projetos(
+    formato: str = Query("csv", description="csv ou ndjson"),
+    situacao: Optional[str] = Query(None, description="Filtrar por situação"),
     current_user: dict = Depends(get_current_user)
 ):
-    return await repository.list_all(search=search, situacao=situacao)
+    """Exporta todos os projetos em streaming (CSV ou NDJSON)"""
+    return await export_response(repository.export(situacao=situacao), formato, "projetos")
 
 @router.get("/{codigo}", response_model=ProjetoResponse)
-async def get_projeto(codigo: str, current_user: dict = Depends(get_current_user)):
-    projeto = await repository.get_by_codigo(codigo)
-    if not projeto:
-        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+async def get_projeto(
+    current_user: dict = Depends(get_current_user),
+    versao: Optional[str] = Depends(versao_projetos),
+    projeto: dict = Depends(get_projeto_existente)
+):
     return projeto
 
 @router.get("/{codigo}/detalhes", response_model=ProjetoDetail)
-async def get_projeto_detalhes(codigo: str, current_user: dict = Depends(get_current_user)):
+async def get_projeto_detalhes(
+    codigo: str,
+    current_user: dict = Depends(get_current_user),
+    versao: Optional[str] = Depends(versao_detalhes)
+):
     projeto = await repository.get_details(codigo)
     if not projeto:
         raise HTTPException(status_code=404, detail="Projeto não encontrado")
     return projeto
 
 @router.put("/{codigo}", response_model=ProjetoResponse)
-async def update_projeto(codigo: str, projeto: ProjetoCreate, current_user: dict = Depends(get_current_user)):
+async def update_projeto(
+    codigo: str,
+    projeto: ProjetoCreate,
+    current_user: dict = Depends(get_current_user),
+    existing: dict = Depends(get_projeto_existente)
+):
     """Atualiza um projeto existente"""
-    existing = await repository.get_by_codigo(codigo)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Projeto não encontrado")
-    
-    if current_user["type"] != "ADMIN" and current_user["cpf"] != existing["coordenador_cpf"]:
-        raise HTTPException(status_code=403, detail="Apenas o administrador ou o coordenador podem atualizar o projeto")
+    _check_coordenador(existing, current_user, "Apenas o administrador ou o coordenador podem atualizar o projeto")
     
     try:
         return await repository.update(codigo, projeto)
+    except HTTPException:
+        raise
     except Exception as e:
         if "Regra violada" in str(e) or "coordenador" in str(e).lower():
             raise HTTPException(status_code=400, detail="O coordenador deve ser um DOCENTE ou ADMIN")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{codigo}")
-async def delete_projeto(codigo: str, current_user: dict = Depends(get_current_user)):
+async def delete_projeto(
+    codigo: str,
+    current_user: dict = Depends(get_current_user),
+    existing: dict = Depends(get_projeto_existente)
+):
     """Deleta um projeto"""
-    existing = await repository.get_by_codigo(codigo)
-    if not existing:
-        raise HTTPException(status_code=404, detail="Projeto não encontrado")
-    
-    if current_user["type"] != "ADMIN" and current_user["cpf"] != existing["coordenador_cpf"]:
-        raise HTTPException(status_code=403, detail="Apenas o administrador ou o coordenador podem deletar o projeto")
+    _check_coordenador(existing, current_user, "Apenas o administrador ou o coordenador podem deletar o projeto")
     
     try:
         await repository.delete(codigo)
         return {"success": True, "message": "Projeto deletado com sucesso"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/{codigo}/participantes")
-async def vincular_participante(codigo: str, data: VincularParticipanteRequest, current_user: dict = Depends(get_current_user)):
+async def vincular_participante(
+    codigo: str,
+    data: VincularParticipanteRequest,
+    current_user: dict = Depends(get_current_user),
+    projeto: dict = Depends(get_projeto_existente)
+):
     """Vincula um participante a um projeto"""
-    projeto = await repository.get_by_codigo(codigo)
-    if not projeto:
-        raise HTTPException(status_code=404, detail="Projeto não encontrado")
-    
-    if current_user["type"] != "ADMIN" and current_user["cpf"] != projeto["coordenador_cpf"]:
-        raise HTTPException(status_code=403, detail="Apenas o administrador ou o coordenador podem vincular participantes")
+    _check_coordenador(projeto, current_user, "Apenas o administrador ou o coordenador podem vincular participantes")
     
     try:
         await repository.add_participante(
@@ -108,6 +157,8 @@ async def vincular_participante(codigo: str, data: VincularParticipanteRequest,
             str(data.data_saida) if data.data_saida else None
         )
         return {"success": True, "message": "Participante vinculado com sucesso"}
+    except HTTPException:
+        raise
     except Exception as e:
         if "Duplicate entry" in str(e):
             raise HTTPException(status_code=400, detail="Participante já vinculado a este projeto")
@@ -116,14 +167,14 @@ async def vincular_participante(codigo: str, data: VincularParticipanteRequest,
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/{codigo}/financiamentos")
-async def vincular_financiamento(codigo: str, data: VincularFinanciamentoRequest, current_user: dict = Depends(get_current_user)):
+async def vincular_financiamento(
+    codigo: str,
+    data: VincularFinanciamentoRequest,
+    current_user: dict = Depends(get_current_user),
+    projeto: dict = Depends(get_projeto_existente)
+):
     """Vincula um financiamento a um projeto"""
-    projeto = await repository.get_by_codigo(codigo)
-    if not projeto:
-        raise HTTPException(status_code=404, detail="Projeto não encontrado")
-    
-    if current_user["type"] != "ADMIN" and current_user["cpf"] != projeto["coordenador_cpf"]:
-        raise HTTPException(status_code=403, detail="Apenas o administrador ou o coordenador podem vincular financiamentos")
+    _check_coordenador(projeto, current_user, "Apenas o administrador ou o coordenador podem vincular financiamentos")
     
     if projeto['situacao'] == 'CONCLUIDO' or projeto['situacao'] == 'CANCELADO':
         raise HTTPException(
@@ -134,6 +185,8 @@ async def vincular_financiamento(codigo: str, data: VincularFinanciamentoRequest
     try:
         await repository.add_financiamento(codigo, data.financiamento_codigo, data.valor_alocado)
         return {"success": True, "message": "Financiamento vinculado com sucesso"}
+    except HTTPException:
+        raise
     except Exception as e:
         if "Duplicate entry" in str(e):
             raise HTTPException(status_code=400, detail="Financiamento já vinculado a este projeto")
@@ -0,0 +1,77 @@
+import os
+import re
+from fastapi import Response
+
+# Busca textual com índices FULLTEXT (MATCH ... AGAINST em BOOLEAN MODE).
+# As colunas usam utf8mb4_0900_ai_ci, então a busca ignora acentos e caixa
+# ("jose" encontra "José"). Cada ramo da busca é limitado a SEARCH_MAX_RESULTS
+# linhas, o que mantém a latência limitada mesmo em tabelas grandes. Os filtros
+# da listagem entram em cada ramo antes do LIMIT, e a paginação percorre só
+# esses resultados: quando algum ramo atinge o limite a resposta traz o header
+# X-Search-Truncated, indicando que há mais ocorrências do que as listadas.
+
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "1000"))
+SEARCH_MAX_TERMS = 8
+# innodb_ft_min_token_size: termos menores não são indexados
+FT_MIN_TOKEN_SIZE = int(os.getenv("FT_MIN_TOKEN_SIZE", "3"))
+# Relevância atribuída a quem casa pelo prefixo do código/CPF (identificadores)
+PREFIX_MATCH_SCORE = 100
+SEARCH_TRUNCATED_HEADER = "X-Search-Truncated"
+
+def fulltext_query(search: str):
+    """Converte o texto digitado em uma query BOOLEAN MODE (todos os termos, por prefixo).
+
+    Retorna None se nenhum termo for indexável; nesse caso use a busca com LIKE.
+    """
+    termos = [t for t in re.findall(r"\w+", search or "") if len(t) >= FT_MIN_TOKEN_SIZE]
+    if not termos:
+        return None
+    return " ".join(f"+{termo}*" for termo in termos[:SEARCH_MAX_TERMS])
+
+def like_prefix(search: str):
+    """Parâmetro para `coluna LIKE %s` que casa pelo prefixo, com curingas escapados"""
+    escaped = search.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+def ranked_matches(branches, filtros=()):
+    """Une SELECTs (chave, score) em uma tabela derivada (chave, relevancia, busca_truncada).
+
+    `branches` é uma lista de (sql, params); cada sql deve selecionar as colunas
+    `chave` e `score` e terminar na cláusula WHERE. `filtros` é uma lista de
+    (condição, params) acrescentada a todos os ramos, antes do ORDER BY score DESC
+    e do LIMIT. `busca_truncada` vale 1 em todas as linhas se algum ramo atingiu
+    SEARCH_MAX_RESULTS. Retorna (sql, params).
+    """
+    filtro_sql = "".join(f" AND {condicao}" for condicao, _ in filtros)
+    union = " UNION ALL ".join(
+        f"(SELECT ramo{i}.*, {i} AS ramo FROM ({sql}{filtro_sql} ORDER BY score DESC LIMIT %s) ramo{i})"
+        for i, (sql, _) in enumerate(branches)
+    )
+    params = []
+    for _, branch_params in branches:
+        params.extend(branch_params)
+        for _, filtro_params in filtros:
+            params.extend(filtro_params)
+        params.append(SEARCH_MAX_RESULTS)
+    sql = f"""
+        SELECT chave, MAX(score) AS relevancia, MAX(MAX(cheio)) OVER () AS busca_truncada
+        FROM (
+            SELECT chave, score, COUNT(*) OVER (PARTITION BY ramo) >= %s AS cheio
+            FROM ({union}) ramos
+        ) matches
+        GROUP BY chave
+    """
+    return sql, [SEARCH_MAX_RESULTS] + params
+
+def pop_truncada(rows):
+    """Remove a coluna busca_truncada das linhas; retorna (linhas, truncada)"""
+    rows = list(rows)
+    truncada = False
+    for row in rows:
+        truncada = bool(row.pop('busca_truncada', 0)) or truncada
+    return rows, truncada
+
+def set_search_truncated(response: Response, truncada):
+    """Sinaliza no header que a busca foi cortada em SEARCH_MAX_RESULTS por ramo"""
+    if truncada:
+        response.headers[SEARCH_TRUNCATED_HEADER] = "true"
@@ -1,9 +1,15 @@
 from datetime import datetime, timedelta
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
+import asyncio
+import hashlib
 import jwt
-from fastapi import Depends, HTTPException, status
+import os
+import time
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.cache import TTLCache
 
 # Configuração de Segurança
 # Em produção, usar variável de ambiente!
@@ -14,13 +20,59 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# Bcrypt (custo 12) leva ~250ms de CPU; roda em threads (bcrypt libera o GIL)
+# para não travar o event loop. PASSWORD_HASH_WORKERS limita quantos rodam ao
+# mesmo tempo e PASSWORD_HASH_MAX_QUEUE quantos podem esperar antes de um 503.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "256"))
 
-def get_password_hash(password):
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = asyncio.Semaphore(PASSWORD_HASH_WORKERS)
+_hash_metrics = {"in_flight": 0, "queued": 0, "completed": 0, "rejected": 0}
+
+async def _run_password_hashing(func, *args):
+    """Executa func no pool de bcrypt respeitando o limite de concorrência e de fila"""
+    if _hash_metrics["queued"] >= PASSWORD_HASH_MAX_QUEUE:
+        _hash_metrics["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, tente novamente em instantes",
+            headers={"Retry-After": "1"},
+        )
+    
+    _hash_metrics["queued"] += 1
+    try:
+        await _hash_slots.acquire()
+    finally:
+        _hash_metrics["queued"] -= 1
+    
+    _hash_metrics["in_flight"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_metrics["in_flight"] -= 1
+        _hash_metrics["completed"] += 1
+        _hash_slots.release()
+
+def password_hashing_stats():
+    """Métricas do pool de bcrypt (fila, em execução, concluídos, rejeitados)"""
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_queue": PASSWORD_HASH_MAX_QUEUE,
+        **_hash_metrics,
+    }
+
+def shutdown_password_hashing():
+    _hash_executor.shutdown(wait=False)
+
+async def verify_password(plain_password, hashed_password):
+    return await _run_password_hashing(pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash(password):
     # Bcrypt crasha se > 72 bytes. O Schema já limita a 50 chars, mas garantimos aqui também.
     safe_password = password[:50] 
-    return pwd_context.hash(safe_password)
+    return await _run_password_hashing(pwd_context.hash, safe_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -40,21 +92,66 @@ def decode_token(token: str):
         return payload
     except jwt.ExpiredSignatureError:
         return None
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         return None
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Dependência para obter o usuário atual do token JWT"""
-    token = credentials.credentials
+# Tokens já verificados, por digest, até o próprio exp: evita refazer o HMAC
+# a cada requisição. Tokens revogados ficam em _revoked_tokens até expirarem.
+TOKEN_CACHE_MAXSIZE = int(os.getenv("TOKEN_CACHE_MAXSIZE", "10000"))
+
+token_cache = TTLCache("auth.tokens", maxsize=TOKEN_CACHE_MAXSIZE)
+_revoked_tokens = {}
+
+def _token_digest(token: str):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def revoke_token(token: str):
+    """Revoga um token até o seu exp (ex: logout)"""
+    payload = decode_token(token)
+    if not payload:
+        return
+    now = time.time()
+    for digest, exp in list(_revoked_tokens.items()):
+        if exp <= now:
+            del _revoked_tokens[digest]
+    digest = _token_digest(token)
+    _revoked_tokens[digest] = payload.get("exp", now + ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    token_cache.delete(digest)
+
+def verify_token(token: str):
+    """Retorna o usuário do token (dict com cpf, name e type) ou None se inválido"""
+    digest = _token_digest(token)
+    if digest in _revoked_tokens:
+        return None
+    
+    found, user = token_cache.get(digest)
+    if found:
+        return user
+    
     payload = decode_token(token)
     if not payload:
+        return None
+    user = {
+        "cpf": payload.get("sub"),
+        "name": payload.get("name"),
+        "type": payload.get("type")
+    }
+    exp = payload.get("exp")
+    token_cache.set(digest, user, ttl=exp - time.time() if exp else None)
+    return user
+
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Dependência para obter o usuário atual do token JWT (verificado uma vez por requisição)"""
+    current_user = getattr(request.state, "current_user", None)
+    if current_user:
+        return current_user
+    
+    current_user = verify_token(credentials.credentials)
+    if not current_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido ou expirado",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return {
-        "cpf": payload.get("sub"),
-        "name": payload.get("name"),
-        "type": payload.get("type")
-    }
+    request.state.current_user = current_user
+    return current_user
@@ -0,0 +1,69 @@
+import asyncio
+import functools
+
+from app.database import reads_from_primary
+
+# Single-flight: chamadas concorrentes idênticas (mesmo método + argumentos) a
+# um método de leitura compartilham uma única execução em andamento; quem chega
+# enquanto ela roda aguarda o mesmo resultado em vez de repetir a query.
+# Diferente do cache, nada é guardado depois que a execução termina. O
+# resultado é o mesmo objeto para todos, então não deve ser alterado por quem
+# chama. Só faz sentido em métodos de leitura. A execução roda no contexto de
+# quem a iniciou, então requisições que já escreveram (e por isso leem do
+# primário) não compartilham execuções com as que podem ler de uma réplica.
+
+# Registro de todos os grupos criados, usado para expor as métricas
+flights = {}
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self._in_flight = {}
+        flights[name] = self
+
+    async def do(self, key, func, *args, **kwargs):
+        """Executa func(*args, **kwargs), ou aguarda a execução em andamento com a mesma chave"""
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            # Task própria: se quem iniciou for cancelado, os demais continuam aguardando
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._in_flight[key] = task
+            task.add_done_callback(functools.partial(self._done, key))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "in_flight": len(self._in_flight),
+        }
+
+def coalesce(flight: SingleFlight):
+    """Decorator para métodos async de repositório; a chave é o nome do método + argumentos"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            key = (func.__name__, args, tuple(sorted(kwargs.items())), reads_from_primary())
+            return await flight.do(key, func, self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def singleflight_stats():
+    """Métricas de todos os grupos, por nome"""
+    return {name: flight.stats() for name, flight in flights.items()}
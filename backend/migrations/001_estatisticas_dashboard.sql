@@ -0,0 +1,130 @@
+-- 001: Resumo materializado do dashboard (tabela estatisticas + triggers)
+
+-- Tabela: Estatisticas
+-- Resumo materializado do dashboard (linha única, id = 1).
+-- Mantida pelos triggers trg_estatisticas_* e reconciliada periodicamente pelo backend.
+CREATE TABLE IF NOT EXISTS estatisticas (
+    id TINYINT NOT NULL DEFAULT 1,
+    projetos_ativos INT NOT NULL DEFAULT 0,
+    projetos_concluidos INT NOT NULL DEFAULT 0,
+    total_participantes INT NOT NULL DEFAULT 0,
+    total_producoes INT NOT NULL DEFAULT 0,
+    total_financiamentos DECIMAL(17, 2) NOT NULL DEFAULT 0,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (id),
+    CONSTRAINT chk_estatisticas_linha_unica CHECK (id = 1)
+);
+
+INSERT IGNORE INTO estatisticas (id) VALUES (1);
+
+DROP TRIGGER IF EXISTS trg_estatisticas_projetos_insert;
+DROP TRIGGER IF EXISTS trg_estatisticas_projetos_update;
+DROP TRIGGER IF EXISTS trg_estatisticas_projetos_delete;
+DROP TRIGGER IF EXISTS trg_estatisticas_participantes_insert;
+DROP TRIGGER IF EXISTS trg_estatisticas_participantes_delete;
+DROP TRIGGER IF EXISTS trg_estatisticas_producoes_insert;
+DROP TRIGGER IF EXISTS trg_estatisticas_producoes_delete;
+DROP TRIGGER IF EXISTS trg_estatisticas_financiamentos_insert;
+DROP TRIGGER IF EXISTS trg_estatisticas_financiamentos_update;
+DROP TRIGGER IF EXISTS trg_estatisticas_financiamentos_delete;
+
+DELIMITER //
+
+-- Estatísticas do dashboard: atualização incremental da tabela estatisticas.
+-- Obs: ON DELETE CASCADE não dispara triggers, mas nenhuma tabela contada é apagada em cascata.
+CREATE TRIGGER trg_estatisticas_projetos_insert AFTER INSERT ON projetos
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas
+    SET projetos_ativos = projetos_ativos + (NEW.situacao <=> 'EM_ANDAMENTO'),
+        projetos_concluidos = projetos_concluidos + (NEW.situacao <=> 'CONCLUIDO')
+    WHERE id = 1;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_projetos_update AFTER UPDATE ON projetos
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.situacao <=> OLD.situacao) THEN
+        UPDATE estatisticas
+        SET projetos_ativos = projetos_ativos + (NEW.situacao <=> 'EM_ANDAMENTO') - (OLD.situacao <=> 'EM_ANDAMENTO'),
+            projetos_concluidos = projetos_concluidos + (NEW.situacao <=> 'CONCLUIDO') - (OLD.situacao <=> 'CONCLUIDO')
+        WHERE id = 1;
+    END IF;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_projetos_delete AFTER DELETE ON projetos
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas
+    SET projetos_ativos = projetos_ativos - (OLD.situacao <=> 'EM_ANDAMENTO'),
+        projetos_concluidos = projetos_concluidos - (OLD.situacao <=> 'CONCLUIDO')
+    WHERE id = 1;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_participantes_insert AFTER INSERT ON participantes
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas SET total_participantes = total_participantes + 1 WHERE id = 1;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_participantes_delete AFTER DELETE ON participantes
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas SET total_participantes = total_participantes - 1 WHERE id = 1;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_producoes_insert AFTER INSERT ON producoes
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas SET total_producoes = total_producoes + 1 WHERE id = 1;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_producoes_delete AFTER DELETE ON producoes
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas SET total_producoes = total_producoes - 1 WHERE id = 1;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_financiamentos_insert AFTER INSERT ON financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas SET total_financiamentos = total_financiamentos + NEW.valor_total WHERE id = 1;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_financiamentos_update AFTER UPDATE ON financiamentos
+FOR EACH ROW
+BEGIN
+    IF NEW.valor_total != OLD.valor_total THEN
+        UPDATE estatisticas
+        SET total_financiamentos = total_financiamentos + NEW.valor_total - OLD.valor_total
+        WHERE id = 1;
+    END IF;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_financiamentos_delete AFTER DELETE ON financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas SET total_financiamentos = total_financiamentos - OLD.valor_total WHERE id = 1;
+END;
+//
+
+DELIMITER ;
+
+-- Valores iniciais a partir das tabelas existentes
+REPLACE INTO estatisticas
+(id, projetos_ativos, projetos_concluidos, total_participantes, total_producoes, total_financiamentos)
+SELECT 1,
+       (SELECT COUNT(*) FROM projetos WHERE situacao = 'EM_ANDAMENTO'),
+       (SELECT COUNT(*) FROM projetos WHERE situacao = 'CONCLUIDO'),
+       (SELECT COUNT(*) FROM participantes),
+       (SELECT COUNT(*) FROM producoes),
+       (SELECT COALESCE(SUM(valor_total), 0) FROM financiamentos);
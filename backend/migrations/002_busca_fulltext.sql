@@ -0,0 +1,6 @@
+-- 002: Índices FULLTEXT para a busca das listagens (app/search.py)
+
+ALTER TABLE participantes ADD FULLTEXT INDEX ft_participantes_busca (nome, email);
+ALTER TABLE agencias ADD FULLTEXT INDEX ft_agencias_nome (nome);
+ALTER TABLE projetos ADD FULLTEXT INDEX ft_projetos_busca (titulo, descricao);
+ALTER TABLE producoes ADD FULLTEXT INDEX ft_producoes_busca (titulo, meio_divulgacao);
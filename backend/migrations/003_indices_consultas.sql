@@ -0,0 +1,23 @@
+-- 003: Índices secundários para os filtros/ordenações das consultas dos repositórios
+
+-- participantes: ORDER BY nome, cpf (listagem) e WHERE tipo = ? ORDER BY nome (docentes)
+CREATE INDEX idx_participantes_nome ON participantes (nome);
+CREATE INDEX idx_participantes_tipo_nome ON participantes (tipo, nome);
+
+-- financiamentos: ORDER BY data_inicio DESC, filtros por agência e tipo de fomento
+CREATE INDEX idx_financiamentos_data_inicio ON financiamentos (data_inicio);
+CREATE INDEX idx_financiamentos_agencia_data ON financiamentos (agencia_sigla, data_inicio);
+CREATE INDEX idx_financiamentos_tipo_data ON financiamentos (tipo_fomento, data_inicio);
+
+-- projetos: ORDER BY data_inicio DESC, filtro por situação e por coordenador
+CREATE INDEX idx_projetos_data_inicio ON projetos (data_inicio);
+CREATE INDEX idx_projetos_situacao_data ON projetos (situacao, data_inicio);
+CREATE INDEX idx_projetos_coordenador_data ON projetos (coordenador_cpf, data_inicio);
+
+-- producoes: ORDER BY ano_publicacao DESC (recentes e listagem), filtros por ano e tipo
+CREATE INDEX idx_producoes_ano ON producoes (ano_publicacao);
+CREATE INDEX idx_producoes_ano_titulo ON producoes (ano_publicacao, titulo);
+CREATE INDEX idx_producoes_tipo_ano_titulo ON producoes (tipo, ano_publicacao, titulo);
+
+-- producoes_autores: autores de várias produções ordenados por ordem (get_autores_batch)
+CREATE INDEX idx_producoes_autores_ordem ON producoes_autores (producao_id, ordem, participante_cpf);
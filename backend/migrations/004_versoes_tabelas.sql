@@ -0,0 +1,245 @@
+-- 004: Versões por tabela (versoes_tabelas + triggers) para requisições condicionais
+
+-- Tabela: VersoesTabelas
+-- Versão (contador) e horário da última escrita de cada tabela, mantidos pelos
+-- triggers trg_versoes_*. Usada pelo backend para ETag/Last-Modified e 304.
+CREATE TABLE IF NOT EXISTS versoes_tabelas (
+    tabela VARCHAR(64) NOT NULL,
+    versao BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (tabela)
+);
+
+INSERT IGNORE INTO versoes_tabelas (tabela) VALUES
+('agencias'),
+('estatisticas'),
+('financiamentos'),
+('participantes'),
+('participantes_projetos'),
+('producoes'),
+('producoes_autores'),
+('projetos'),
+('projetos_financiamentos');
+
+DROP TRIGGER IF EXISTS trg_versoes_agencias_insert;
+DROP TRIGGER IF EXISTS trg_versoes_agencias_update;
+DROP TRIGGER IF EXISTS trg_versoes_agencias_delete;
+DROP TRIGGER IF EXISTS trg_versoes_financiamentos_insert;
+DROP TRIGGER IF EXISTS trg_versoes_financiamentos_update;
+DROP TRIGGER IF EXISTS trg_versoes_financiamentos_delete;
+DROP TRIGGER IF EXISTS trg_versoes_participantes_insert;
+DROP TRIGGER IF EXISTS trg_versoes_participantes_update;
+DROP TRIGGER IF EXISTS trg_versoes_participantes_delete;
+DROP TRIGGER IF EXISTS trg_versoes_participantes_projetos_insert;
+DROP TRIGGER IF EXISTS trg_versoes_participantes_projetos_update;
+DROP TRIGGER IF EXISTS trg_versoes_participantes_projetos_delete;
+DROP TRIGGER IF EXISTS trg_versoes_producoes_insert;
+DROP TRIGGER IF EXISTS trg_versoes_producoes_update;
+DROP TRIGGER IF EXISTS trg_versoes_producoes_delete;
+DROP TRIGGER IF EXISTS trg_versoes_producoes_autores_insert;
+DROP TRIGGER IF EXISTS trg_versoes_producoes_autores_update;
+DROP TRIGGER IF EXISTS trg_versoes_producoes_autores_delete;
+DROP TRIGGER IF EXISTS trg_versoes_projetos_insert;
+DROP TRIGGER IF EXISTS trg_versoes_projetos_update;
+DROP TRIGGER IF EXISTS trg_versoes_projetos_delete;
+DROP TRIGGER IF EXISTS trg_versoes_projetos_financiamentos_insert;
+DROP TRIGGER IF EXISTS trg_versoes_projetos_financiamentos_update;
+DROP TRIGGER IF EXISTS trg_versoes_projetos_financiamentos_delete;
+DROP TRIGGER IF EXISTS trg_versoes_estatisticas_insert;
+DROP TRIGGER IF EXISTS trg_versoes_estatisticas_update;
+
+DELIMITER //
+
+-- Versões das tabelas: cada escrita incrementa o contador da tabela em versoes_tabelas.
+-- Obs: ON DELETE CASCADE não dispara triggers, mas a tabela pai (que dispara) faz parte
+-- das dependências de todo endpoint que lê a tabela filha.
+CREATE TRIGGER trg_versoes_agencias_insert AFTER INSERT ON agencias
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'agencias';
+END;
+//
+
+CREATE TRIGGER trg_versoes_agencias_update AFTER UPDATE ON agencias
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'agencias';
+END;
+//
+
+CREATE TRIGGER trg_versoes_agencias_delete AFTER DELETE ON agencias
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'agencias';
+END;
+//
+
+CREATE TRIGGER trg_versoes_financiamentos_insert AFTER INSERT ON financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'financiamentos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_financiamentos_update AFTER UPDATE ON financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'financiamentos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_financiamentos_delete AFTER DELETE ON financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'financiamentos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_participantes_insert AFTER INSERT ON participantes
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'participantes';
+END;
+//
+
+CREATE TRIGGER trg_versoes_participantes_update AFTER UPDATE ON participantes
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'participantes';
+END;
+//
+
+CREATE TRIGGER trg_versoes_participantes_delete AFTER DELETE ON participantes
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'participantes';
+END;
+//
+
+CREATE TRIGGER trg_versoes_participantes_projetos_insert AFTER INSERT ON participantes_projetos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'participantes_projetos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_participantes_projetos_update AFTER UPDATE ON participantes_projetos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'participantes_projetos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_participantes_projetos_delete AFTER DELETE ON participantes_projetos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'participantes_projetos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_producoes_insert AFTER INSERT ON producoes
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'producoes';
+END;
+//
+
+CREATE TRIGGER trg_versoes_producoes_update AFTER UPDATE ON producoes
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'producoes';
+END;
+//
+
+CREATE TRIGGER trg_versoes_producoes_delete AFTER DELETE ON producoes
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'producoes';
+END;
+//
+
+CREATE TRIGGER trg_versoes_producoes_autores_insert AFTER INSERT ON producoes_autores
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'producoes_autores';
+END;
+//
+
+CREATE TRIGGER trg_versoes_producoes_autores_update AFTER UPDATE ON producoes_autores
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'producoes_autores';
+END;
+//
+
+CREATE TRIGGER trg_versoes_producoes_autores_delete AFTER DELETE ON producoes_autores
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'producoes_autores';
+END;
+//
+
+CREATE TRIGGER trg_versoes_projetos_insert AFTER INSERT ON projetos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'projetos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_projetos_update AFTER UPDATE ON projetos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'projetos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_projetos_delete AFTER DELETE ON projetos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'projetos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_projetos_financiamentos_insert AFTER INSERT ON projetos_financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'projetos_financiamentos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_projetos_financiamentos_update AFTER UPDATE ON projetos_financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'projetos_financiamentos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_projetos_financiamentos_delete AFTER DELETE ON projetos_financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'projetos_financiamentos';
+END;
+//
+
+-- estatisticas só muda quando algum contador muda (ou na reconciliação, via REPLACE)
+CREATE TRIGGER trg_versoes_estatisticas_insert AFTER INSERT ON estatisticas
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'estatisticas';
+END;
+//
+
+CREATE TRIGGER trg_versoes_estatisticas_update AFTER UPDATE ON estatisticas
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.projetos_ativos <=> OLD.projetos_ativos
+            AND NEW.projetos_concluidos <=> OLD.projetos_concluidos
+            AND NEW.total_participantes <=> OLD.total_participantes
+            AND NEW.total_producoes <=> OLD.total_producoes
+            AND NEW.total_financiamentos <=> OLD.total_financiamentos) THEN
+        UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'estatisticas';
+    END IF;
+END;
+//
+
+DELIMITER ;
@@ -0,0 +1,50 @@
+-- 005: Contadores de produtividade por participante e ano (tabela produtividade)
+
+-- Tabela: Produtividade
+-- Contadores de produtividade por participante e ano (produções por tipo, projetos
+-- coordenados e valor alocado aos projetos coordenados). Mantida incrementalmente
+-- pelo backend nas escritas (reparo sob demanda: python -m app.reconcile); base do /consultas/ranking.
+CREATE TABLE IF NOT EXISTS produtividade (
+    participante_cpf CHAR(11) NOT NULL,
+    ano INT NOT NULL,
+    producoes INT NOT NULL DEFAULT 0,
+    artigos INT NOT NULL DEFAULT 0,
+    livros INT NOT NULL DEFAULT 0,
+    capitulos INT NOT NULL DEFAULT 0,
+    trabalhos INT NOT NULL DEFAULT 0,
+    resumos INT NOT NULL DEFAULT 0,
+    projetos_coordenados INT NOT NULL DEFAULT 0,
+    valor_alocado DECIMAL(17, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (participante_cpf, ano),
+    INDEX idx_produtividade_ano (ano),
+    CONSTRAINT fk_produtividade_participante FOREIGN KEY (participante_cpf)
+        REFERENCES participantes(cpf) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+DELETE FROM produtividade;
+
+-- Carga inicial dos contadores de produtividade (mesmos cálculos do reconcile do backend)
+INSERT INTO produtividade (participante_cpf, ano, producoes, artigos, livros, capitulos, trabalhos, resumos,
+                           projetos_coordenados, valor_alocado)
+SELECT cpf, ano, SUM(producoes), SUM(artigos), SUM(livros), SUM(capitulos), SUM(trabalhos), SUM(resumos),
+       SUM(projetos_coordenados), SUM(valor_alocado)
+FROM (
+    SELECT pa.participante_cpf as cpf, p.ano_publicacao as ano, COUNT(*) as producoes,
+           SUM(p.tipo = 'ARTIGO') as artigos, SUM(p.tipo = 'LIVRO') as livros,
+           SUM(p.tipo = 'CAPITULO') as capitulos, SUM(p.tipo = 'TRABALHO') as trabalhos,
+           SUM(p.tipo = 'RESUMO') as resumos, 0 as projetos_coordenados, 0 as valor_alocado
+    FROM producoes_autores pa
+    JOIN producoes p ON p.id_registro = pa.producao_id
+    GROUP BY pa.participante_cpf, p.ano_publicacao
+    UNION ALL
+    SELECT coordenador_cpf, YEAR(data_inicio), 0, 0, 0, 0, 0, 0, COUNT(*), 0
+    FROM projetos
+    GROUP BY coordenador_cpf, YEAR(data_inicio)
+    UNION ALL
+    SELECT p.coordenador_cpf, COALESCE(YEAR(pf.data_alocacao), YEAR(p.data_inicio)),
+           0, 0, 0, 0, 0, 0, 0, SUM(pf.valor_alocado)
+    FROM projetos_financiamentos pf
+    JOIN projetos p ON p.codigo = pf.projeto_codigo
+    GROUP BY 1, 2
+) contagens
+GROUP BY cpf, ano;
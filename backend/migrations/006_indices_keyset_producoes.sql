@@ -0,0 +1,13 @@
+-- 006: Índices da paginação keyset de producoes
+
+-- A listagem ordena por ano_publicacao DESC, titulo, id_registro (direções
+-- mistas): os índices de 003, todos ascendentes, não servem esse ORDER BY e o
+-- MySQL fazia filesort em toda página. Com ano_publicacao DESC e id_registro
+-- explícito o índice entrega a página já ordenada. idx_producoes_ano é coberto
+-- pelo prefixo de idx_producoes_ano_titulo.
+ALTER TABLE producoes
+    DROP INDEX idx_producoes_ano,
+    DROP INDEX idx_producoes_ano_titulo,
+    DROP INDEX idx_producoes_tipo_ano_titulo,
+    ADD INDEX idx_producoes_ano_titulo (ano_publicacao DESC, titulo, id_registro),
+    ADD INDEX idx_producoes_tipo_ano_titulo (tipo, ano_publicacao DESC, titulo, id_registro);
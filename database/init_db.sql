@@ -1,6 +1,7 @@
 -- Script de Criação do Banco de Dados - SIGPesq (Versão Final)
 
-CREATE DATABASE IF NOT EXISTS sigpesq;
+-- utf8mb4_0900_ai_ci: comparações (e a busca FULLTEXT) ignoram acentos e caixa
+CREATE DATABASE IF NOT EXISTS sigpesq CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci;
 USE sigpesq;
 
 -- 1. Tabelas Principais (Entidades Fortes)
@@ -14,7 +15,10 @@ CREATE TABLE IF NOT EXISTS participantes (
     tipo ENUM('ADMIN', 'DOCENTE', 'DISCENTE', 'TECNICO') NOT NULL,
     senha_hash VARCHAR(255) NOT NULL DEFAULT 'hash_padrao', -- Simplificação
     criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    PRIMARY KEY (cpf)
+    PRIMARY KEY (cpf),
+    INDEX idx_participantes_nome (nome),
+    INDEX idx_participantes_tipo_nome (tipo, nome),
+    FULLTEXT INDEX ft_participantes_busca (nome, email)
 );
 
 -- Tabela: Agencia
@@ -22,7 +26,8 @@ CREATE TABLE IF NOT EXISTS participantes (
 CREATE TABLE IF NOT EXISTS agencias (
     sigla CHAR(20) NOT NULL,
     nome VARCHAR(100) NOT NULL,
-    PRIMARY KEY (sigla)
+    PRIMARY KEY (sigla),
+    FULLTEXT INDEX ft_agencias_nome (nome)
 );
 
 -- Tabela: Financiamento
@@ -35,6 +40,9 @@ CREATE TABLE IF NOT EXISTS financiamentos (
     data_inicio DATE NOT NULL,
     data_fim DATE NOT NULL,
     PRIMARY KEY (codigo_processo),
+    INDEX idx_financiamentos_data_inicio (data_inicio),
+    INDEX idx_financiamentos_agencia_data (agencia_sigla, data_inicio),
+    INDEX idx_financiamentos_tipo_data (tipo_fomento, data_inicio),
     FOREIGN KEY (agencia_sigla) REFERENCES agencias(sigla) ON UPDATE CASCADE,
     CONSTRAINT chk_fin_datas CHECK (data_fim >= data_inicio)
 );
@@ -53,6 +61,10 @@ CREATE TABLE IF NOT EXISTS projetos (
     situacao ENUM('EM_ANDAMENTO', 'CONCLUIDO', 'CANCELADO') DEFAULT 'EM_ANDAMENTO',
     coordenador_cpf CHAR(11) NOT NULL,
     PRIMARY KEY (codigo),
+    INDEX idx_projetos_data_inicio (data_inicio),
+    INDEX idx_projetos_situacao_data (situacao, data_inicio),
+    INDEX idx_projetos_coordenador_data (coordenador_cpf, data_inicio),
+    FULLTEXT INDEX ft_projetos_busca (titulo, descricao),
     FOREIGN KEY (coordenador_cpf) REFERENCES participantes(cpf) ON UPDATE CASCADE,
     CONSTRAINT chk_proj_datas CHECK (data_termino IS NULL OR data_termino >= data_inicio)
 );
@@ -96,6 +108,9 @@ CREATE TABLE IF NOT EXISTS producoes (
     ano_publicacao INT NOT NULL,
     meio_divulgacao VARCHAR(200),
     PRIMARY KEY (id_registro),
+    INDEX idx_producoes_ano_titulo (ano_publicacao DESC, titulo, id_registro),
+    INDEX idx_producoes_tipo_ano_titulo (tipo, ano_publicacao DESC, titulo, id_registro),
+    FULLTEXT INDEX ft_producoes_busca (titulo, meio_divulgacao),
     FOREIGN KEY (projeto_codigo) REFERENCES projetos(codigo) ON DELETE SET NULL ON UPDATE CASCADE
 );
 
@@ -106,10 +121,88 @@ CREATE TABLE IF NOT EXISTS producoes_autores (
     participante_cpf CHAR(11) NOT NULL,
     ordem INT NOT NULL,
     PRIMARY KEY (producao_id, participante_cpf),
+    INDEX idx_producoes_autores_ordem (producao_id, ordem, participante_cpf),
     FOREIGN KEY (producao_id) REFERENCES producoes(id_registro) ON DELETE CASCADE ON UPDATE CASCADE,
     FOREIGN KEY (participante_cpf) REFERENCES participantes(cpf) ON DELETE CASCADE ON UPDATE CASCADE
 );
 
+-- Tabela: Estatisticas
+-- Resumo materializado do dashboard (linha única, id = 1).
+-- Mantida pelos triggers trg_estatisticas_* e reconciliada periodicamente pelo backend.
+CREATE TABLE IF NOT EXISTS estatisticas (
+    id TINYINT NOT NULL DEFAULT 1,
+    projetos_ativos INT NOT NULL DEFAULT 0,
+    projetos_concluidos INT NOT NULL DEFAULT 0,
+    total_participantes INT NOT NULL DEFAULT 0,
+    total_producoes INT NOT NULL DEFAULT 0,
+    total_financiamentos DECIMAL(17, 2) NOT NULL DEFAULT 0,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (id),
+    CONSTRAINT chk_estatisticas_linha_unica CHECK (id = 1)
+);
+
+INSERT IGNORE INTO estatisticas (id) VALUES (1);
+
+-- Tabela: VersoesTabelas
+-- Versão (contador) e horário da última escrita de cada tabela, mantidos pelos
+-- triggers trg_versoes_*. Usada pelo backend para ETag/Last-Modified e 304.
+CREATE TABLE IF NOT EXISTS versoes_tabelas (
+    tabela VARCHAR(64) NOT NULL,
+    versao BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (tabela)
+);
+
+INSERT IGNORE INTO versoes_tabelas (tabela) VALUES
+('agencias'),
+('estatisticas'),
+('financiamentos'),
+('participantes'),
+('participantes_projetos'),
+('producoes'),
+('producoes_autores'),
+('projetos'),
+('projetos_financiamentos');
+
+-- Tabela: Produtividade
+-- Contadores de produtividade por participante e ano (produções por tipo, projetos
+-- coordenados e valor alocado aos projetos coordenados). Mantida incrementalmente
+-- pelo backend nas escritas (reparo sob demanda: python -m app.reconcile); base do /consultas/ranking.
+CREATE TABLE IF NOT EXISTS produtividade (
+    participante_cpf CHAR(11) NOT NULL,
+    ano INT NOT NULL,
+    producoes INT NOT NULL DEFAULT 0,
+    artigos INT NOT NULL DEFAULT 0,
+    livros INT NOT NULL DEFAULT 0,
+    capitulos INT NOT NULL DEFAULT 0,
+    trabalhos INT NOT NULL DEFAULT 0,
+    resumos INT NOT NULL DEFAULT 0,
+    projetos_coordenados INT NOT NULL DEFAULT 0,
+    valor_alocado DECIMAL(17, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (participante_cpf, ano),
+    INDEX idx_produtividade_ano (ano),
+    CONSTRAINT fk_produtividade_participante FOREIGN KEY (participante_cpf)
+        REFERENCES participantes(cpf) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+-- Tabela: SchemaMigrations
+-- Controle das migrações versionadas (backend/migrations, aplicadas por `python -m app.migrate`).
+-- Este script já contém o schema completo, então registra como aplicadas as migrações incluídas nele.
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    versao CHAR(3) NOT NULL,
+    descricao VARCHAR(200) NOT NULL,
+    aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (versao)
+);
+
+INSERT IGNORE INTO schema_migrations (versao, descricao) VALUES
+('001', 'estatisticas dashboard'),
+('002', 'busca fulltext'),
+('003', 'indices consultas'),
+('004', 'versoes tabelas'),
+('005', 'produtividade'),
+('006', 'indices keyset producoes');
+
 -- 4. Triggers (Regras de Negócio Avançadas)
 
 DELIMITER //
@@ -141,6 +234,285 @@ BEGIN
 END;
 //
 
+-- Estatísticas do dashboard: atualização incremental da tabela estatisticas.
+-- Obs: ON DELETE CASCADE não dispara triggers, mas nenhuma tabela contada é apagada em cascata.
+CREATE TRIGGER trg_estatisticas_projetos_insert AFTER INSERT ON projetos
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas
+    SET projetos_ativos = projetos_ativos + (NEW.situacao <=> 'EM_ANDAMENTO'),
+        projetos_concluidos = projetos_concluidos + (NEW.situacao <=> 'CONCLUIDO')
+    WHERE id = 1;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_projetos_update AFTER UPDATE ON projetos
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.situacao <=> OLD.situacao) THEN
+        UPDATE estatisticas
+        SET projetos_ativos = projetos_ativos + (NEW.situacao <=> 'EM_ANDAMENTO') - (OLD.situacao <=> 'EM_ANDAMENTO'),
+            projetos_concluidos = projetos_concluidos + (NEW.situacao <=> 'CONCLUIDO') - (OLD.situacao <=> 'CONCLUIDO')
+        WHERE id = 1;
+    END IF;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_projetos_delete AFTER DELETE ON projetos
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas
+    SET projetos_ativos = projetos_ativos - (OLD.situacao <=> 'EM_ANDAMENTO'),
+        projetos_concluidos = projetos_concluidos - (OLD.situacao <=> 'CONCLUIDO')
+    WHERE id = 1;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_participantes_insert AFTER INSERT ON participantes
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas SET total_participantes = total_participantes + 1 WHERE id = 1;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_participantes_delete AFTER DELETE ON participantes
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas SET total_participantes = total_participantes - 1 WHERE id = 1;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_producoes_insert AFTER INSERT ON producoes
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas SET total_producoes = total_producoes + 1 WHERE id = 1;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_producoes_delete AFTER DELETE ON producoes
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas SET total_producoes = total_producoes - 1 WHERE id = 1;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_financiamentos_insert AFTER INSERT ON financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas SET total_financiamentos = total_financiamentos + NEW.valor_total WHERE id = 1;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_financiamentos_update AFTER UPDATE ON financiamentos
+FOR EACH ROW
+BEGIN
+    IF NEW.valor_total != OLD.valor_total THEN
+        UPDATE estatisticas
+        SET total_financiamentos = total_financiamentos + NEW.valor_total - OLD.valor_total
+        WHERE id = 1;
+    END IF;
+END;
+//
+
+CREATE TRIGGER trg_estatisticas_financiamentos_delete AFTER DELETE ON financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE estatisticas SET total_financiamentos = total_financiamentos - OLD.valor_total WHERE id = 1;
+END;
+//
+
+-- Versões das tabelas: cada escrita incrementa o contador da tabela em versoes_tabelas.
+-- Obs: ON DELETE CASCADE não dispara triggers, mas a tabela pai (que dispara) faz parte
+-- das dependências de todo endpoint que lê a tabela filha.
+CREATE TRIGGER trg_versoes_agencias_insert AFTER INSERT ON agencias
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'agencias';
+END;
+//
+
+CREATE TRIGGER trg_versoes_agencias_update AFTER UPDATE ON agencias
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'agencias';
+END;
+//
+
+CREATE TRIGGER trg_versoes_agencias_delete AFTER DELETE ON agencias
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'agencias';
+END;
+//
+
+CREATE TRIGGER trg_versoes_financiamentos_insert AFTER INSERT ON financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'financiamentos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_financiamentos_update AFTER UPDATE ON financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'financiamentos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_financiamentos_delete AFTER DELETE ON financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'financiamentos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_participantes_insert AFTER INSERT ON participantes
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'participantes';
+END;
+//
+
+CREATE TRIGGER trg_versoes_participantes_update AFTER UPDATE ON participantes
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'participantes';
+END;
+//
+
+CREATE TRIGGER trg_versoes_participantes_delete AFTER DELETE ON participantes
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'participantes';
+END;
+//
+
+CREATE TRIGGER trg_versoes_participantes_projetos_insert AFTER INSERT ON participantes_projetos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'participantes_projetos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_participantes_projetos_update AFTER UPDATE ON participantes_projetos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'participantes_projetos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_participantes_projetos_delete AFTER DELETE ON participantes_projetos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'participantes_projetos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_producoes_insert AFTER INSERT ON producoes
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'producoes';
+END;
+//
+
+CREATE TRIGGER trg_versoes_producoes_update AFTER UPDATE ON producoes
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'producoes';
+END;
+//
+
+CREATE TRIGGER trg_versoes_producoes_delete AFTER DELETE ON producoes
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'producoes';
+END;
+//
+
+CREATE TRIGGER trg_versoes_producoes_autores_insert AFTER INSERT ON producoes_autores
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'producoes_autores';
+END;
+//
+
+CREATE TRIGGER trg_versoes_producoes_autores_update AFTER UPDATE ON producoes_autores
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'producoes_autores';
+END;
+//
+
+CREATE TRIGGER trg_versoes_producoes_autores_delete AFTER DELETE ON producoes_autores
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'producoes_autores';
+END;
+//
+
+CREATE TRIGGER trg_versoes_projetos_insert AFTER INSERT ON projetos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'projetos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_projetos_update AFTER UPDATE ON projetos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'projetos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_projetos_delete AFTER DELETE ON projetos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'projetos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_projetos_financiamentos_insert AFTER INSERT ON projetos_financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'projetos_financiamentos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_projetos_financiamentos_update AFTER UPDATE ON projetos_financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'projetos_financiamentos';
+END;
+//
+
+CREATE TRIGGER trg_versoes_projetos_financiamentos_delete AFTER DELETE ON projetos_financiamentos
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'projetos_financiamentos';
+END;
+//
+
+-- estatisticas só muda quando algum contador muda (ou na reconciliação, via REPLACE)
+CREATE TRIGGER trg_versoes_estatisticas_insert AFTER INSERT ON estatisticas
+FOR EACH ROW
+BEGIN
+    UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'estatisticas';
+END;
+//
+
+CREATE TRIGGER trg_versoes_estatisticas_update AFTER UPDATE ON estatisticas
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.projetos_ativos <=> OLD.projetos_ativos
+            AND NEW.projetos_concluidos <=> OLD.projetos_concluidos
+            AND NEW.total_participantes <=> OLD.total_participantes
+            AND NEW.total_producoes <=> OLD.total_producoes
+            AND NEW.total_financiamentos <=> OLD.total_financiamentos) THEN
+        UPDATE versoes_tabelas SET versao = versao + 1 WHERE tabela = 'estatisticas';
+    END IF;
+END;
+//
+
 DELIMITER ;
 
 -- 5. Massa de Dados (Seed Data)
@@ -200,3 +572,29 @@ INSERT INTO producoes_autores (producao_id, participante_cpf, ordem) VALUES
 ('REL-FINAL-BD', '22222222222', 1),  -- Beatriz
 ('REL-FINAL-BD', '44444444444', 2),  -- Daniela
 ('DOI-10.1000/2', '11111111111', 1); -- Alberto
+
+-- Carga inicial dos contadores de produtividade (mesmos cálculos do reconcile do backend)
+INSERT INTO produtividade (participante_cpf, ano, producoes, artigos, livros, capitulos, trabalhos, resumos,
+                           projetos_coordenados, valor_alocado)
+SELECT cpf, ano, SUM(producoes), SUM(artigos), SUM(livros), SUM(capitulos), SUM(trabalhos), SUM(resumos),
+       SUM(projetos_coordenados), SUM(valor_alocado)
+FROM (
+    SELECT pa.participante_cpf as cpf, p.ano_publicacao as ano, COUNT(*) as producoes,
+           SUM(p.tipo = 'ARTIGO') as artigos, SUM(p.tipo = 'LIVRO') as livros,
+           SUM(p.tipo = 'CAPITULO') as capitulos, SUM(p.tipo = 'TRABALHO') as trabalhos,
+           SUM(p.tipo = 'RESUMO') as resumos, 0 as projetos_coordenados, 0 as valor_alocado
+    FROM producoes_autores pa
+    JOIN producoes p ON p.id_registro = pa.producao_id
+    GROUP BY pa.participante_cpf, p.ano_publicacao
+    UNION ALL
+    SELECT coordenador_cpf, YEAR(data_inicio), 0, 0, 0, 0, 0, 0, COUNT(*), 0
+    FROM projetos
+    GROUP BY coordenador_cpf, YEAR(data_inicio)
+    UNION ALL
+    SELECT p.coordenador_cpf, COALESCE(YEAR(pf.data_alocacao), YEAR(p.data_inicio)),
+           0, 0, 0, 0, 0, 0, 0, SUM(pf.valor_alocado)
+    FROM projetos_financiamentos pf
+    JOIN projetos p ON p.codigo = pf.projeto_codigo
+    GROUP BY 1, 2
+) contagens
+GROUP BY cpf, ano;
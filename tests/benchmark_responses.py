@@ -0,0 +1,137 @@
+"""
+Benchmark de serialização e compressão das respostas de listagem.
+
+Chama a aplicação em processo (ASGI, sem servidor nem banco): os métodos de
+repositório usados são substituídos por funções que devolvem N linhas
+sintéticas, então o tempo medido é só roteamento + serialização + compressão.
+Para cada endpoint e Accept-Encoding mostra a latência (p50/p95) e o tamanho
+do corpo; ao final compara o jsonable_encoder + json.dumps (caminho padrão do
+FastAPI em endpoints sem response_model) com o json_response (orjson).
+
+Uso (na raiz do projeto):
+    python tests/benchmark_responses.py [linhas] [repeticoes]
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from fastapi.encoders import jsonable_encoder
+
+from app import conditional
+from app.main import app
+from app.responses import json_response
+from app.routers import consultas, producoes
+from app.security import get_current_user
+
+LINHAS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+REPETICOES = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+ENCODINGS = ["identity", "gzip", "br"]
+
+def producao(i):
+    return {
+        "id_registro": f"PROD-{i:06d}",
+        "titulo": f"Aprendizado de máquina aplicado à análise de dados científicos, parte {i}",
+        "tipo": ("ARTIGO", "LIVRO", "CAPITULO")[i % 3],
+        "ano_publicacao": 2015 + i % 10,
+        "meio_divulgacao": "Revista Brasileira de Computação Aplicada",
+        "projeto_codigo": f"PROJ-{i % 50:03d}",
+        "projeto_titulo": f"Projeto de Pesquisa {i % 50}",
+        "autores": [
+            {"cpf": f"{10**10 + i * 7 + j}", "nome": f"Pesquisador {i * 7 + j}", "ordem": j + 1}
+            for j in range(4)
+        ],
+    }
+
+PRODUCOES = [producao(i) for i in range(LINHAS)]
+POR_ANO = {
+    "ano": 2024,
+    "total": LINHAS,
+    "producoes": [
+        {**p, "criado_em": datetime(2024, 1, 1, 12, 0), "valor": Decimal("1234.56"), "data": date(2024, 3, 1)}
+        for p in PRODUCOES
+    ],
+}
+
+async def fake_list_all(*args, **kwargs):
+    return PRODUCOES, None, False
+
+async def fake_producoes_by_ano(ano):
+    return POR_ANO
+
+async def sem_versoes(tabelas):
+    return {}
+
+producoes.repository.list_all = fake_list_all
+consultas.consulta_repo.get_producoes_by_ano = fake_producoes_by_ano
+conditional.repository.get_versoes = sem_versoes
+app.dependency_overrides[get_current_user] = lambda: {"cpf": "00000000000", "type": "ADMIN"}
+
+async def get(path, accept_encoding):
+    """GET direto na aplicação ASGI; retorna (status, headers, corpo)"""
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+        "server": ("localhost", 8000), "client": ("127.0.0.1", 50000),
+    }
+    mensagens = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        mensagens.append(message)
+
+    await app(scope, receive, send)
+    headers = {k.decode(): v.decode() for k, v in mensagens[0]["headers"]}
+    corpo = b"".join(m.get("body", b"") for m in mensagens[1:])
+    return mensagens[0]["status"], headers, corpo
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+async def medir(path, accept_encoding):
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        status, headers, corpo = await get(path, accept_encoding)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    assert status == 200, status
+    return headers.get("content-encoding", "identity"), len(corpo), tempos
+
+async def main():
+    print(f"[*] {LINHAS} linhas, {REPETICOES} repetições por caso")
+    for path in ("/producoes/", "/consultas/producoes-por-ano/2024"):
+        base = None
+        for encoding in ENCODINGS:
+            usado, tamanho, tempos = await medir(path, encoding)
+            base = base or tamanho
+            print(
+                f"    {path:36} {encoding:8} -> {usado:8} {tamanho / 1024:9.1f} KiB "
+                f"({tamanho / base:6.1%})  p50 {statistics.median(tempos):7.2f} ms  "
+                f"p95 {percentil(tempos, 0.95):7.2f} ms"
+            )
+
+    print("[*] Serialização de /consultas/producoes-por-ano (sem compressão)")
+    for nome, serializar in (
+        ("jsonable_encoder + json.dumps", lambda: json.dumps(jsonable_encoder(POR_ANO), ensure_ascii=False).encode()),
+        ("json_response (orjson)", lambda: json_response(POR_ANO).body),
+    ):
+        tempos = []
+        for _ in range(REPETICOES):
+            inicio = time.perf_counter()
+            serializar()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        print(f"    {nome:32} p50 {statistics.median(tempos):7.2f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
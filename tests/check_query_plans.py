@@ -0,0 +1,161 @@
+"""
+Verifica com EXPLAIN se as queries dos repositórios usam índices.
+
+Executa os métodos de leitura dos repositórios contra o banco local, captura
+cada SELECT executado e roda EXPLAIN nele. Falha (exit code 1) se alguma
+tabela com mais de FULL_SCAN_MAX_ROWS linhas estimadas for lida com full scan
+(type = ALL), ou se uma listagem paginada por keyset (SEM_FILESORT) ordenar
+as linhas com filesort em vez de percorrer o índice.
+
+Com poucas linhas o MySQL prefere full scan mesmo havendo índice, por isso o
+limite acima e max_seeks_for_key = 1 na sessão (faz o otimizador preferir
+índices). Rode contra um banco populado (dezenas de milhares de linhas).
+
+Uso (na raiz do projeto, com o banco rodando e as migrações aplicadas):
+    python tests/check_query_plans.py
+"""
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+import aiomysql
+
+from app import database
+from app.pagination import encode_cursor
+from app.repositories import (
+    consulta_repository, dashboard_repository, financiamento_repository,
+    participante_repostory, producao_repository, projeto_repository,
+)
+
+# Full scan em tabelas com até esse número de linhas (ex: agencias) é aceitável
+FULL_SCAN_MAX_ROWS = int(os.getenv("FULL_SCAN_MAX_ROWS", "1000"))
+
+# Dados do seed do init_db.sql
+COORDENADOR_CPF = "11111111111"
+AGENCIA = "CNPq"
+ANO = 2024
+PROJETO = "PROJ-IA-01"
+
+# Listagens paginadas por keyset: rótulo -> alias da tabela que o índice deve ordenar
+SEM_FILESORT = {
+    "producoes.list_all(cursor)": "p",
+    "producoes.list_all(tipo, cursor)": "p",
+}
+
+captured = []
+
+class RecordingCursor:
+    def __init__(self, cursor, label):
+        self._cursor = cursor
+        self._label = label
+
+    async def execute(self, sql, params=None):
+        if sql.lstrip().upper().startswith("SELECT"):
+            captured.append((self._label, sql, params))
+        return await self._cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class RecordingCursorContext:
+    def __init__(self, context, label):
+        self._context = context
+        self._label = label
+
+    async def __aenter__(self):
+        return RecordingCursor(await self._context.__aenter__(), self._label)
+
+    async def __aexit__(self, *exc):
+        return await self._context.__aexit__(*exc)
+
+class RecordingConnection:
+    label = ""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args):
+        return RecordingCursorContext(self._conn.cursor(*args), RecordingConnection.label)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+original_get_db_connection = database.get_db_connection
+
+@asynccontextmanager
+async def recording_get_db_connection(*args, **kwargs):
+    async with original_get_db_connection(*args, **kwargs) as conn:
+        yield RecordingConnection(conn)
+
+for module in (consulta_repository, dashboard_repository, financiamento_repository,
+               participante_repostory, producao_repository, projeto_repository):
+    module.get_db_connection = recording_get_db_connection
+
+def calls():
+    projetos = projeto_repository.ProjetoRepository()
+    participantes = participante_repostory.ParticipanteRepository()
+    producoes = producao_repository.ProducaoRepository()
+    financiamentos = financiamento_repository.FinanciamentoRepository()
+    consultas = consulta_repository.ConsultaRepository()
+    dashboard = dashboard_repository.DashboardRepository()
+    return [
+        ("projetos.list_all", lambda: projetos.list_all(limit=50)),
+        ("projetos.list_all(situacao)", lambda: projetos.list_all(situacao="EM_ANDAMENTO", limit=50)),
+        ("projetos.list_all(search)", lambda: projetos.list_all(search="Inteligência", limit=50)),
+        ("projetos.get_details", lambda: projetos.get_details(PROJETO)),
+        ("projetos.get_by_coordenador", lambda: projetos.get_by_coordenador(COORDENADOR_CPF)),
+        ("participantes.list_all", lambda: participantes.list_all(limit=50)),
+        ("participantes.list_all(tipo)", lambda: participantes.list_all(tipo="DOCENTE", limit=50)),
+        ("participantes.list_all(search)", lambda: participantes.list_all(search="Alberto", limit=50)),
+        ("participantes.get_docentes", lambda: participantes.get_docentes.__wrapped__(participantes)),
+        ("producoes.list_all", lambda: producoes.list_all(limit=50)),
+        ("producoes.list_all(ano)", lambda: producoes.list_all(ano=ANO, limit=50)),
+        ("producoes.list_all(tipo)", lambda: producoes.list_all(tipo="ARTIGO", limit=50)),
+        ("producoes.list_all(search)", lambda: producoes.list_all(search="Learning", limit=50)),
+        ("producoes.list_all(cursor)", lambda: producoes.list_all(limit=50, cursor=encode_cursor([ANO, "", ""]))),
+        ("producoes.list_all(tipo, cursor)", lambda: producoes.list_all(
+            tipo="ARTIGO", limit=50, cursor=encode_cursor([ANO, "", ""]))),
+        ("producoes.get_by_ano", lambda: producoes.get_by_ano(ANO)),
+        ("financiamentos.list_financiamentos", lambda: financiamentos.list_financiamentos(limit=50)),
+        ("financiamentos.list_financiamentos(tipo)", lambda: financiamentos.list_financiamentos(tipo="Verba PROEX", limit=50)),
+        ("financiamentos.get_by_agencia", lambda: financiamentos.get_by_agencia(AGENCIA)),
+        ("consultas.get_projetos_by_coordenador", lambda: consultas.get_projetos_by_coordenador(COORDENADOR_CPF)),
+        ("consultas.get_financiamentos_by_agencia", lambda: consultas.get_financiamentos_by_agencia(AGENCIA)),
+        ("consultas.get_producoes_by_ano", lambda: consultas.get_producoes_by_ano(ANO)),
+        ("dashboard.get_recent_projects", lambda: dashboard.get_recent_projects(limit=5)),
+        ("dashboard.get_recent_producoes", lambda: dashboard.get_recent_producoes(limit=5)),
+    ]
+
+async def main():
+    await database.init_pool()
+    try:
+        for label, call in calls():
+            RecordingConnection.label = label
+            await call()
+
+        falhas = []
+        async with original_get_db_connection() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute("SET SESSION max_seeks_for_key = 1")
+                for label, sql, params in captured:
+                    await cursor.execute("EXPLAIN " + sql, params)
+                    for row in await cursor.fetchall():
+                        table = row.get("table") or ""
+                        if (row.get("type") == "ALL" and not table.startswith("<")
+                                and (row.get("rows") or 0) > FULL_SCAN_MAX_ROWS):
+                            falhas.append((label, table, "full scan", row.get("rows"), row.get("possible_keys")))
+                        if SEM_FILESORT.get(label) == table and "filesort" in (row.get("Extra") or ""):
+                            falhas.append((label, table, "filesort", row.get("rows"), row.get("possible_keys")))
+
+        for label, table, problema, rows, possible_keys in falhas:
+            print(f"[-] {label}: {problema} em '{table}' (~{rows} linhas, possible_keys: {possible_keys})")
+        print(f"[*] {len(captured)} queries verificadas, {len(falhas)} full scans/filesorts.")
+        return 1 if falhas else 0
+    finally:
+        await database.close_pool()
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
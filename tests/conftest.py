@@ -0,0 +1,98 @@
+"""
+Fixtures dos testes de integração (orçamento de queries, backpressure, busca).
+
+Os testes chamam a aplicação em processo (ASGI, sem servidor) contra o banco
+local com o seed do init_db.sql; sem banco disponível, são pulados.
+
+    def test_lista(api, query_budget):
+        with query_budget(3, max_repeats=1):
+            status, corpo = api.get("/producoes/")
+
+Uso (na raiz do projeto, com o banco rodando e as migrações aplicadas):
+    python -m pytest tests
+"""
+import asyncio
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+import pytest
+
+from app import database
+from app.instrumentation import count_queries
+from app.main import app
+from app.security import get_current_user
+
+ADMIN = {"cpf": "00000000000", "type": "ADMIN"}
+
+@pytest.fixture(scope="session")
+def loop():
+    """Event loop da sessão, com o pool de conexões aberto"""
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(database.init_pool())
+    if database.pool is None:
+        loop.close()
+        pytest.skip("banco de dados indisponível")
+    yield loop
+    loop.run_until_complete(database.close_pool())
+    loop.close()
+
+class Api:
+    """Requisições direto na aplicação ASGI, autenticadas como ADMIN"""
+
+    def __init__(self, loop):
+        self.loop = loop
+
+    def get(self, path, query_string=""):
+        """Retorna (status, corpo decodificado do JSON)"""
+        status, _, corpo = self.request("GET", path, query_string)
+        return status, corpo
+
+    def request(self, method, path, query_string="", json_body=None):
+        """Retorna (status, headers, corpo decodificado do JSON)"""
+        return self.loop.run_until_complete(self._request(method, path, query_string, json_body))
+
+    async def _request(self, method, path, query_string, json_body):
+        body = json.dumps(json_body).encode() if json_body is not None else b""
+        headers = [(b"content-type", b"application/json")] if json_body is not None else []
+        scope = {
+            "type": "http", "http_version": "1.1", "method": method, "scheme": "http",
+            "path": path, "raw_path": path.encode(), "query_string": query_string.encode(),
+            "root_path": "", "headers": headers, "server": ("localhost", 8000), "client": ("127.0.0.1", 50000),
+        }
+        mensagens = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            mensagens.append(message)
+
+        await app(scope, receive, send)
+        headers = {k.decode().lower(): v.decode() for k, v in mensagens[0].get("headers", [])}
+        corpo = b"".join(m.get("body", b"") for m in mensagens[1:])
+        return mensagens[0]["status"], headers, json.loads(corpo) if corpo else None
+
+@pytest.fixture
+def api(loop):
+    app.dependency_overrides[get_current_user] = lambda: ADMIN
+    yield Api(loop)
+    app.dependency_overrides.pop(get_current_user, None)
+
+@pytest.fixture
+def query_budget():
+    """Falha o teste se o bloco executar mais de max_queries queries ou repetir
+    o mesmo comando mais de max_repeats vezes (sinal de N+1)"""
+
+    @contextmanager
+    def budget(max_queries: int, max_repeats: int = 0):
+        with count_queries() as queries:
+            yield queries
+        problemas = queries.violations(max_queries, max_repeats)
+        if problemas:
+            pytest.fail("; ".join(problemas) + "\nQueries executadas:\n" + queries.report(), pytrace=False)
+
+    return budget
@@ -0,0 +1,301 @@
+"""
+Gera dados sintéticos para os benchmarks (tests/load_test.py).
+
+Popula participantes, agencias, financiamentos, projetos, participantes_projetos,
+projetos_financiamentos, producoes e producoes_autores com cerca de --linhas
+linhas no total (10k a 10M), mantendo proporções e fan-outs realistas:
+
+- 1 participante para cada 5 produções; 25% docentes (os coordenadores)
+- 1 projeto para cada 20 produções, com 2 a 8 membros e 1 a 3 financiamentos
+- 1 a 8 autores por produção (média ~3,5), concentrados em poucos
+  pesquisadores muito produtivos; 85% das produções ligadas a um projeto
+- anos de publicação concentrados nos mais recentes
+
+A geração é determinística (--seed): a mesma escala gera sempre os mesmos
+dados, e os identificadores (prefixo SYN-, CPFs iniciados em 9) podem ser
+calculados pelo load_test.py sem consultar o banco. Os triggers continuam
+ativos (estatisticas e versoes_tabelas ficam corretas); as chaves estrangeiras
+são desligadas na sessão, já que os dados são consistentes por construção. Os
+contadores de produtividade (mantidos pelo backend, não por triggers) são
+calculados no fim com a mesma consulta do reparo do backend.
+
+Uso (na raiz do projeto, com o banco rodando e as migrações aplicadas):
+    python tests/generate_synthetic_data.py --linhas 1m
+    python tests/generate_synthetic_data.py --limpar
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import pymysql
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from app.repositories.produtividade_repository import DESVIOS_SQL, METRICAS
+
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = int(os.getenv("DB_PORT", "3306"))
+DB_USER = os.getenv("DB_USER", "user")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "password")
+DB_NAME = os.getenv("DB_NAME", "sigpesq")
+
+BATCH_SIZE = 5000
+
+# Linhas de cada tabela por produção (autores: média de AUTORES_PESOS)
+LINHAS_POR_PRODUCAO = 1 + 3.5 + 1 / 5 + 1 / 20 + 5 / 20 + 1 / 40 + 2 / 20
+
+AUTORES_PESOS = [10, 15, 25, 20, 12, 8, 6, 4]  # 1 a 8 autores
+TIPOS_PRODUCAO = ["ARTIGO", "TRABALHO", "RESUMO", "CAPITULO", "LIVRO"]
+TIPOS_PRODUCAO_PESOS = [45, 25, 15, 10, 5]
+TIPOS_FOMENTO = ["Bolsa", "Auxílio Pesquisa", "Projeto Temático", "Infraestrutura", "Inovação"]
+FUNCOES = ["Pesquisador", "Bolsista", "Colaborador", "Técnico"]
+SITUACOES = ["EM_ANDAMENTO", "CONCLUIDO", "CANCELADO"]
+SITUACOES_PESOS = [55, 40, 5]
+ANO_INICIAL, ANO_FINAL = 2000, 2025
+PALAVRAS = (
+    "análise dados aprendizado máquina redes neurais sistemas distribuídos banco "
+    "otimização modelo computacional energia sustentável saúde pública genômica "
+    "algoritmos paralelos visão computacional linguagem natural segurança "
+    "informação robótica sensores internet coisas educação ensino avaliação"
+).split()
+VEICULOS = [f"Revista Brasileira de {area}" for area in ("Computação", "Física", "Saúde", "Educação", "Engenharia")] + [
+    f"Anais do Congresso de {area}" for area in ("Computação", "Biologia", "Matemática", "Química")
+]
+
+def parse_linhas(valor: str) -> int:
+    """'10k', '1m', '2500000' -> número de linhas"""
+    valor = valor.strip().lower()
+    multiplicador = {"k": 1_000, "m": 1_000_000}.get(valor[-1:], 1)
+    if multiplicador != 1:
+        valor = valor[:-1]
+    return int(float(valor) * multiplicador)
+
+class Escala:
+    """Tamanho de cada tabela para um total aproximado de linhas"""
+
+    def __init__(self, linhas: int):
+        self.producoes = max(100, int(linhas / LINHAS_POR_PRODUCAO))
+        self.participantes = max(40, self.producoes // 5)
+        self.projetos = max(10, self.producoes // 20)
+        self.financiamentos = max(5, self.producoes // 40)
+        self.agencias = 20
+
+    def __str__(self):
+        return (
+            f"{self.participantes} participantes, {self.projetos} projetos, "
+            f"{self.financiamentos} financiamentos, {self.producoes} produções"
+        )
+
+# Identificadores, também usados pelo load_test.py
+
+def cpf(i: int) -> str:
+    return f"9{i:010d}"
+
+def docente(i: int) -> bool:
+    return i % 4 == 0
+
+def docente_cpf(escala: Escala, rng: random.Random) -> str:
+    return cpf(4 * rng.randrange(escala.participantes // 4))
+
+def agencia_sigla(i: int) -> str:
+    return f"SYN-AG{i:02d}"
+
+def projeto_codigo(i: int) -> str:
+    return f"SYN-P{i:08d}"
+
+def financiamento_codigo(i: int) -> str:
+    return f"SYN-F{i:08d}"
+
+def producao_id(i: int) -> str:
+    return f"SYN-PROD-{i:010d}"
+
+def ano_recente(rng: random.Random) -> int:
+    """Ano concentrado nos mais recentes"""
+    return ANO_FINAL - int((ANO_FINAL - ANO_INICIAL + 1) * rng.random() ** 2)
+
+def popular(rng: random.Random, n: int) -> int:
+    """Índice em [0, n) com poucos índices muito frequentes (produtividade desigual)"""
+    return int(n * rng.random() ** 3)
+
+def titulo(rng: random.Random, prefixo: str) -> str:
+    return f"{prefixo} " + " ".join(rng.choices(PALAVRAS, k=rng.randint(4, 9)))
+
+# Geração das linhas de cada tabela (geradores: memória constante em qualquer escala)
+
+def gerar_participantes(escala, rng):
+    for i in range(escala.participantes):
+        if docente(i):
+            tipo = "DOCENTE"
+        else:
+            tipo = "DISCENTE" if rng.random() < 0.8 else "TECNICO"
+        yield cpf(i), f"Pesquisador Sintético {i}", f"syn{i}@bench.sigpesq", tipo
+
+def gerar_agencias(escala, rng):
+    for i in range(escala.agencias):
+        yield agencia_sigla(i), f"Agência Sintética de Fomento {i}"
+
+def gerar_financiamentos(escala, rng):
+    for i in range(escala.financiamentos):
+        inicio = date(ano_recente(rng), rng.randint(1, 12), rng.randint(1, 28))
+        yield (
+            financiamento_codigo(i), agencia_sigla(popular(rng, escala.agencias)),
+            rng.choice(TIPOS_FOMENTO), round(rng.lognormvariate(11.5, 1.2), 2),
+            inicio, inicio + timedelta(days=rng.randint(180, 1460)),
+        )
+
+def gerar_projetos(escala, rng):
+    for i in range(escala.projetos):
+        inicio = date(ano_recente(rng), rng.randint(1, 12), rng.randint(1, 28))
+        situacao = rng.choices(SITUACOES, SITUACOES_PESOS)[0]
+        termino = inicio + timedelta(days=rng.randint(365, 1825)) if situacao != "EM_ANDAMENTO" else None
+        yield (
+            projeto_codigo(i), titulo(rng, "Projeto"), " ".join(rng.choices(PALAVRAS, k=30)),
+            inicio, termino, situacao, docente_cpf(escala, rng),
+        )
+
+def gerar_participantes_projetos(escala, rng):
+    for i in range(escala.projetos):
+        membros = {popular(rng, escala.participantes) for _ in range(rng.randint(2, 8))}
+        entrada = date(ano_recente(rng), rng.randint(1, 12), rng.randint(1, 28))
+        for membro in membros:
+            yield projeto_codigo(i), cpf(membro), rng.choice(FUNCOES), entrada, None
+
+def gerar_projetos_financiamentos(escala, rng):
+    for i in range(escala.projetos):
+        for f in {rng.randrange(escala.financiamentos) for _ in range(rng.randint(1, 3))}:
+            yield projeto_codigo(i), financiamento_codigo(f), round(rng.uniform(5_000, 500_000), 2)
+
+def gerar_producoes(escala, rng):
+    for i in range(escala.producoes):
+        projeto = projeto_codigo(rng.randrange(escala.projetos)) if rng.random() < 0.85 else None
+        yield (
+            producao_id(i), projeto, titulo(rng, "Estudo"),
+            rng.choices(TIPOS_PRODUCAO, TIPOS_PRODUCAO_PESOS)[0], ano_recente(rng), rng.choice(VEICULOS),
+        )
+
+def gerar_producoes_autores(escala, rng):
+    for i in range(escala.producoes):
+        quantidade = rng.choices(range(1, len(AUTORES_PESOS) + 1), AUTORES_PESOS)[0]
+        autores = []
+        while len(autores) < quantidade:
+            autor = popular(rng, escala.participantes)
+            if autor not in autores:
+                autores.append(autor)
+        for ordem, autor in enumerate(autores, start=1):
+            yield producao_id(i), cpf(autor), ordem
+
+# (tabela, colunas, gerador), na ordem de inserção
+TABELAS = [
+    ("participantes", "cpf, nome, email, tipo", gerar_participantes),
+    ("agencias", "sigla, nome", gerar_agencias),
+    ("financiamentos", "codigo_processo, agencia_sigla, tipo_fomento, valor_total, data_inicio, data_fim", gerar_financiamentos),
+    ("projetos", "codigo, titulo, descricao, data_inicio, data_termino, situacao, coordenador_cpf", gerar_projetos),
+    ("participantes_projetos", "projeto_codigo, participante_cpf, funcao, data_entrada, data_saida", gerar_participantes_projetos),
+    ("projetos_financiamentos", "projeto_codigo, financiamento_codigo, valor_alocado", gerar_projetos_financiamentos),
+    ("producoes", "id_registro, projeto_codigo, titulo, tipo, ano_publicacao, meio_divulgacao", gerar_producoes),
+    ("producoes_autores", "producao_id, participante_cpf, ordem", gerar_producoes_autores),
+]
+
+# Remoção dos dados sintéticos, na ordem inversa (tabela, condição)
+LIMPEZA = [
+    ("producoes_autores", "producao_id LIKE 'SYN-%'"),
+    ("producoes", "id_registro LIKE 'SYN-%'"),
+    ("projetos_financiamentos", "projeto_codigo LIKE 'SYN-%'"),
+    ("participantes_projetos", "projeto_codigo LIKE 'SYN-%'"),
+    ("projetos", "codigo LIKE 'SYN-%'"),
+    ("financiamentos", "codigo_processo LIKE 'SYN-%'"),
+    ("agencias", "sigla LIKE 'SYN-%'"),
+    ("produtividade", "participante_cpf IN (SELECT cpf FROM participantes WHERE email LIKE '%@bench.sigpesq')"),
+    ("participantes", "email LIKE '%@bench.sigpesq'"),
+]
+
+def connect():
+    return pymysql.connect(
+        host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASSWORD,
+        database=DB_NAME, charset="utf8mb4", autocommit=False,
+    )
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def inserir(conn, escala, seed):
+    with conn.cursor() as cursor:
+        cursor.execute("SET foreign_key_checks = 0")
+        for indice, (tabela, colunas, gerar) in enumerate(TABELAS):
+            # Um gerador por tabela com semente própria: cada tabela é reproduzível isoladamente
+            rng = random.Random(f"{seed}:{indice}")
+            sql = f"INSERT INTO {tabela} ({colunas}) VALUES ({', '.join(['%s'] * len(colunas.split(',')))})"
+            inicio, total = time.perf_counter(), 0
+            for batch in batches(gerar(escala, rng), BATCH_SIZE):
+                cursor.executemany(sql, batch)  # pymysql agrupa em INSERTs multi-linha
+                conn.commit()
+                total += len(batch)
+                print(f"\r    {tabela:24} {total:>12,} linhas", end="", flush=True)
+            elapsed = time.perf_counter() - inicio
+            print(f"\r    {tabela:24} {total:>12,} linhas em {elapsed:7.1f} s ({total / max(elapsed, 1e-9):,.0f}/s)")
+        cursor.execute("SET foreign_key_checks = 1")
+
+def atualizar_produtividade(conn):
+    """Soma aos contadores de produtividade a diferença para as tabelas de origem (inclui os dados gerados)"""
+    inicio = time.perf_counter()
+    with conn.cursor() as cursor:
+        linhas = cursor.execute(f"""
+            INSERT INTO produtividade (participante_cpf, ano, {", ".join(METRICAS)})
+            SELECT * FROM ({DESVIOS_SQL}) desvios
+            ON DUPLICATE KEY UPDATE {", ".join(f"{m} = produtividade.{m} + desvios.{m}" for m in METRICAS)}
+        """)
+        conn.commit()
+    print(f"    {'produtividade':24} {linhas:>12,} linhas em {time.perf_counter() - inicio:7.1f} s")
+
+def limpar(conn):
+    with conn.cursor() as cursor:
+        for tabela, condicao in LIMPEZA:
+            total = 0
+            while True:
+                # Em lotes: um DELETE único de milhões de linhas estoura o undo log
+                removidas = cursor.execute(f"DELETE FROM {tabela} WHERE {condicao} LIMIT {BATCH_SIZE}")
+                conn.commit()
+                total += removidas
+                if removidas < BATCH_SIZE:
+                    break
+            print(f"    {tabela:24} {total:>12,} linhas removidas")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", default="100k", help="total aproximado de linhas (ex: 10k, 1m, 10m)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--limpar", action="store_true", help="remove os dados sintéticos e sai")
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        if args.limpar:
+            print("[*] Removendo dados sintéticos")
+            limpar(conn)
+            return
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM participantes WHERE email LIKE '%@bench.sigpesq'")
+            if cursor.fetchone()[0]:
+                sys.exit("Já existem dados sintéticos; rode com --limpar antes de gerar outra escala")
+        escala = Escala(parse_linhas(args.linhas))
+        print(f"[*] Gerando {escala} (seed {args.seed})")
+        inicio = time.perf_counter()
+        inserir(conn, escala, args.seed)
+        atualizar_produtividade(conn)
+        print(f"[*] Concluído em {time.perf_counter() - inicio:.1f} s")
+        print(f"    Use no load_test.py: --linhas {args.linhas}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
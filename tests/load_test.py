@@ -0,0 +1,242 @@
+"""
+Teste de carga da API: repete uma mistura ponderada dos endpoints reais e
+mostra, por endpoint, requisições, erros, RPS e latência (média, p50, p95, p99).
+
+Os parâmetros (códigos de projeto, produções, CPFs, anos, agências) são
+sorteados entre os dados gerados por tests/generate_synthetic_data.py para a
+mesma escala e seed, então a sequência de requisições é reproduzível. Cada
+worker mantém uma conexão keep-alive (cliente HTTP/1.1 mínimo, só biblioteca
+padrão). O token é emitido localmente com a mesma chave do backend, como
+ADMIN, sem passar pelo bcrypt do /auth/login.
+
+Se o backend estiver com QUERY_DEBUG_HEADERS=true, mostra também a média de
+queries por requisição (header X-Query-Count).
+
+Uso (na raiz do projeto, com o backend rodando contra o banco populado):
+    python tests/generate_synthetic_data.py --linhas 1m
+    python tests/load_test.py --linhas 1m --concorrencia 32 --duracao 60
+    python tests/load_test.py --linhas 1m --saida resultado.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import timedelta
+from urllib.parse import quote, urlencode, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from generate_synthetic_data import (
+    ANO_FINAL, Escala, PALAVRAS, TIPOS_PRODUCAO, agencia_sigla, ano_recente, cpf, docente_cpf,
+    parse_linhas, popular, producao_id, projeto_codigo,
+)
+from app.security import create_access_token
+
+# (peso, nome, função que monta caminho e query string a partir do rng)
+MISTURA = [
+    (20, "GET /producoes/", lambda e, r: ("/producoes/", {"limit": 50})),
+    (8, "GET /producoes/?ano&tipo", lambda e, r: ("/producoes/", {"limit": 50, "ano": ano_recente(r), "tipo": r.choice(TIPOS_PRODUCAO)})),
+    (4, "GET /producoes/?search", lambda e, r: ("/producoes/", {"limit": 50, "search": r.choice(PALAVRAS)})),
+    (10, "GET /producoes/{id}", lambda e, r: (f"/producoes/{producao_id(r.randrange(e.producoes))}", {})),
+    (10, "GET /projetos/", lambda e, r: ("/projetos/", {"limit": 50})),
+    (8, "GET /projetos/{codigo}", lambda e, r: (f"/projetos/{projeto_codigo(r.randrange(e.projetos))}", {})),
+    (8, "GET /projetos/{codigo}/detalhes", lambda e, r: (f"/projetos/{projeto_codigo(r.randrange(e.projetos))}/detalhes", {})),
+    (5, "GET /participantes/", lambda e, r: ("/participantes/", {"limit": 50})),
+    (3, "GET /participantes/{cpf}", lambda e, r: (f"/participantes/{cpf(popular(r, e.participantes))}", {})),
+    (5, "GET /financiamentos/", lambda e, r: ("/financiamentos/", {"limit": 50})),
+    (8, "GET /dashboard/stats", lambda e, r: ("/dashboard/stats", {})),
+    (3, "GET /dashboard/recent-projects", lambda e, r: ("/dashboard/recent-projects", {})),
+    (3, "GET /dashboard/recent-producoes", lambda e, r: ("/dashboard/recent-producoes", {})),
+    (3, "GET /consultas/projetos-por-coordenador/{cpf}", lambda e, r: (f"/consultas/projetos-por-coordenador/{docente_cpf(e, r)}", {})),
+    (2, "GET /consultas/financiamentos-por-agencia/{sigla}", lambda e, r: (f"/consultas/financiamentos-por-agencia/{agencia_sigla(r.randrange(e.agencias))}", {})),
+    (1, "GET /consultas/producoes-por-ano/{ano}", lambda e, r: (f"/consultas/producoes-por-ano/{ANO_FINAL - r.randrange(3)}", {})),
+    (2, "GET /consultas/ranking", lambda e, r: ("/consultas/ranking", {"metrica": r.choice(["producoes", "artigos", "valor_alocado"]), "ano_inicio": ano_recente(r)})),
+]
+
+class Resultado:
+    def __init__(self):
+        self.latencias = []
+        self.erros = 0
+        self.status = {}
+        self.queries = []
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+class Conexao:
+    """Conexão HTTP/1.1 keep-alive (reaberta se o servidor fechar)"""
+
+    def __init__(self, host, port, headers):
+        self.host, self.port = host, port
+        self.headers = "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        self.reader = self.writer = None
+
+    async def get(self, alvo):
+        """Retorna (status, headers, corpo)"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            self.writer.write(f"GET {alvo} HTTP/1.1\r\n{self.headers}\r\n".encode())
+            await self.writer.drain()
+            return await self._resposta()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.close()
+            raise
+
+    async def _resposta(self):
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            linha = await self.reader.readline()
+            if linha in (b"\r\n", b""):
+                break
+            nome, _, valor = linha.decode("latin-1").partition(":")
+            headers[nome.strip().lower()] = valor.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            partes = []
+            while True:
+                tamanho = int((await self.reader.readline()).split(b";")[0], 16)
+                partes.append(await self.reader.readexactly(tamanho + 2))
+                if tamanho == 0:
+                    break
+            corpo = b"".join(p[:-2] for p in partes)
+        else:
+            corpo = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection") == "close":
+            await self.close()
+        return status, headers, corpo
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+async def worker(numero, args, escala, headers, resultados, fim, contador):
+    parsed = urlsplit(args.url)
+    conexao = Conexao(parsed.hostname, parsed.port or 80, headers)
+    rng = random.Random(f"{args.seed}:{numero}")
+    pesos = [peso for peso, _, _ in MISTURA]
+    try:
+        while time.perf_counter() < fim and (args.requisicoes is None or contador[0] < args.requisicoes):
+            contador[0] += 1
+            _, nome, montar = rng.choices(MISTURA, pesos)[0]
+            caminho, params = montar(escala, rng)
+            alvo = parsed.path.rstrip("/") + quote(caminho) + ("?" + urlencode(params) if params else "")
+            resultado = resultados.setdefault(nome, Resultado())
+            inicio = time.perf_counter()
+            try:
+                status, resposta_headers, _ = await conexao.get(alvo)
+            except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+                resultado.erros += 1
+                continue
+            resultado.latencias.append((time.perf_counter() - inicio) * 1000)
+            resultado.status[status] = resultado.status.get(status, 0) + 1
+            if status >= 400:
+                resultado.erros += 1
+            if "x-query-count" in resposta_headers:
+                resultado.queries.append(int(resposta_headers["x-query-count"]))
+    finally:
+        await conexao.close()
+
+async def executar(args, escala, headers, duracao):
+    resultados = {}
+    contador = [0]
+    fim = time.perf_counter() + duracao
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        worker(n, args, escala, headers, resultados, fim, contador) for n in range(args.concorrencia)
+    ))
+    return resultados, time.perf_counter() - inicio
+
+def resumo(resultados, elapsed):
+    linhas = []
+    for nome, r in sorted(resultados.items()):
+        if not r.latencias:
+            linhas.append({"endpoint": nome, "requisicoes": 0, "erros": r.erros})
+            continue
+        linhas.append({
+            "endpoint": nome,
+            "requisicoes": len(r.latencias),
+            "erros": r.erros,
+            "status": r.status,
+            "rps": len(r.latencias) / elapsed,
+            "media_ms": statistics.fmean(r.latencias),
+            "p50_ms": percentil(r.latencias, 0.50),
+            "p95_ms": percentil(r.latencias, 0.95),
+            "p99_ms": percentil(r.latencias, 0.99),
+            "queries_media": statistics.fmean(r.queries) if r.queries else None,
+        })
+    todas = [l for r in resultados.values() for l in r.latencias]
+    total = {
+        "endpoint": "TOTAL",
+        "requisicoes": len(todas),
+        "erros": sum(r.erros for r in resultados.values()),
+        "rps": len(todas) / elapsed,
+        "media_ms": statistics.fmean(todas) if todas else 0,
+        "p50_ms": percentil(todas, 0.50) if todas else 0,
+        "p95_ms": percentil(todas, 0.95) if todas else 0,
+        "p99_ms": percentil(todas, 0.99) if todas else 0,
+    }
+    return linhas, total
+
+def imprimir(linhas, total):
+    print(f"    {'endpoint':50} {'reqs':>7} {'erros':>6} {'rps':>8} {'média':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>7}")
+    for l in linhas + [total]:
+        if not l["requisicoes"]:
+            print(f"    {l['endpoint']:50} {0:>7} {l['erros']:>6}")
+            continue
+        queries = f"{l['queries_media']:7.1f}" if l.get("queries_media") is not None else f"{'-':>7}"
+        print(
+            f"    {l['endpoint']:50} {l['requisicoes']:>7} {l['erros']:>6} {l['rps']:8.1f} "
+            f"{l['media_ms']:8.1f} {l['p50_ms']:8.1f} {l['p95_ms']:8.1f} {l['p99_ms']:8.1f} {queries}"
+        )
+
+async def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API com a mistura de endpoints")
+    parser.add_argument("--url", default=os.getenv("API_URL", "http://localhost:8000"))
+    parser.add_argument("--linhas", default="100k", help="mesma escala usada no generate_synthetic_data.py")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concorrencia", type=int, default=16, help="requisições simultâneas (workers)")
+    parser.add_argument("--duracao", type=float, default=30, help="segundos de medição")
+    parser.add_argument("--aquecimento", type=float, default=5, help="segundos de carga antes de medir")
+    parser.add_argument("--requisicoes", type=int, default=None, help="para após N requisições medidas")
+    parser.add_argument("--accept-encoding", default="gzip", help="identity, gzip ou br")
+    parser.add_argument("--saida", help="grava o resultado em JSON (para comparar execuções)")
+    args = parser.parse_args()
+
+    escala = Escala(parse_linhas(args.linhas))
+    token = create_access_token(
+        data={"sub": cpf(0), "name": "Benchmark", "type": "ADMIN"}, expires_delta=timedelta(hours=2)
+    )
+    headers = {
+        "Host": urlsplit(args.url).netloc,
+        "Authorization": f"Bearer {token}",
+        "Accept-Encoding": args.accept_encoding,
+        "Connection": "keep-alive",
+    }
+
+    print(f"[*] {args.url}: {escala}")
+    print(f"[*] {args.concorrencia} workers, {args.aquecimento:g} s de aquecimento, {args.duracao:g} s de medição")
+    if args.aquecimento > 0:
+        aquecimento = argparse.Namespace(**{**vars(args), "requisicoes": None, "seed": args.seed + 1})
+        await executar(aquecimento, escala, headers, args.aquecimento)
+    resultados, elapsed = await executar(args, escala, headers, args.duracao)
+
+    linhas, total = resumo(resultados, elapsed)
+    imprimir(linhas, total)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump({
+                "url": args.url, "linhas": args.linhas, "seed": args.seed,
+                "concorrencia": args.concorrencia, "duracao_s": elapsed,
+                "endpoints": linhas, "total": total,
+            }, arquivo, ensure_ascii=False, indent=2)
+        print(f"[*] Resultado gravado em {args.saida}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
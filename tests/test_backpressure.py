@@ -0,0 +1,50 @@
+"""
+Backpressure: quando o pool de conexões ou a fila do bcrypt estão saturados, a
+API responde 503 com Retry-After, mesmo nos endpoints de escrita que convertem
+os demais erros em 400.
+"""
+import pytest
+
+from app import database, security
+
+PARTICIPANTE = {
+    "cpf": "99999999990", "nome": "Teste Backpressure",
+    "email": "backpressure@teste.sigpesq", "tipo": "DISCENTE", "senha": "segredo123",
+}
+
+@pytest.fixture
+def fila_bcrypt_cheia(monkeypatch):
+    monkeypatch.setattr(security, "PASSWORD_HASH_MAX_QUEUE", 0)
+
+@pytest.mark.parametrize("method, path, body", [
+    ("POST", "/register", {"name": "Teste", "email": "register@teste.sigpesq", "password": "segredo123"}),
+    ("POST", "/participantes/", PARTICIPANTE),
+    ("PUT", "/participantes/11111111111", {**PARTICIPANTE, "cpf": "11111111111"}),
+])
+def test_fila_bcrypt_cheia_responde_503(api, fila_bcrypt_cheia, method, path, body):
+    status, headers, corpo = api.request(method, path, json_body=body)
+    assert status == 503, corpo
+    assert headers.get("retry-after") == "1"
+
+@pytest.fixture
+def pool_esgotado(api, monkeypatch):
+    """Segura todas as conexões do pool primário durante o teste"""
+    monkeypatch.setattr(database, "DB_POOL_ACQUIRE_TIMEOUT", 0.05)
+    pool = database.pool
+    conexoes = [api.loop.run_until_complete(pool.acquire()) for _ in range(pool.maxsize)]
+    yield
+    for conn in conexoes:
+        pool.release(conn)
+
+@pytest.mark.parametrize("method, path, body", [
+    ("POST", "/projetos/", {
+        "codigo": "BKP-01", "titulo": "Teste", "data_inicio": "2024-01-01T00:00:00",
+        "coordenador_cpf": "11111111111",
+    }),
+    ("POST", "/financiamentos/agencias", {"sigla": "BKP", "nome": "Teste"}),
+    ("POST", "/producoes/", {"id_registro": "BKP-01", "titulo": "Teste", "tipo": "ARTIGO", "ano_publicacao": 2024}),
+])
+def test_pool_esgotado_responde_503(api, pool_esgotado, method, path, body):
+    status, headers, corpo = api.request(method, path, json_body=body)
+    assert status == 503, corpo
+    assert headers.get("retry-after") == "1"
@@ -0,0 +1,25 @@
+"""
+Busca FULLTEXT nas listagens: os filtros entram em cada ramo da busca antes do
+limite de SEARCH_MAX_RESULTS, e a resposta sinaliza quando a busca foi cortada.
+"""
+from app import search
+
+def test_filtro_aplicado_antes_do_limite(api, monkeypatch):
+    # "PROJ" casa com os três projetos do seed pelo prefixo do código
+    monkeypatch.setattr(search, "SEARCH_MAX_RESULTS", 1)
+    status, corpo = api.get("/projetos/", "search=PROJ&situacao=CONCLUIDO")
+    assert status == 200, corpo
+    assert [projeto["codigo"] for projeto in corpo] == ["PROJ-BD-02"]
+
+def test_busca_cortada_sinalizada(api, monkeypatch):
+    monkeypatch.setattr(search, "SEARCH_MAX_RESULTS", 1)
+    status, headers, corpo = api.request("GET", "/projetos/", "search=PROJ&limit=10")
+    assert status == 200, corpo
+    assert len(corpo) == 1
+    assert headers.get(search.SEARCH_TRUNCATED_HEADER.lower()) == "true"
+
+def test_busca_completa_sem_header(api):
+    status, headers, corpo = api.request("GET", "/projetos/", "search=PROJ&limit=10")
+    assert status == 200, corpo
+    assert len(corpo) == 3
+    assert search.SEARCH_TRUNCATED_HEADER.lower() not in headers
@@ -0,0 +1,39 @@
+"""
+Orçamento de queries por endpoint: um endpoint que passa a executar mais
+queries que o previsto (ex: uma por linha da lista) falha aqui.
+
+Os orçamentos incluem a consulta a versoes_tabelas feita pelas requisições
+condicionais (app/conditional.py); caches em memória podem fazer uma
+requisição usar menos queries, nunca mais.
+"""
+import pytest
+
+# Dados do seed do init_db.sql
+COORDENADOR_CPF = "11111111111"
+AGENCIA = "CNPq"
+PROJETO = "PROJ-IA-01"
+PRODUCAO = "DOI-10.1000/1"
+
+# (caminho, query string, máximo de queries, máximo de repetições do mesmo comando)
+BUDGETS = [
+    ("/producoes/", "limit=50", 3, 1),
+    (f"/producoes/{PRODUCAO}", "", 3, 1),
+    ("/projetos/", "limit=50", 2, 1),
+    (f"/projetos/{PROJETO}", "", 2, 1),
+    (f"/projetos/{PROJETO}/detalhes", "", 4, 1),
+    ("/participantes/", "limit=50", 2, 1),
+    ("/financiamentos/", "limit=50", 2, 1),
+    ("/dashboard/stats", "", 2, 1),
+    ("/dashboard/recent-projects", "", 2, 1),
+    ("/dashboard/recent-producoes", "", 2, 1),
+    ("/consultas/producoes-por-ano/2024", "", 1, 1),
+    (f"/consultas/projetos-por-coordenador/{COORDENADOR_CPF}", "", 1, 1),
+    (f"/consultas/financiamentos-por-agencia/{AGENCIA}", "", 1, 1),
+    ("/consultas/ranking", "metrica=artigos&ano_inicio=2023&limit=10", 1, 1),
+]
+
+@pytest.mark.parametrize("path, query_string, max_queries, max_repeats", BUDGETS)
+def test_query_budget(api, query_budget, path, query_string, max_queries, max_repeats):
+    with query_budget(max_queries, max_repeats):
+        status, _ = api.get(path, query_string)
+    assert status == 200